@@ -0,0 +1,33 @@
+"""Add composite (post_id, created_at, id) index on comments
+
+Revision ID: 2c7e91a4b0d3
+Revises: fbde3d74dc58
+Create Date: 2025-10-26 18:40:51.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c7e91a4b0d3'
+down_revision: Union[str, Sequence[str], None] = 'fbde3d74dc58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_comments_post_id_created_at_id',
+        'comments',
+        ['post_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_post_id_created_at_id', table_name='comments')
@@ -0,0 +1,44 @@
+"""Add version and updated_at columns to posts
+
+Revision ID: 5d3b8c0e1a92
+Revises: 9a41d6e2f7c5
+Create Date: 2025-10-28 16:22:10.048193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d3b8c0e1a92'
+down_revision: Union[str, Sequence[str], None] = '9a41d6e2f7c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('posts', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.execute(
+        """
+        UPDATE posts
+        SET updated_at = GREATEST(posts.created_at, stats.last_comment_at),
+            version = 1 + stats.comment_count
+        FROM (
+            SELECT post_id, MAX(created_at) AS last_comment_at, COUNT(*) AS comment_count
+            FROM comments
+            GROUP BY post_id
+        ) AS stats
+        WHERE stats.post_id = posts.id
+        """
+    )
+    op.execute("UPDATE posts SET updated_at = created_at WHERE version = 1")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('posts', 'updated_at')
+    op.drop_column('posts', 'version')
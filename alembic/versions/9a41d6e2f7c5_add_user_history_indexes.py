@@ -0,0 +1,40 @@
+"""Add (user_id, created_at, id) indexes on posts and comments
+
+Revision ID: 9a41d6e2f7c5
+Revises: 2c7e91a4b0d3
+Create Date: 2025-10-27 09:05:37.220618
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a41d6e2f7c5'
+down_revision: Union[str, Sequence[str], None] = '2c7e91a4b0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_posts_user_id_created_at_id',
+        'posts',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_comments_user_id_created_at_id',
+        'comments',
+        ['user_id', 'created_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_user_id_created_at_id', table_name='comments')
+    op.drop_index('ix_posts_user_id_created_at_id', table_name='posts')
@@ -0,0 +1,54 @@
+"""Add denormalized post and comment counters
+
+Revision ID: b84d1f3e6c20
+Revises: 7e2f4a9c1b36
+Create Date: 2025-11-02 09:41:27.553120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84d1f3e6c20'
+down_revision: Union[str, Sequence[str], None] = '7e2f4a9c1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('posts', sa.Column('last_comment_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE posts
+        SET comment_count = stats.comment_count,
+            last_comment_at = stats.last_comment_at
+        FROM (
+            SELECT post_id, COUNT(*) AS comment_count, MAX(created_at) AS last_comment_at
+            FROM comments
+            GROUP BY post_id
+        ) AS stats
+        WHERE stats.post_id = posts.id
+        """
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET post_count = (SELECT COUNT(*) FROM posts WHERE posts.user_id = users.id),
+            comment_count = (SELECT COUNT(*) FROM comments WHERE comments.user_id = users.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'comment_count')
+    op.drop_column('users', 'post_count')
+    op.drop_column('posts', 'last_comment_at')
+    op.drop_column('posts', 'comment_count')
@@ -0,0 +1,115 @@
+"""Partition comments by created_at month
+
+Revision ID: d91c3a7e5f48
+Revises: b84d1f3e6c20
+Create Date: 2025-11-06 10:12:03.481920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd91c3a7e5f48'
+down_revision: Union[str, Sequence[str], None] = 'b84d1f3e6c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses futuros con partición creada de antemano; después las crea el
+# mantenimiento (`mini-blog partitions` o el arranque de la aplicación)
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, text, created_at, user_id, post_id"
+
+INDEXES = (
+    "CREATE INDEX ix_comments_id ON comments (id)",
+    "CREATE INDEX ix_comments_post_id_created_at_id ON comments (post_id, created_at, id)",
+    "CREATE INDEX ix_comments_user_id_created_at_id ON comments (user_id, created_at, id)",
+    "CREATE INDEX ix_comments_search_vector ON comments USING gin (search_vector)",
+)
+
+
+def _rename_old_table(new_name: str) -> None:
+    # La secuencia sobrevive a la tabla antigua y la nueva tabla recibe los
+    # mismos nombres de índices y restricciones (los errores de la API se
+    # traducen a partir de `comments_post_id_fkey` y `comments_user_id_fkey`)
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE comments RENAME TO {new_name}")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT comments_pkey TO {new_name}_pkey")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT comments_post_id_fkey TO {new_name}_post_id_fkey")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT comments_user_id_fkey TO {new_name}_user_id_fkey")
+    for index in ("ix_comments_id", "ix_comments_post_id_created_at_id", "ix_comments_user_id_created_at_id", "ix_comments_search_vector"):
+        op.execute(f"DROP INDEX {index}")
+
+
+def _create_table(primary_key: str, partition_by: str = "") -> None:
+    op.execute(
+        f"""
+        CREATE TABLE comments (
+            id INTEGER NOT NULL DEFAULT nextval('comments_id_seq'),
+            text TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            user_id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', coalesce(text, ''))) STORED,
+            CONSTRAINT comments_pkey PRIMARY KEY ({primary_key}),
+            CONSTRAINT comments_post_id_fkey FOREIGN KEY (post_id) REFERENCES posts (id),
+            CONSTRAINT comments_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)
+        ) {partition_by}
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_old_table("comments_unpartitioned")
+    # La clave primaria de una tabla particionada debe incluir la clave de
+    # partición; `id` sigue siendo único porque sale de la secuencia
+    _create_table("id, created_at", "PARTITION BY RANGE (created_at)")
+    op.execute("CREATE TABLE comments_default PARTITION OF comments DEFAULT")
+    # Una partición por mes (en UTC) desde el comentario más antiguo hasta MONTHS_AHEAD meses vista
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month DATE;
+            last_month DATE := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD} months')::date;
+        BEGIN
+            SELECT date_trunc('month', coalesce(min(created_at), now()) AT TIME ZONE 'UTC')::date
+            INTO month FROM comments_unpartitioned;
+            WHILE month <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF comments FOR VALUES FROM (%L) TO (%L)',
+                    'comments_' || to_char(month, '"y"YYYY"m"MM'),
+                    to_char(month, 'YYYY-MM-DD') || ' 00:00:00+00',
+                    to_char(month + interval '1 month', 'YYYY-MM-DD') || ' 00:00:00+00'
+                );
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute(
+        f"INSERT INTO comments ({COLUMNS}) "
+        f"SELECT id, text, coalesce(created_at, now()), user_id, post_id FROM comments_unpartitioned"
+    )
+    op.execute("DROP TABLE comments_unpartitioned")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
+    # Los índices se crean en la tabla padre después de copiar los datos y
+    # Postgres los crea en cada partición
+    for statement in INDEXES:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Las particiones ya archivadas (esquema `archive`) no se reincorporan
+    _rename_old_table("comments_partitioned")
+    _create_table("id")
+    op.execute(f"INSERT INTO comments ({COLUMNS}) SELECT {COLUMNS} FROM comments_partitioned")
+    op.execute("DROP TABLE comments_partitioned")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
+    op.execute("ALTER TABLE comments ALTER COLUMN created_at DROP NOT NULL")
+    for statement in INDEXES:
+        op.execute(statement)
@@ -0,0 +1,39 @@
+"""Add post trending scores snapshot
+
+Revision ID: e5a8c2f1d7b3
+Revises: d91c3a7e5f48
+Create Date: 2025-11-08 17:25:44.902317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c2f1d7b3'
+down_revision: Union[str, Sequence[str], None] = 'd91c3a7e5f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La tabla se llena al arrancar la aplicación a partir de los comentarios
+    # recientes, con la vida media configurada
+    op.create_table(
+        'post_trending_scores',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id'),
+    )
+    op.create_index('ix_post_trending_scores_score', 'post_trending_scores', [sa.text('score DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_post_trending_scores_score', table_name='post_trending_scores')
+    op.drop_table('post_trending_scores')
@@ -0,0 +1,36 @@
+"""Add feed version counter
+
+Revision ID: f3b9d2a6c4e1
+Revises: e5a8c2f1d7b3
+Create Date: 2025-11-09 10:12:31.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b9d2a6c4e1'
+down_revision: Union[str, Sequence[str], None] = 'e5a8c2f1d7b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'feed_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.CheckConstraint('id = 1', name='ck_feed_version_single_row'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Fila única; la incrementan las escrituras que cambian el feed
+    op.execute("INSERT INTO feed_version (id, version) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('feed_version')
@@ -0,0 +1,33 @@
+"""Add composite (created_at, id) index on posts for keyset pagination
+
+Revision ID: fbde3d74dc58
+Revises: 45135274ee8a
+Create Date: 2025-10-25 10:12:03.412877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fbde3d74dc58'
+down_revision: Union[str, Sequence[str], None] = '45135274ee8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_posts_created_at_id',
+        'posts',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_posts_created_at_id', table_name='posts')
@@ -0,0 +1,309 @@
+"""
+Banco de pruebas de carga de la API: siembra un conjunto de datos sintético,
+lanza clientes concurrentes contra la aplicación ASGI en el mismo proceso y mide
+latencia (p50/p95/p99) y throughput de cada endpoint.
+
+El conjunto de datos tiene `--users` usuarios con `--posts-per-user` publicaciones
+cada uno y `--comments` comentarios repartidos con una distribución de Zipf
+(`--skew`): unas pocas publicaciones "virales" concentran la mayoría de los
+comentarios y también la mayoría de las lecturas.
+
+Uso:
+    # Postgres (con las migraciones aplicadas)
+    poetry run python benchmarks/bench_api.py --database-url postgresql+asyncpg://... --output results.json
+
+    # SQLite (crea el esquema; solo endpoints de lectura)
+    poetry run python benchmarks/bench_api.py --database-url sqlite+aiosqlite:///bench.db
+
+    # Comparar con una ejecución anterior
+    poetry run python benchmarks/bench_api.py --compare results.json
+
+Sin `--database-url` se usa `DATABASE_URL` (o `TEST_DATABASE_URL` con
+ENVIRONMENT=test). La caché de respuestas sigue `CACHE_BACKEND`; con
+`CACHE_BACKEND=none` se mide siempre el camino hasta la base de datos.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from statistics import mean
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from api_rest_mini_blog import database, models
+from api_rest_mini_blog.counters import reconcile_counters
+
+SEED_BATCH_SIZE = 5000
+
+# Palabras con las que se generan títulos, contenidos y búsquedas
+WORDS = (
+    "python fastapi postgres indice cache cursor replica latencia consulta async "
+    "pool json streaming comentario feed perfil viral zipf banco carga sesion"
+).split()
+
+
+@dataclass
+class Dataset:
+    user_ids: List[int]
+    post_ids: List[int]
+    # Pesos de popularidad de cada publicación (misma posición que `post_ids`)
+    post_weights: List[float]
+    comments: int
+
+
+@dataclass
+class EndpointResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        ordered = sorted(self.latencies) or [0.0]
+
+        def percentile(p: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        return {
+            "requests": len(self.latencies),
+            "errors": self.errors,
+            "mean_ms": round(mean(ordered) * 1000, 3),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "rps": round(len(self.latencies) / self.elapsed, 1) if self.elapsed else 0.0,
+        }
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+async def seed(users: int, posts_per_user: int, comments: int, skew: float, rng: random.Random) -> Dataset:
+    """
+    Inserta el conjunto de datos con `INSERT` multi-fila por lotes (válido en
+    Postgres y SQLite) y recalcula los contadores desnormalizados al final.
+    """
+    run = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc)
+    async with database.async_session() as db:
+        user_rows = [{"username": f"bench_{run}_{i}", "email": f"bench_{run}_{i}@example.com"} for i in range(users)]
+        for start in range(0, len(user_rows), SEED_BATCH_SIZE):
+            await db.execute(models.User.__table__.insert(), user_rows[start:start + SEED_BATCH_SIZE])
+        user_ids = list((await db.execute(
+            models.User.__table__.select().with_only_columns(models.User.id)
+            .where(models.User.username.like(f"bench_{run}_%"))
+        )).scalars())
+
+        post_rows = [
+            {
+                "title": _text(rng, 5),
+                "content": _text(rng, 80),
+                "user_id": user_id,
+                "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+            }
+            for user_id in user_ids
+            for _ in range(posts_per_user)
+        ]
+        for row in post_rows:
+            row["updated_at"] = row["created_at"]
+        for start in range(0, len(post_rows), SEED_BATCH_SIZE):
+            await db.execute(models.Post.__table__.insert(), post_rows[start:start + SEED_BATCH_SIZE])
+        post_ids = list((await db.execute(
+            models.Post.__table__.select().with_only_columns(models.Post.id)
+            .where(models.Post.user_id.in_(user_ids))
+            .order_by(models.Post.id)
+        )).scalars())
+
+        # Popularidad de Zipf sobre un orden aleatorio de las publicaciones
+        rng.shuffle(post_ids)
+        weights = [1 / (rank ** skew) for rank in range(1, len(post_ids) + 1)]
+        targets = rng.choices(post_ids, weights=weights, k=comments)
+        comment_rows = [
+            {"text": _text(rng, 12), "user_id": rng.choice(user_ids), "post_id": post_id, "created_at": now}
+            for post_id in targets
+        ]
+        for start in range(0, len(comment_rows), SEED_BATCH_SIZE):
+            await db.execute(models.Comment.__table__.insert(), comment_rows[start:start + SEED_BATCH_SIZE])
+        await db.commit()
+        await reconcile_counters(db)
+    return Dataset(user_ids=user_ids, post_ids=post_ids, post_weights=weights, comments=comments)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Devuelve (ruta, cuerpo JSON) para la siguiente petición
+    request: Callable[[random.Random], tuple]
+    writes: bool = False
+
+
+def build_scenarios(data: Dataset) -> List[Scenario]:
+    def post(rng):
+        return rng.choices(data.post_ids, weights=data.post_weights)[0]
+
+    def user(rng):
+        return rng.choice(data.user_ids)
+
+    return [
+        Scenario("GET /posts/", "GET", lambda rng: ("/posts/?limit=10", None)),
+        Scenario("GET /posts/?include=comments", "GET", lambda rng: ("/posts/?limit=10&include=comments", None)),
+        Scenario("GET /posts/{post_id}", "GET", lambda rng: (f"/posts/{post(rng)}", None)),
+        Scenario("GET /posts/{post_id}/comments", "GET", lambda rng: (f"/posts/{post(rng)}/comments", None)),
+        Scenario("GET /posts/search", "GET", lambda rng: (f"/posts/search?q={rng.choice(WORDS)}", None)),
+        Scenario("GET /users/{user_id}", "GET", lambda rng: (f"/users/{user(rng)}", None)),
+        Scenario("GET /users/{user_id}/posts", "GET", lambda rng: (f"/users/{user(rng)}/posts", None)),
+        Scenario("GET /users/{user_id}/comments", "GET", lambda rng: (f"/users/{user(rng)}/comments", None)),
+        Scenario(
+            "POST /posts/",
+            "POST",
+            lambda rng: ("/posts/", {"title": _text(rng, 5), "content": _text(rng, 80), "user_id": user(rng)}),
+            writes=True,
+        ),
+        Scenario(
+            "POST /posts/{post_id}/comments",
+            "POST",
+            lambda rng: (f"/posts/{post(rng)}/comments", {"text": _text(rng, 12), "user_id": user(rng)}),
+            writes=True,
+        ),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, seed: int) -> EndpointResult:
+    """Lanza `requests` peticiones repartidas entre `concurrency` clientes concurrentes."""
+    result = EndpointResult()
+    remaining = iter(range(requests))
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed + index)
+        for _ in remaining:
+            path, body = scenario.request(rng)
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, path, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            result.latencies.append(time.perf_counter() - start)
+            result.errors += failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Dict[str, float]], previous: Optional[Dict[str, Dict[str, float]]]) -> None:
+    header = f"{'endpoint':<34}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>9}"
+    if previous:
+        header += f"{'Δp95':>9}{'Δrps':>9}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<34}{result['requests']:>6}{result['errors']:>5}{result['p50_ms']:>10.3f}"
+            f"{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['rps']:>9.1f}"
+        )
+        before = (previous or {}).get(name)
+        if before and before["p95_ms"] and before["rps"]:
+            line += f"{(result['p95_ms'] / before['p95_ms'] - 1) * 100:>+8.1f}%{(result['rps'] / before['rps'] - 1) * 100:>+8.1f}%"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from api_rest_mini_blog.main import app
+
+    if args.database_url:
+        database.DATABASE_URL = args.database_url
+    engine = database.init_engine()
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        async with engine.begin() as conn:
+            await conn.run_sync(database.Base.metadata.create_all)
+
+    rng = random.Random(args.seed)
+    seed_start = time.perf_counter()
+    data = await seed(args.users, args.posts_per_user, args.comments, args.skew, rng)
+    seed_seconds = time.perf_counter() - seed_start
+
+    scenarios = build_scenarios(data)
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if any(part in scenario.name for part in args.only)]
+    results: Dict[str, Dict[str, float]] = {}
+    skipped = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                # Las escrituras de una sola sentencia usan INSERT dentro de CTEs, que SQLite no admite
+                if scenario.writes and (args.read_only or dialect != "postgresql"):
+                    skipped.append(scenario.name)
+                    continue
+                await run_scenario(client, scenario, args.warmup, args.concurrency, args.seed)
+                result = await run_scenario(client, scenario, args.requests, args.concurrency, args.seed)
+                results[scenario.name] = result.summary()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as fh:
+            previous = json.load(fh)["endpoints"]
+    print(f"dataset: {len(data.user_ids)} users, {len(data.post_ids)} posts, {data.comments} comments "
+          f"(seeded in {seed_seconds:.1f}s) on {dialect}")
+    print_results(results, previous)
+    if skipped:
+        print(f"skipped: {', '.join(skipped)}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {
+                    "commit": git_commit(),
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "database": dialect,
+                    "dataset": {
+                        "users": args.users,
+                        "posts_per_user": args.posts_per_user,
+                        "comments": args.comments,
+                        "skew": args.skew,
+                        "seed": args.seed,
+                    },
+                    "load": {"requests": args.requests, "concurrency": args.concurrency, "warmup": args.warmup},
+                    "endpoints": results,
+                },
+                fh,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="URL de la base de datos (postgresql+asyncpg://... o sqlite+aiosqlite://...)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts-per-user", type=int, default=20)
+    parser.add_argument("--comments", type=int, default=20_000, help="Comentarios en total")
+    parser.add_argument("--skew", type=float, default=1.1, help="Exponente de Zipf de la popularidad de las publicaciones")
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones medidas por endpoint")
+    parser.add_argument("--warmup", type=int, default=50, help="Peticiones de calentamiento por endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="Ejecuta solo los endpoints cuyo nombre contenga alguno de estos textos")
+    parser.add_argument("--read-only", action="store_true", help="Omite los endpoints de escritura")
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="Resultados JSON de una ejecución anterior con los que comparar")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+"""
+Compara el throughput de una ráfaga de comentarios sobre una misma publicación
+escritos en línea (`services.create_comment`, una sentencia por comentario) y
+con la escritura diferida (`CommentWriteBehind`) para varios tamaños de lote.
+
+Uso:
+    poetry run python benchmarks/bench_comment_burst.py --comments 5000 --concurrency 50
+
+Se ejecuta contra `DATABASE_URL` (o `TEST_DATABASE_URL` con ENVIRONMENT=test),
+con las migraciones ya aplicadas.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from api_rest_mini_blog import database, schemas, services
+from api_rest_mini_blog.write_behind import CommentWriteBehind, MemoryCommentQueue
+
+
+async def burst(comments: int, concurrency: int, write) -> float:
+    """Escribe `comments` comentarios desde `concurrency` clientes y devuelve comentarios/segundo."""
+    remaining = iter(range(comments))
+
+    async def client() -> None:
+        for i in remaining:
+            await write(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return comments / (time.perf_counter() - start)
+
+
+async def main(comments: int, concurrency: int, batch_sizes: list, output: str | None) -> None:
+    database.init_engine()
+    run = uuid.uuid4().hex[:8]
+    async with database.async_session() as db:
+        author = await services.create_user(db, schemas.UserCreate(username=f"burst_{run}", email=f"burst_{run}@example.com"))
+        post = await services.create_post(db, schemas.PostCreate(title="viral", content="viral", user_id=author.id))
+    comment = schemas.CommentCreate(text="burst", user_id=author.id)
+
+    async def inline(_):
+        async with database.async_session() as db:
+            await services.create_comment(db, comment, post_id=post.id)
+
+    results = {"inline": await burst(comments, concurrency, inline)}
+    for batch_size in batch_sizes:
+        writer = CommentWriteBehind(MemoryCommentQueue(max_size=comments), batch_size=batch_size, flush_interval=0.05)
+        await writer.start()
+
+        async def queued(_):
+            pending = writer.enqueue(post.id, comment)
+            result = await writer.status(pending.id, wait=60)
+            assert result.status == "committed", result
+
+        results[f"write_behind[{batch_size}]"] = await burst(comments, concurrency, queued)
+        await writer.stop()
+    await database.dispose_engine()
+
+    print(f"{'mode':<22}{'comments/s':>12}")
+    for name, rate in results.items():
+        print(f"{name:<22}{rate:>12.1f}")
+    if output:
+        with open(output, "w") as fh:
+            json.dump({"comments": comments, "concurrency": concurrency, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args()
+    asyncio.run(main(args.comments, args.concurrency, args.batch_sizes, args.output))
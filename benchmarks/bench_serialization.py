@@ -0,0 +1,103 @@
+"""
+Compara el coste de construir la respuesta de `GET /posts/?include=comments`
+con la ruta anterior (objetos ORM validados con `schemas.Post` mediante
+`from_attributes`) y con la actual (filas SQL de `services.get_post_rows`
+serializadas directamente con pydantic-core u orjson).
+
+Uso:
+    poetry run python benchmarks/bench_serialization.py --posts 50 --comments 20
+
+Se ejecuta contra `DATABASE_URL` (o `TEST_DATABASE_URL` con ENVIRONMENT=test),
+con las migraciones ya aplicadas. Crea sus propios datos de prueba.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from statistics import mean
+from typing import List
+
+import pydantic_core
+from pydantic import TypeAdapter
+
+from api_rest_mini_blog import database, schemas, services
+
+post_list_adapter = TypeAdapter(List[schemas.Post])
+
+
+def orjson_dumps():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return lambda value: orjson.dumps(value, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+async def seed(posts: int, comments: int) -> None:
+    run = uuid.uuid4().hex[:8]
+    async with database.async_session() as db:
+        author = await services.create_user(db, schemas.UserCreate(username=f"ser_{run}", email=f"ser_{run}@example.com"))
+        for i in range(posts):
+            post = await services.create_post(
+                db, schemas.PostCreate(title=f"bench {i}", content="contenido " * 50, user_id=author.id)
+            )
+            for _ in range(comments):
+                await services.create_comment(db, schemas.CommentCreate(text="comentario", user_id=author.id), post_id=post.id)
+
+
+async def measure(iterations: int, limit: int, load, serialize) -> dict:
+    """Mide por separado el tiempo de consulta/hidratación y el de serialización."""
+    load_ms, serialize_ms, size = [], [], 0
+    for _ in range(iterations):
+        async with database.async_session() as db:
+            start = time.perf_counter()
+            data = await load(db, limit)
+            loaded = time.perf_counter()
+            body = serialize(data)
+            load_ms.append((loaded - start) * 1000)
+            serialize_ms.append((time.perf_counter() - loaded) * 1000)
+            size = len(body)
+    return {"load_ms": round(mean(load_ms), 3), "serialize_ms": round(mean(serialize_ms), 3), "bytes": size}
+
+
+async def main(posts: int, comments: int, iterations: int, output: str | None) -> None:
+    database.init_engine()
+    await seed(posts, comments)
+
+    scenarios = {
+        "orm+from_attributes": (
+            lambda db, limit: services.get_posts(db, limit=limit),
+            lambda data: post_list_adapter.dump_json(post_list_adapter.validate_python(data, from_attributes=True)),
+        ),
+        "rows+pydantic_core": (
+            lambda db, limit: services.get_post_rows(db, limit=limit),
+            pydantic_core.to_json,
+        ),
+    }
+    fast = orjson_dumps()
+    if fast is not None:
+        scenarios["rows+orjson"] = (lambda db, limit: services.get_post_rows(db, limit=limit), fast)
+
+    results = {}
+    for name, (load, serialize) in scenarios.items():
+        results[name] = await measure(iterations, posts, load, serialize)
+    await database.dispose_engine()
+
+    print(f"{'path':<22}{'load ms':>10}{'serialize ms':>14}{'total ms':>10}{'bytes':>10}")
+    for name, result in results.items():
+        total = result["load_ms"] + result["serialize_ms"]
+        print(f"{name:<22}{result['load_ms']:>10.3f}{result['serialize_ms']:>14.3f}{total:>10.3f}{result['bytes']:>10}")
+    if output:
+        with open(output, "w") as fh:
+            json.dump({"posts": posts, "comments": comments, "iterations": iterations, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=50, help="Publicaciones por página (y creadas)")
+    parser.add_argument("--comments", type=int, default=20, help="Comentarios por publicación")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args()
+    asyncio.run(main(args.posts, args.comments, args.iterations, args.output))
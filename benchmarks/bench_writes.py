@@ -0,0 +1,155 @@
+"""
+Compara los viajes a la base de datos y la latencia de las escrituras actuales
+(`services.create_user/create_post/create_comment`) con la implementación
+anterior (SELECT de validación + INSERT + COMMIT + REFRESH + recarga).
+
+Uso:
+    poetry run python benchmarks/bench_writes.py --iterations 200
+
+Se ejecuta contra `DATABASE_URL` (o `TEST_DATABASE_URL` con ENVIRONMENT=test),
+con las migraciones ya aplicadas.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from statistics import mean
+
+from sqlalchemy import event
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from api_rest_mini_blog import database, models, schemas, services
+
+
+class RoundTripCounter:
+    """Cuenta sentencias y BEGIN/COMMIT/ROLLBACK enviados por el motor."""
+
+    def __init__(self, engine):
+        self.count = 0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._statement)
+        for name in ("begin", "commit", "rollback"):
+            event.listen(sync_engine, name, self._transaction)
+
+    def _statement(self, *args, **kwargs):
+        self.count += 1
+
+    def _transaction(self, conn):
+        if conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+            self.count += 1
+
+
+# --- Implementación anterior, reproducida para comparar ---
+async def legacy_create_user(db, user: schemas.UserCreate):
+    await services.get_user_by_email(db, email=user.email)
+    db_user = models.User(username=user.username, email=user.email)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+
+async def legacy_create_post(db, post: schemas.PostCreate):
+    await services.user_exists(db, user_id=post.user_id)
+    db_post = models.Post(**post.model_dump())
+    db.add(db_post)
+    await db.commit()
+    await db.refresh(db_post, attribute_names=["author"])
+    result = await db.execute(
+        select(models.Post)
+        .where(models.Post.id == db_post.id)
+        .options(
+            selectinload(models.Post.author),
+            selectinload(models.Post.comments).selectinload(models.Comment.author),
+        )
+    )
+    return result.scalar_one()
+
+
+async def legacy_create_comment(db, comment: schemas.CommentCreate, post_id: int):
+    await db.execute(
+        select(models.Post)
+        .where(models.Post.id == post_id)
+        .options(
+            selectinload(models.Post.author),
+            selectinload(models.Post.comments).selectinload(models.Comment.author),
+        )
+    )
+    await services.user_exists(db, user_id=comment.user_id)
+    db_comment = models.Comment(**comment.model_dump(), post_id=post_id)
+    db.add(db_comment)
+    await db.commit()
+    await db.refresh(db_comment)
+    await db.refresh(db_comment, attribute_names=["author"])
+    return db_comment
+
+
+async def measure(counter, iterations, operation):
+    trips, latencies = [], []
+    for i in range(iterations):
+        async with database.async_session() as db:
+            before = counter.count
+            start = time.perf_counter()
+            await operation(db, i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            trips.append(counter.count - before)
+    return {"round_trips": mean(trips), "mean_ms": round(mean(latencies), 3)}
+
+
+async def main(iterations: int, output: str | None) -> None:
+    engine = database.init_engine()
+    counter = RoundTripCounter(engine)
+    run = uuid.uuid4().hex[:8]
+    async with database.async_session() as db:
+        author = await services.create_user(db, schemas.UserCreate(username=f"bench_{run}", email=f"bench_{run}@example.com"))
+        post = await services.create_post(db, schemas.PostCreate(title="bench", content="bench", user_id=author.id))
+        # Algunos comentarios previos para que la recarga del post antiguo tenga coste real
+        for _ in range(50):
+            await services.create_comment(db, schemas.CommentCreate(text="seed", user_id=author.id), post_id=post.id)
+
+    def user(prefix):
+        return lambda i: schemas.UserCreate(username=f"{prefix}_{run}_{i}", email=f"{prefix}_{run}_{i}@example.com")
+
+    new_post = schemas.PostCreate(title="bench", content="bench", user_id=author.id)
+    new_comment = schemas.CommentCreate(text="bench", user_id=author.id)
+    scenarios = {
+        "create_user": (
+            lambda db, i: legacy_create_user(db, user("legacy")(i)),
+            lambda db, i: services.create_user(db, user("current")(i)),
+        ),
+        "create_post": (
+            lambda db, i: legacy_create_post(db, new_post),
+            lambda db, i: services.create_post(db, new_post),
+        ),
+        "create_comment": (
+            lambda db, i: legacy_create_comment(db, new_comment, post.id),
+            lambda db, i: services.create_comment(db, new_comment, post_id=post.id),
+        ),
+    }
+    results = {}
+    for name, (legacy, current) in scenarios.items():
+        results[name] = {
+            "legacy": await measure(counter, iterations, legacy),
+            "current": await measure(counter, iterations, current),
+        }
+    await database.dispose_engine()
+
+    print(f"{'operation':<16}{'legacy trips':>14}{'current trips':>15}{'legacy ms':>12}{'current ms':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<16}{result['legacy']['round_trips']:>14.1f}{result['current']['round_trips']:>15.1f}"
+            f"{result['legacy']['mean_ms']:>12.3f}{result['current']['mean_ms']:>12.3f}"
+        )
+    if output:
+        with open(output, "w") as fh:
+            json.dump({"iterations": iterations, "results": results}, fh, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--output", help="Fichero JSON donde guardar los resultados")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.output))
@@ -0,0 +1,216 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.metrics import requests_shed_total
+
+# Rutas que no pasan por el control de admisión: no tocan la base de datos y
+# deben seguir respondiendo precisamente cuando el servicio está saturado
+EXEMPT_PATHS = ("/metrics", "/stats", "/docs", "/redoc", "/openapi.json")
+
+# Métodos que consumen el presupuesto de lectura; el resto consume el de escritura
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Peso de la última petición en la media móvil del tiempo de servicio
+SERVICE_TIME_WEIGHT = 0.2
+
+
+class Rejected(Exception):
+    """La petición no se admite; `retry_after` son los segundos que conviene esperar."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """
+    Limita las peticiones simultáneas a `limit`, con una cola FIFO de como mucho
+    `queue_size` peticiones en espera.
+
+    Una petición que llega con el límite alcanzado se rechaza en el acto si la
+    cola está llena o si, según el tiempo medio de servicio, no le llegaría su
+    turno antes de su plazo: es mejor un 503 inmediato que uno tras agotar la espera.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.service_time = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def estimated_wait(self, position: int) -> float:
+        """Espera estimada de una petición en la posición `position` de la cola."""
+        return (position + 1) * self.service_time / self.limit
+
+    async def acquire(self, deadline: float) -> None:
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        estimated = self.estimated_wait(len(self._waiters))
+        if len(self._waiters) >= self.queue_size:
+            raise Rejected("queue_full", estimated)
+        remaining = deadline - time.monotonic()
+        if estimated > remaining:
+            raise Rejected("deadline", estimated)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, remaining)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # El hueco ya se nos había cedido: se pasa al siguiente
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise Rejected("timeout", self.estimated_wait(len(self._waiters))) from None
+            raise
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        if elapsed is not None:
+            self.service_time += SERVICE_TIME_WEIGHT * (elapsed - self.service_time)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # El hueco pasa directamente al primero de la cola
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, float]:
+        return {"active": self.active, "waiting": len(self._waiters), "service_time_seconds": self.service_time}
+
+
+class RateLimiter:
+    """
+    Token bucket por cliente: `rate` peticiones por segundo con ráfagas de hasta
+    `burst`. Guarda en memoria los `max_clients` clientes más recientes.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def check(self, client: str) -> None:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[client] = (tokens, now)
+            raise Rejected("rate_limited", (1 - tokens) / self.rate)
+        self._buckets[client] = (tokens - 1, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI de control de admisión delante de las rutas que usan la base
+    de datos. Cada petición pasa, por este orden:
+
+    1. el límite de peticiones por segundo de su cliente (429 si lo supera);
+    2. el límite propio de su ruta, si lo tiene en `ADMISSION_ROUTE_LIMITS`
+       (clave `"POST /posts/{post_id}/comments"`);
+    3. el presupuesto de lecturas o de escrituras, separados para que una ráfaga
+       de comentarios no deje sin hueco a las lecturas del feed.
+
+    Si no consigue hueco antes de `ADMISSION_MAX_WAIT_SECONDS` se responde 503
+    con `Retry-After`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        queue_size = settings.ADMISSION_QUEUE_SIZE
+        self.budgets = {
+            "read": ConcurrencyLimiter("read", settings.ADMISSION_READ_CONCURRENCY, queue_size),
+            "write": ConcurrencyLimiter("write", settings.ADMISSION_WRITE_CONCURRENCY, queue_size),
+        }
+        self.routes = {
+            name: ConcurrencyLimiter(name, limit, queue_size)
+            for name, limit in settings.ADMISSION_ROUTE_LIMITS.items()
+        }
+        self.rate_limiter = (
+            RateLimiter(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST, settings.RATE_LIMIT_MAX_CLIENTS)
+            if settings.RATE_LIMIT_PER_SECOND > 0
+            else None
+        )
+        admission_middlewares.append(self)
+
+    def _route_limiter(self, scope) -> Optional[ConcurrencyLimiter]:
+        if not self.routes:
+            return None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return self.routes.get(f"{scope['method']} {route.path}")
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL or scope["path"].startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+
+        budget = self.budgets["read" if scope["method"] in READ_METHODS else "write"]
+        acquired: List[ConcurrencyLimiter] = []
+        deadline = time.monotonic() + settings.ADMISSION_MAX_WAIT_SECONDS
+        try:
+            if self.rate_limiter is not None:
+                client = scope.get("client")
+                self.rate_limiter.check(client[0] if client else "unknown")
+            for limiter in (self._route_limiter(scope), budget):
+                if limiter is not None:
+                    await limiter.acquire(deadline)
+                    acquired.append(limiter)
+        except Rejected as exc:
+            for limiter in acquired:
+                limiter.release()
+            return await self._reject(exc, budget.name, scope, receive, send)
+        except BaseException:
+            for limiter in acquired:
+                limiter.release()
+            raise
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.monotonic() - start
+            for limiter in acquired:
+                limiter.release(elapsed)
+
+    async def _reject(self, exc: Rejected, budget: str, scope, receive, send) -> None:
+        requests_shed_total.inc((("budget", budget), ("reason", exc.reason)))
+        if exc.reason == "rate_limited":
+            status_code, detail = 429, "Too many requests, slow down."
+        else:
+            status_code, detail = 503, "Server is overloaded, retry later."
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+        )
+        await response(scope, receive, send)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {name: limiter.stats() for name, limiter in {**self.budgets, **self.routes}.items()}
+
+
+# Instancias creadas por la aplicación (una por pila de middlewares), para las estadísticas
+admission_middlewares: List[AdmissionMiddleware] = []
+
+
+def admission_stats() -> Dict[str, Dict[str, float]]:
+    """Peticiones en curso, en cola y tiempo medio de servicio de cada presupuesto y ruta limitada."""
+    return admission_middlewares[-1].stats() if admission_middlewares else {}
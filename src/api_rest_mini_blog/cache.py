@@ -0,0 +1,303 @@
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Response
+
+from api_rest_mini_blog.compression import current_encoding, precompress
+from api_rest_mini_blog.config import settings
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    sets: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        lookups = self.hits + self.misses
+        data["hit_ratio"] = self.hits / lookups if lookups else 0.0
+        return data
+
+
+class CacheBackend(ABC):
+    """
+    Almacén clave-valor de bytes con TTL e invalidación por etiquetas.
+    Cada entrada se registra bajo una o varias etiquetas (p. ej. `post:1`, `feed`)
+    para que las escrituras puedan invalidar exactamente las respuestas afectadas.
+
+    Si `invalidation_window` es mayor que cero, el backend recuerda durante ese
+    tiempo qué etiquetas se invalidaron, para no volver a guardar datos leídos de
+    una réplica que todavía no ha recibido la escritura.
+    """
+
+    def __init__(self, ttl: int, invalidation_window: float = 0.0):
+        self.ttl = ttl
+        self.invalidation_window = invalidation_window
+        self.stats = CacheStats()
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, *tags: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    async def recently_invalidated(self, tags: Iterable[str]) -> bool:
+        return False
+
+
+class NullCache(CacheBackend):
+    """Backend que no almacena nada; desactiva la caché sin cambiar el código que la usa."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        self.stats.misses += 1
+        return None
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        return None
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        return None
+
+    async def clear(self) -> None:
+        return None
+
+
+class MemoryCache(CacheBackend):
+    """
+    Caché en el proceso con expulsión LRU y expiración por TTL.
+    """
+
+    def __init__(self, ttl: int, max_entries: int, invalidation_window: float = 0.0):
+        super().__init__(ttl, invalidation_window)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, bytes, frozenset[str]]]" = OrderedDict()
+        self._tags: Dict[str, set] = {}
+        self._invalidated_at: "OrderedDict[str, float]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._discard(key)
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        self._discard(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+        self.stats.sets += 1
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            for key in self._tags.pop(tag, set()):
+                self._discard(key)
+            if self.invalidation_window > 0:
+                self._invalidated_at[tag] = time.monotonic()
+                self._invalidated_at.move_to_end(tag)
+        while len(self._invalidated_at) > self.max_entries:
+            self._invalidated_at.popitem(last=False)
+        self.stats.invalidations += 1
+
+    async def recently_invalidated(self, tags: Iterable[str]) -> bool:
+        threshold = time.monotonic() - self.invalidation_window
+        return any(self._invalidated_at.get(tag, threshold) > threshold for tag in tags)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._invalidated_at.clear()
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache(CacheBackend):
+    """
+    Caché compartida entre procesos sobre cualquier cliente asíncrono que hable
+    el protocolo de Redis (`redis.asyncio.Redis`, `fakeredis.FakeAsyncRedis`, ...).
+    Las etiquetas se guardan como conjuntos con las claves que las referencian.
+    """
+
+    def __init__(self, client: Any, ttl: int, prefix: str = "mini_blog:", invalidation_window: float = 0.0):
+        super().__init__(ttl, invalidation_window)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _marker_key(self, tag: str) -> str:
+        return f"{self.prefix}invalidated:{tag}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self.client.get(self._key(key))
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, tags: Iterable[str] = (), ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.ttl
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(key), value, ex=ttl)
+            for tag in tags:
+                pipe.sadd(self._tag_key(tag), self._key(key))
+                pipe.expire(self._tag_key(tag), ttl)
+            await pipe.execute()
+        self.stats.sets += 1
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self.client.smembers(tag_key)
+            await self.client.delete(tag_key, *keys)
+            if self.invalidation_window > 0:
+                await self.client.set(self._marker_key(tag), 1, ex=math.ceil(self.invalidation_window))
+        self.stats.invalidations += 1
+
+    async def recently_invalidated(self, tags: Iterable[str]) -> bool:
+        if self.invalidation_window <= 0:
+            return False
+        markers = [self._marker_key(tag) for tag in tags]
+        return bool(markers) and await self.client.exists(*markers) > 0
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+def build_cache() -> CacheBackend:
+    """
+    Construye el backend configurado en `settings.CACHE_BACKEND`.
+    El backend `redis` requiere instalar el extra opcional `redis`.
+    """
+    # Con réplicas, las invalidaciones se recuerdan durante la ventana de lectura
+    # del primario para no cachear lecturas de una réplica retrasada
+    window = settings.DB_REPLICA_STICKY_SECONDS if settings.DATABASE_REPLICA_URLS else 0.0
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(
+            ttl=settings.CACHE_TTL_SECONDS,
+            max_entries=settings.CACHE_MAX_ENTRIES,
+            invalidation_window=window,
+        )
+    if settings.CACHE_BACKEND == "redis":
+        import redis.asyncio as redis
+
+        return RedisCache(
+            redis.from_url(settings.REDIS_URL),
+            ttl=settings.CACHE_TTL_SECONDS,
+            invalidation_window=window,
+        )
+    if settings.CACHE_BACKEND == "none":
+        return NullCache(ttl=settings.CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown cache backend '{settings.CACHE_BACKEND}'")
+
+
+cache = build_cache()
+
+
+@dataclass
+class CachedResponse:
+    """
+    Respuesta JSON ya serializada, junto con las cabeceras que debe conservar y
+    sus variantes ya comprimidas (`{"gzip": ..., "zstd": ...}`), para no volver
+    a comprimirla en cada acierto.
+    """
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    def to_bytes(self) -> bytes:
+        # Primera línea: cabeceras y longitud de cada variante; después, el
+        # cuerpo y las variantes concatenados
+        meta = {"headers": self.headers, "encoded": {name: len(data) for name, data in self.encoded.items()}}
+        return json.dumps(meta).encode() + b"\n" + self.body + b"".join(self.encoded.values())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedResponse":
+        meta, payload = data.split(b"\n", 1)
+        meta = json.loads(meta)
+        if "encoded" not in meta:
+            # Formato anterior (solo cabeceras y cuerpo), aún en un Redis compartido hasta que caduque
+            return cls(body=payload, headers=meta)
+        offset = len(payload) - sum(meta["encoded"].values())
+        body, encoded = payload[:offset], {}
+        for name, length in meta["encoded"].items():
+            encoded[name] = payload[offset:offset + length]
+            offset += length
+        return cls(body=body, headers=meta["headers"], encoded=encoded)
+
+    def to_response(self) -> Response:
+        """Devuelve la variante de la codificación negociada para la petición en curso."""
+        encoding = current_encoding.get()
+        if encoding in self.encoded:
+            headers = {**self.headers, "Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+            return Response(content=self.encoded[encoding], media_type="application/json", headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=self.headers)
+
+
+async def get_cached_response(key: str) -> Optional[Response]:
+    """
+    Devuelve la respuesta almacenada bajo `key`, o `None` si no está en caché.
+    """
+    data = await cache.get(key)
+    if data is None:
+        return None
+    return CachedResponse.from_bytes(data).to_response()
+
+
+async def cache_response(
+    key: str,
+    body: bytes,
+    tags: Iterable[str],
+    headers: Optional[Dict[str, str]] = None,
+    from_replica: bool = False,
+) -> Response:
+    """
+    Guarda un cuerpo JSON ya serializado bajo `key` y devuelve la respuesta a enviar.
+    Los datos leídos de una réplica no se guardan si alguna de sus etiquetas acaba
+    de invalidarse, porque la réplica podría no tener aún la escritura.
+    """
+    tags = list(tags)
+    cached = CachedResponse(body=body, headers=headers or {}, encoded=precompress(body))
+    if not (from_replica and await cache.recently_invalidated(tags)):
+        await cache.set(key, cached.to_bytes(), tags=tags)
+    return cached.to_response()
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+from api_rest_mini_blog import database
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.counters import reconcile_counters
+from api_rest_mini_blog.importer import IMPORT_BATCH_SIZE, IMPORT_SCHEMAS, import_ndjson
+from api_rest_mini_blog.partitions import maintain_partitions
+
+logger = logging.getLogger(__name__)
+
+
+async def _read_lines(source: BinaryIO) -> AsyncIterator[bytes]:
+    for line in source:
+        yield line
+
+
+async def _import(kind: str, path: str, batch_size: int) -> int:
+    database.init_engine()
+    try:
+        source = sys.stdin.buffer if path == "-" else open(path, "rb")
+        with source:
+            async with database.async_session() as db:
+                report = await import_ndjson(db, kind, _read_lines(source), batch_size=batch_size)
+    finally:
+        await database.dispose_engine()
+    print(report.model_dump_json(indent=2))
+    return 1 if report.failed else 0
+
+
+async def _reconcile_counters() -> int:
+    database.init_engine()
+    try:
+        async with database.async_session() as db:
+            fixed = await reconcile_counters(db)
+    finally:
+        await database.dispose_engine()
+    print(json.dumps(fixed, indent=2))
+    return 0
+
+
+async def _partitions(months_ahead: Optional[int], retention_months: Optional[int]) -> int:
+    database.init_engine()
+    try:
+        async with database.async_session() as db:
+            result = await maintain_partitions(
+                db,
+                settings.COMMENT_PARTITIONS_AHEAD if months_ahead is None else months_ahead,
+                settings.COMMENT_RETENTION_MONTHS if retention_months is None else retention_months,
+            )
+    finally:
+        await database.dispose_engine()
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+def available_cpus(cgroup_cpu_max: str = "/sys/fs/cgroup/cpu.max") -> int:
+    """
+    CPUs que puede usar el proceso: las de su afinidad, limitadas por la cuota
+    de CPU del cgroup (p. ej. `--cpus` de Docker) si la hay.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open(cgroup_cpu_max) as fh:
+            quota, period = fh.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def per_process_state() -> List[str]:
+    """
+    Estado que cada worker guarda en su propia memoria y que con varios workers
+    deja de ser coherente entre peticiones.
+    """
+    reasons = []
+    if settings.CACHE_BACKEND == "memory":
+        reasons.append("CACHE_BACKEND=memory keeps the response cache and its invalidation per worker (use redis)")
+    if settings.COMMENT_WRITE_BEHIND:
+        reasons.append("COMMENT_WRITE_BEHIND keeps the queue and the pending tickets in the worker that received them")
+    return reasons
+
+
+def resolve_workers(requested: Optional[int]) -> int:
+    """
+    Número de workers de `serve`: `requested`, `SERVER_WORKERS` o uno por CPU.
+    Si hay estado por proceso (`per_process_state`), un número calculado por
+    CPU se reduce a uno y uno pedido explícitamente se rechaza.
+    """
+    explicit = requested or settings.SERVER_WORKERS
+    workers = explicit or available_cpus()
+    reasons = per_process_state()
+    if workers > 1 and reasons:
+        if explicit:
+            raise SystemExit(f"Cannot run {workers} workers: " + "; ".join(reasons) + ".")
+        logger.warning("Running a single worker: %s", "; ".join(reasons))
+        return 1
+    if workers > 1 and settings.RATE_LIMIT_PER_SECOND > 0:
+        logger.warning(
+            "RATE_LIMIT_PER_SECOND is enforced per worker: each client may get up to %d times the limit", workers
+        )
+    return workers
+
+
+def _serve(workers: Optional[int], host: Optional[str], port: Optional[int]) -> None:
+    import uvicorn
+
+    # Con más de un worker uvicorn supervisa los procesos: cada uno ejecuta el
+    # lifespan (motor y pool propios) y, al recibir SIGTERM, deja de aceptar
+    # conexiones, espera a las peticiones en curso y cierra su pool
+    uvicorn.run(
+        "api_rest_mini_blog.main:app",
+        host=host or settings.SERVER_HOST,
+        port=port or settings.SERVER_PORT,
+        workers=resolve_workers(workers),
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        proxy_headers=True,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mini-blog", description="Herramientas de administración del Mini-Blog.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Importa registros desde un fichero NDJSON.")
+    importer.add_argument("kind", choices=sorted(IMPORT_SCHEMAS))
+    importer.add_argument("path", help="Fichero NDJSON, o '-' para leer de la entrada estándar.")
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    commands.add_parser(
+        "reconcile-counters",
+        help="Recalcula los contadores de publicaciones y comentarios y corrige las desviaciones.",
+    )
+
+    partitions = commands.add_parser(
+        "partitions",
+        help="Crea las particiones mensuales de comentarios futuras y archiva las anteriores a la retención.",
+    )
+    partitions.add_argument("--ahead", type=int, help="Meses futuros (por defecto COMMENT_PARTITIONS_AHEAD).")
+    partitions.add_argument("--retention", type=int, help="Meses conservados (por defecto COMMENT_RETENTION_MONTHS).")
+
+    server = commands.add_parser("serve", help="Arranca el servidor HTTP con varios workers.")
+    server.add_argument("--workers", type=int, help="Procesos worker (por defecto SERVER_WORKERS o uno por CPU).")
+    server.add_argument("--host")
+    server.add_argument("--port", type=int)
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    if args.command == "import":
+        sys.exit(asyncio.run(_import(args.kind, args.path, args.batch_size)))
+    elif args.command == "reconcile-counters":
+        sys.exit(asyncio.run(_reconcile_counters()))
+    elif args.command == "partitions":
+        sys.exit(asyncio.run(_partitions(args.ahead, args.retention)))
+    elif args.command == "serve":
+        _serve(args.workers, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import logging
+import zlib
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from api_rest_mini_blog.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tipos de contenido que merece la pena comprimir
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class StreamCompressor:
+    """Compresor incremental: cada trozo se vacía para que el cliente lo reciba ya."""
+
+    def __init__(self, chunk: Callable[[bytes], bytes], finish: Callable[[], bytes]):
+        self.chunk = chunk
+        self.finish = finish
+
+
+class Encoding:
+    """Una codificación de `Content-Encoding`: compresión de una vez y en streaming."""
+
+    def __init__(self, name: str, compress: Callable[[bytes], bytes], stream: Callable[[], StreamCompressor]):
+        self.name = name
+        self.compress = compress
+        self.stream = stream
+
+
+def _gzip() -> Encoding:
+    level = settings.COMPRESSION_GZIP_LEVEL
+
+    def compressobj():
+        # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(data: bytes) -> bytes:
+        compressor = compressobj()
+        return compressor.compress(data) + compressor.flush()
+
+    def stream() -> StreamCompressor:
+        compressor = compressobj()
+        return StreamCompressor(
+            lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+    return Encoding("gzip", compress, stream)
+
+
+def _zstd() -> Encoding:
+    try:
+        from compression import zstd
+    except ImportError:
+        from backports import zstd
+    level = settings.COMPRESSION_ZSTD_LEVEL
+
+    def stream() -> StreamCompressor:
+        compressor = zstd.ZstdCompressor(level=level)
+        return StreamCompressor(
+            lambda data: compressor.compress(data, mode=zstd.ZstdCompressor.FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+    return Encoding("zstd", lambda data: zstd.compress(data, level=level), stream)
+
+
+def _brotli() -> Encoding:
+    import brotli
+
+    quality = settings.COMPRESSION_BROTLI_QUALITY
+
+    def stream() -> StreamCompressor:
+        compressor = brotli.Compressor(quality=quality)
+        return StreamCompressor(lambda data: compressor.process(data) + compressor.flush(), compressor.finish)
+
+    return Encoding("br", lambda data: brotli.compress(data, quality=quality), stream)
+
+
+ENCODING_BUILDERS = {"gzip": _gzip, "zstd": _zstd, "br": _brotli}
+
+
+def build_encodings() -> Dict[str, Encoding]:
+    """
+    Construye las codificaciones de `settings.COMPRESSION_ENCODINGS`, en orden de
+    preferencia. zstd y brotli dependen de paquetes opcionales: si no están
+    instalados se omiten con un aviso.
+    """
+    encodings: Dict[str, Encoding] = {}
+    for name in settings.COMPRESSION_ENCODINGS:
+        if name not in ENCODING_BUILDERS:
+            raise ValueError(f"Unknown compression encoding '{name}'")
+        try:
+            encodings[name] = ENCODING_BUILDERS[name]()
+        except ImportError:
+            logger.warning("Compression encoding '%s' is not available; install its optional dependency", name)
+    return encodings
+
+
+encodings = build_encodings()
+
+# Codificación negociada para la petición en curso; la fija `CompressionMiddleware`
+# y la usan las respuestas en caché para devolver su variante ya comprimida
+current_encoding: ContextVar[Optional[str]] = ContextVar("current_encoding", default=None)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Elige la codificación con mayor `q` de `Accept-Encoding` entre las
+    disponibles; a igual `q` gana el orden de preferencia del servidor.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best: Tuple[float, Optional[str]] = (0.0, None)
+    for name in encodings:
+        q = weights.get(name, wildcard)
+        if q > best[0]:
+            best = (q, name)
+    return best[1]
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Comprime `body` con todas las codificaciones disponibles si supera el umbral."""
+    if not settings.COMPRESSION_ENABLED or len(body) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    return {name: encoding.compress(body) for name, encoding in encodings.items()}
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    content_type = ""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value.decode("latin-1")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime las respuestas JSON/NDJSON según
+    `Accept-Encoding`. Las respuestas de un solo cuerpo menores que
+    `COMPRESSION_MIN_SIZE` se envían sin comprimir; las respuestas en streaming
+    se comprimen trozo a trozo. Las respuestas que ya traen `Content-Encoding`
+    (p. ej. las variantes precomprimidas de la caché) no se tocan.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED or not encodings:
+            return await self.app(scope, receive, send)
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding_name = negotiate(accept_encoding)
+        token = current_encoding.set(encoding_name)
+
+        start_message: Optional[dict] = None
+        stream: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if not _is_compressible(headers):
+                    passthrough = True
+                    return await send(message)
+                # La decisión se toma con el primer trozo del cuerpo
+                headers.append((b"vary", b"Accept-Encoding"))
+                start_message = {**message, "headers": headers}
+                passthrough = encoding_name is None
+                if passthrough:
+                    await send(start_message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = [(name, value) for name, value in start["headers"] if name != b"content-length"]
+                encoding = encodings[encoding_name]
+                if not more_body:
+                    if len(body) < settings.COMPRESSION_MIN_SIZE:
+                        passthrough = True
+                        await send(start)
+                        return await send(message)
+                    body = encoding.compress(body)
+                    headers += [(b"content-encoding", encoding_name.encode()), (b"content-length", str(len(body)).encode())]
+                    await send({**start, "headers": headers})
+                    return await send({**message, "body": body})
+                stream = encoding.stream()
+                headers.append((b"content-encoding", encoding_name.encode()))
+                await send({**start, "headers": headers})
+            body = stream.chunk(body) if body else b""
+            if not more_body:
+                body += stream.finish()
+            await send({**message, "body": body})
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_encoding.reset(token)
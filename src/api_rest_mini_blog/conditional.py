@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Construye un ETag débil a partir de datos de versión baratos de obtener
+    (IDs máximos, contadores de versión...), sin serializar la respuesta.
+    """
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def format_http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil: se ignora el prefijo W/ en ambos lados
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_since(if_modified_since: str, last_modified: str) -> bool:
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+def has_validators(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified_response(request: Request, headers: Mapping[str, str]) -> Optional[Response]:
+    """
+    Devuelve una respuesta 304 si los validadores de la petición (`If-None-Match`
+    o, en su defecto, `If-Modified-Since`) coinciden con los `ETag`/`Last-Modified`
+    de `headers`; si no, devuelve `None` y la respuesta completa debe enviarse.
+    """
+    headers = {name.lower(): value for name, value in headers.items()}
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_none_match is not None:
+        matches = etag is not None and _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None:
+        matches = last_modified is not None and _not_modified_since(if_modified_since, last_modified)
+    else:
+        matches = False
+    if not matches:
+        return None
+    validators = {name: value for name, value in headers.items() if name in ("etag", "last-modified", "cache-control")}
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> dict[str, str]:
+    """
+    Cabeceras de validación que acompañan a las respuestas de lectura: obligan
+    a los clientes a revalidar con `If-None-Match` antes de reutilizar su copia.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
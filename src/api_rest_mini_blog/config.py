@@ -1,3 +1,5 @@
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -10,6 +12,74 @@ class Settings(BaseSettings):
     postgres_db: str = Field(default="", description="Postgres database")
     postgres_host: str = Field(default="", description="Postgres host")
 
+    DB_POOL_SIZE: int = Field(default=5, description="Connections kept open in the pool")
+    DB_MAX_OVERFLOW: int = Field(default=10, description="Extra connections allowed above the pool size")
+    DB_POOL_TIMEOUT: float = Field(default=30.0, description="Seconds to wait for a pooled connection")
+    DB_POOL_RECYCLE: int = Field(default=1800, description="Seconds before a pooled connection is replaced (-1 disables)")
+    DB_POOL_PRE_PING: bool = Field(default=False, description="Test connections with a ping on checkout")
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100, description="asyncpg statement cache size per connection")
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(default=100, description="SQLAlchemy asyncpg prepared statement cache size")
+    DB_PGBOUNCER_MODE: bool = Field(default=False, description="Disable server-side prepared statement reuse for PgBouncer transaction pooling")
+    DB_POOL_WARMUP: bool = Field(default=True, description="Open DB_POOL_SIZE connections per worker at startup")
+
+    DATABASE_REPLICA_URLS: List[str] = Field(default_factory=list, description="Read replica URLs (JSON list)")
+    DB_REPLICA_RETRY_SECONDS: float = Field(default=30.0, description="Seconds a failed replica is skipped before retrying it")
+    DB_REPLICA_STICKY_SECONDS: float = Field(default=5.0, description="Seconds a client reads from the primary after a write")
+
+    SERVER_HOST: str = Field(default="0.0.0.0", description="Address the server binds to")
+    SERVER_PORT: int = Field(default=8000, description="Port the server listens on")
+    SERVER_WORKERS: int = Field(default=0, description="Worker processes (0 = one per available CPU)")
+    SERVER_LOOP: str = Field(default="auto", description="Event loop: auto, asyncio or uvloop")
+    SERVER_HTTP: str = Field(default="auto", description="HTTP parser: auto, h11 or httptools")
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: float = Field(default=25.0, description="Seconds a worker waits for in-flight requests after SIGTERM")
+
+    ADMISSION_CONTROL: bool = Field(default=True, description="Limit concurrent requests per worker and shed load with 503")
+    ADMISSION_READ_CONCURRENCY: int = Field(default=32, description="Concurrent read (GET/HEAD) requests per worker")
+    ADMISSION_WRITE_CONCURRENCY: int = Field(default=8, description="Concurrent write requests per worker")
+    ADMISSION_ROUTE_LIMITS: Dict[str, int] = Field(default_factory=dict, description='Extra per-route limits, e.g. {"POST /posts/{post_id}/comments": 4} (JSON)')
+    ADMISSION_QUEUE_SIZE: int = Field(default=64, description="Requests allowed to wait for a slot per budget")
+    ADMISSION_MAX_WAIT_SECONDS: float = Field(default=1.0, description="Longest a request may wait for a slot before a 503")
+    RATE_LIMIT_PER_SECOND: float = Field(default=0.0, description="Requests per second allowed per client IP (0 disables)")
+    RATE_LIMIT_BURST: int = Field(default=20, description="Requests a client may burst above its rate")
+    RATE_LIMIT_MAX_CLIENTS: int = Field(default=100_000, description="Clients tracked by the in-memory rate limiter")
+
+    COMPRESSION_ENABLED: bool = Field(default=True, description="Compress JSON responses according to Accept-Encoding")
+    COMPRESSION_ENCODINGS: List[str] = Field(default=["zstd", "br", "gzip"], description="Encodings in order of preference; zstd and br need optional packages (JSON list)")
+    COMPRESSION_MIN_SIZE: int = Field(default=1024, description="Responses smaller than this many bytes are sent uncompressed")
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6, description="gzip compression level (1-9)")
+    COMPRESSION_ZSTD_LEVEL: int = Field(default=3, description="zstd compression level")
+    COMPRESSION_BROTLI_QUALITY: int = Field(default=5, description="Brotli quality (0-11)")
+
+    CACHE_BACKEND: str = Field(default="memory", description="Response cache backend: memory, redis or none")
+    CACHE_TTL_SECONDS: int = Field(default=60, description="Response cache entry time-to-live in seconds")
+    CACHE_MAX_ENTRIES: int = Field(default=10_000, description="Maximum entries kept by the in-memory cache")
+    REDIS_URL: str = Field(default="redis://localhost:6379/0", description="Redis URL for the redis cache backend")
+
+    COMMENT_WRITE_BEHIND: bool = Field(default=False, description="Queue new comments and insert them in batches (responds 202)")
+    COMMENT_BATCH_SIZE: int = Field(default=500, description="Maximum comments inserted per write-behind batch")
+    COMMENT_FLUSH_INTERVAL_SECONDS: float = Field(default=0.05, description="Maximum seconds a queued comment waits for its batch to fill")
+    COMMENT_QUEUE_MAX_SIZE: int = Field(default=10_000, description="Queued comments before new ones are written inline")
+
+    FEED_MATERIALIZED_SIZE: int = Field(default=200, description="Latest post summaries kept in memory per worker to serve the feed (0 disables)")
+    FEED_MAX_AGE_SECONDS: float = Field(default=1.0, description="Seconds the materialized feed is served before checking for writes from other workers")
+
+    TRENDING_SIZE: int = Field(default=50, description="Trending posts served by GET /posts/trending (0 disables)")
+    TRENDING_CAPACITY: int = Field(default=1000, description="Candidate posts whose trending score is kept in memory per worker")
+    TRENDING_HALF_LIFE_HOURS: float = Field(default=24.0, description="Hours after which a comment counts half towards its post's trending score")
+    TRENDING_SNAPSHOT_SECONDS: float = Field(default=30.0, description="Seconds between merges of each worker's trending scores into the snapshot table")
+    TRENDING_REBUILD_DAYS: int = Field(default=7, description="Days of comments used to rebuild an empty trending snapshot at startup")
+
+    COMMENT_PARTITIONS_AHEAD: int = Field(default=3, description="Future monthly comment partitions kept created")
+    COMMENT_RETENTION_MONTHS: int = Field(default=0, description="Months of comments kept attached; older partitions are archived (0 keeps all)")
+
+    EXISTENCE_NEGATIVE_TTL_SECONDS: float = Field(default=5.0, description="Seconds a missing user/post id is remembered (0 disables)")
+    EXISTENCE_NEGATIVE_MAX_ENTRIES: int = Field(default=10_000, description="Missing ids remembered per table")
+
+    METRICS_DEBUG_HEADERS: bool = Field(default=False, description="Add X-DB-Query-Count/X-DB-Query-Time headers to every response")
+    SLOW_QUERY_SECONDS: float = Field(default=0.0, description="Log SQL statements slower than this many seconds (0 disables)")
+
+    JSON_SERIALIZER: str = Field(default="pydantic", description="JSON serializer for responses: pydantic or orjson")
+
     model_config = SettingsConfigDict(env_file='.env')
 
 settings = Settings()
@@ -0,0 +1,60 @@
+from sqlalchemy import func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from api_rest_mini_blog import models
+from api_rest_mini_blog.cache import cache
+from api_rest_mini_blog.feed import bump_feed_version, feed
+
+
+async def reconcile_counters(db: AsyncSession) -> dict[str, int]:
+    """
+    Recalcula los contadores desnormalizados (`posts.comment_count`,
+    `posts.last_comment_at`, `users.post_count`, `users.comment_count`) a partir
+    de las tablas de publicaciones y comentarios, y corrige solo las filas que
+    se han desviado. Devuelve cuántas filas se corrigieron en cada tabla.
+    """
+    comment_count = (
+        select(func.count(models.Comment.id))
+        .where(models.Comment.post_id == models.Post.id)
+        .scalar_subquery()
+    )
+    last_comment_at = (
+        select(func.max(models.Comment.created_at))
+        .where(models.Comment.post_id == models.Post.id)
+        .scalar_subquery()
+    )
+    posts = await db.execute(
+        update(models.Post)
+        .where(or_(
+            models.Post.comment_count != comment_count,
+            models.Post.last_comment_at.is_distinct_from(last_comment_at),
+        ))
+        .values(comment_count=comment_count, last_comment_at=last_comment_at)
+        .execution_options(synchronize_session=False)
+    )
+
+    post_count = (
+        select(func.count(models.Post.id))
+        .where(models.Post.user_id == models.User.id)
+        .scalar_subquery()
+    )
+    user_comment_count = (
+        select(func.count(models.Comment.id))
+        .where(models.Comment.user_id == models.User.id)
+        .scalar_subquery()
+    )
+    users = await db.execute(
+        update(models.User)
+        .where(or_(models.User.post_count != post_count, models.User.comment_count != user_comment_count))
+        .values(post_count=post_count, comment_count=user_comment_count)
+        .execution_options(synchronize_session=False)
+    )
+    if posts.rowcount:
+        # Los resúmenes del feed muestran los contadores de las publicaciones
+        await db.execute(bump_feed_version())
+    await db.commit()
+    if posts.rowcount or users.rowcount:
+        await cache.clear()
+        feed.invalidate()
+    return {"posts": posts.rowcount, "users": users.rowcount}
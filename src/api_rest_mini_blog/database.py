@@ -1,28 +1,285 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from typing import AsyncGenerator
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import Request, Response
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from api_rest_mini_blog.config import settings
 
-# Motor de base de datos asíncrono
+logger = logging.getLogger(__name__)
 
 if settings.ENVIRONMENT == "test":
     DATABASE_URL = settings.TEST_DATABASE_URL
 else:
     DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL)
 
-# Fábrica de sesiones asíncronas
+@dataclass
+class PoolMetrics:
+    """
+    Tiempos de espera al pedir conexiones al pool. Las esperas que acaban en
+    timeout se cuentan aparte para no mezclarlas con las de las conexiones
+    obtenidas.
+    """
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    timeout_wait_seconds_total: float = 0.0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def record_timeout(self, waited: float) -> None:
+        self.timeouts += 1
+        self.timeout_wait_seconds_total += waited
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool asíncrono que mide cuánto espera cada petición hasta obtener una conexión,
+    incluido el tiempo de abrir una nueva cuando el pool aún no está lleno.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - start)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def build_engine(url: str) -> AsyncEngine:
+    """
+    Crea el motor asíncrono con los parámetros de pool y de caché de sentencias
+    definidos en `settings`.
+    """
+    if not url.startswith("postgresql"):
+        return create_async_engine(url)
+
+    connect_args: Dict[str, Any] = {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if settings.DB_PGBOUNCER_MODE:
+        # En modo transacción PgBouncer puede cambiar de backend entre sentencias:
+        # no se reutilizan sentencias preparadas y cada una recibe un nombre único.
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+# Motor de base de datos asíncrono; se crea en el arranque de la aplicación (lifespan)
+engine: Optional[AsyncEngine] = None
+
+# Fábrica de sesiones asíncronas; se enlaza al motor en `init_engine`
 async_session = async_sessionmaker(
-    bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
+# Réplicas de lectura: una fábrica de sesiones por réplica y el instante
+# (time.monotonic) hasta el que cada una se considera caída
+replica_sessions: List[async_sessionmaker] = []
+_replica_down_until: Dict[int, float] = {}
+_replica_rotation = itertools.count()
+
+# Cookie con la que un cliente que acaba de escribir lee del primario
+STICKY_COOKIE = "mini_blog_primary_until"
+
 # Base declarativa para los modelos
 Base = declarative_base()
 
+
+def init_engine() -> AsyncEngine:
+    """
+    Crea el motor del proceso (y los de las réplicas de lectura) si aún no
+    existen y enlaza las fábricas de sesiones.
+    """
+    global engine
+    if engine is None:
+        engine = build_engine(DATABASE_URL)
+        async_session.configure(bind=engine)
+        replica_sessions[:] = [
+            async_sessionmaker(
+                bind=build_engine(url),
+                class_=AsyncSession,
+                expire_on_commit=False,
+                info={"replica": True},
+            )
+            for url in settings.DATABASE_REPLICA_URLS
+        ]
+        _replica_down_until.clear()
+    return engine
+
+
+async def dispose_engine() -> None:
+    """
+    Cierra todas las conexiones de los pools; se llama al apagar la aplicación.
+    """
+    global engine
+    for factory in replica_sessions:
+        await factory.kw["bind"].dispose()
+    replica_sessions.clear()
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+
+
+async def _open_pool_connections(target: AsyncEngine) -> int:
+    """
+    Abre `DB_POOL_SIZE` conexiones a la vez y las devuelve al pool. Si alguna
+    falla, cierra las demás y relanza el primer error.
+    """
+    results = await asyncio.gather(
+        *(target.connect() for _ in range(settings.DB_POOL_SIZE)), return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    for result in results:
+        if not isinstance(result, BaseException):
+            await result.close()
+    if errors:
+        raise errors[0]
+    return len(results)
+
+
+async def warm_pool() -> int:
+    """
+    Abre `DB_POOL_SIZE` conexiones en el primario y en cada réplica y las
+    devuelve al pool, para que las primeras peticiones de un worker no paguen
+    el coste de conectar. Solo un fallo del primario detiene el arranque: una
+    réplica que no responde se marca como caída durante
+    `DB_REPLICA_RETRY_SECONDS`, igual que en `get_read_db`. Devuelve cuántas
+    conexiones se abrieron.
+    """
+    init_engine()
+    opened = 0
+    if isinstance(engine.pool, AsyncAdaptedQueuePool):
+        opened += await _open_pool_connections(engine)
+    for index, factory in enumerate(replica_sessions):
+        target = factory.kw["bind"]
+        if not isinstance(target.pool, AsyncAdaptedQueuePool):
+            continue
+        try:
+            opened += await _open_pool_connections(target)
+        except (OSError, exc.DBAPIError, exc.TimeoutError) as error:
+            _replica_down_until[index] = time.monotonic() + settings.DB_REPLICA_RETRY_SECONDS
+            logger.warning("Read replica %d is unreachable, skipping it: %s", index, error)
+    return opened
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Estado actual del pool y métricas acumuladas de espera.
+    """
+    stats: Dict[str, Any] = {
+        "checkouts": pool_metrics.checkouts,
+        "timeouts": pool_metrics.timeouts,
+        "wait_seconds_total": pool_metrics.wait_seconds_total,
+        "wait_seconds_max": pool_metrics.wait_seconds_max,
+        "timeout_wait_seconds_total": pool_metrics.timeout_wait_seconds_total,
+    }
+    pool = engine.pool if engine is not None else None
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
+
+
 # Dependencia para obtener una sesión de base de datos
-async def get_db():
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    init_engine()
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def stick_to_primary(response: Response) -> None:
+    """
+    Dependencia de las rutas de escritura: durante `DB_REPLICA_STICKY_SECONDS`
+    las lecturas del cliente irán al primario, para que vea sus propias escrituras
+    aunque las réplicas lleven retraso.
+    """
+    if settings.DATABASE_REPLICA_URLS:
+        until = time.time() + settings.DB_REPLICA_STICKY_SECONDS
+        response.set_cookie(
+            STICKY_COOKIE,
+            f"{until:.3f}",
+            max_age=int(settings.DB_REPLICA_STICKY_SECONDS) + 1,
+            httponly=True,
+        )
+
+
+def _is_sticky(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def _open_replica_session() -> Optional[AsyncSession]:
+    """
+    Abre una sesión en la siguiente réplica disponible (round-robin) y fuerza la
+    conexión para detectar fallos; una réplica que falla se salta durante
+    `DB_REPLICA_RETRY_SECONDS`. Devuelve `None` si ninguna responde.
+    """
+    count = len(replica_sessions)
+    start = next(_replica_rotation)
+    now = time.monotonic()
+    for offset in range(count):
+        index = (start + offset) % count
+        if _replica_down_until.get(index, 0) > now:
+            continue
+        session = replica_sessions[index]()
+        try:
+            await session.connection()
+        except (OSError, exc.DBAPIError, exc.TimeoutError):
+            await session.close()
+            _replica_down_until[index] = now + settings.DB_REPLICA_RETRY_SECONDS
+            continue
+        return session
+    return None
+
+
+# Dependencia para obtener una sesión de solo lectura (réplica o, en su defecto, primario)
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    init_engine()
+    session = None
+    if replica_sessions and not _is_sticky(request):
+        session = await _open_replica_session()
+    if session is None:
+        session = async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
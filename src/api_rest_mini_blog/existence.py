@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from api_rest_mini_blog.config import settings
+
+
+@dataclass
+class ExistenceStats:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        lookups = self.hits + self.negative_hits + self.misses
+        data["hit_ratio"] = (self.hits + self.negative_hits) / lookups if lookups else 0.0
+        return data
+
+
+class ExistenceCache:
+    """
+    Caché en el proceso de qué IDs existen en una tabla.
+
+    Los IDs existentes se guardan en un bitmap (un bit por ID; los IDs son
+    secuenciales, así que un millón de filas ocupa ~125 KB) y no caducan porque
+    la API no borra filas. Los IDs que no existen se guardan en un LRU acotado
+    con TTL corto, para que los sondeos repetidos de IDs inexistentes no lleguen
+    a la base de datos sin ocultar durante mucho tiempo filas creadas por otro
+    proceso.
+    """
+
+    def __init__(self, negative_ttl: float, negative_max_entries: int):
+        self.negative_ttl = negative_ttl
+        self.negative_max_entries = negative_max_entries
+        self.stats = ExistenceStats()
+        self._bitmap = bytearray()
+        self._missing: "OrderedDict[int, float]" = OrderedDict()
+
+    def _has_bit(self, item_id: int) -> bool:
+        index = item_id >> 3
+        return 0 <= index < len(self._bitmap) and bool(self._bitmap[index] & (1 << (item_id & 7)))
+
+    def add(self, item_id: int) -> None:
+        """Registra que `item_id` existe (p. ej. al crearlo o al leerlo)."""
+        if item_id < 0:
+            return
+        index = item_id >> 3
+        if index >= len(self._bitmap):
+            # Crece al doble para amortizar las ampliaciones del bitmap
+            self._bitmap.extend(bytes(max(index + 1, 2 * len(self._bitmap)) - len(self._bitmap)))
+        self._bitmap[index] |= 1 << (item_id & 7)
+        self._missing.pop(item_id, None)
+
+    def add_missing(self, item_id: int) -> None:
+        """Registra que `item_id` no existe durante `negative_ttl` segundos."""
+        if self.negative_ttl <= 0:
+            return
+        self._missing[item_id] = time.monotonic() + self.negative_ttl
+        self._missing.move_to_end(item_id)
+        while len(self._missing) > self.negative_max_entries:
+            self._missing.popitem(last=False)
+
+    def lookup(self, item_id: int) -> Optional[bool]:
+        """
+        Devuelve `True` si se sabe que existe, `False` si se sabe que no existe
+        y `None` si hay que preguntar a la base de datos.
+        """
+        if self._has_bit(item_id):
+            self.stats.hits += 1
+            return True
+        expires = self._missing.get(item_id)
+        if expires is not None:
+            if expires > time.monotonic():
+                self.stats.negative_hits += 1
+                return False
+            del self._missing[item_id]
+        self.stats.misses += 1
+        return None
+
+    def clear_missing(self) -> None:
+        """Olvida los IDs inexistentes (p. ej. tras una importación masiva)."""
+        self._missing.clear()
+
+    def clear(self) -> None:
+        self._bitmap = bytearray()
+        self._missing.clear()
+
+
+users = ExistenceCache(settings.EXISTENCE_NEGATIVE_TTL_SECONDS, settings.EXISTENCE_NEGATIVE_MAX_ENTRIES)
+posts = ExistenceCache(settings.EXISTENCE_NEGATIVE_TTL_SECONDS, settings.EXISTENCE_NEGATIVE_MAX_ENTRIES)
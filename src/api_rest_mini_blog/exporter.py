@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from api_rest_mini_blog import models
+from api_rest_mini_blog.serialization import dumps
+
+# Filas que se piden al cursor del servidor y se envían al cliente de una vez
+EXPORT_BATCH_SIZE = 1000
+
+# Columnas exportadas: las mismas que acepta la importación, más el `id`
+USER_COLUMNS = (models.User.id, models.User.username, models.User.email)
+POST_COLUMNS = (
+    models.Post.id,
+    models.Post.title,
+    models.Post.content,
+    models.Post.user_id,
+    models.Post.created_at,
+)
+COMMENT_COLUMNS = (
+    models.Comment.id,
+    models.Comment.text,
+    models.Comment.user_id,
+    models.Comment.post_id,
+    models.Comment.created_at,
+)
+
+
+async def _stream_rows(db: AsyncSession, query, record_type: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Ejecuta `query` con un cursor del lado del servidor y produce un bloque NDJSON
+    por cada lote de `EXPORT_BATCH_SIZE` filas. El siguiente lote no se pide hasta
+    que el anterior se ha enviado, de modo que la memoria no depende del total de
+    filas y un cliente lento frena la lectura en lugar de acumular datos.
+    """
+    result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    async for partition in result.partitions():
+        lines = []
+        for row in partition:
+            record = dict(row._mapping)
+            if record_type is not None:
+                record["type"] = record_type
+            lines.append(dumps(record))
+        yield b"\n".join(lines) + b"\n"
+
+
+async def export_user(db: AsyncSession, user_id: int) -> AsyncIterator[bytes]:
+    """
+    Exporta un usuario con todas sus publicaciones y comentarios en NDJSON.
+    Cada línea lleva un campo `type` (`user`, `post` o `comment`).
+    """
+    async for chunk in _stream_rows(db, select(*USER_COLUMNS).where(models.User.id == user_id), "user"):
+        yield chunk
+    posts = (
+        select(*POST_COLUMNS)
+        .where(models.Post.user_id == user_id)
+        .order_by(models.Post.user_id, models.Post.created_at, models.Post.id)
+    )
+    async for chunk in _stream_rows(db, posts, "post"):
+        yield chunk
+    comments = (
+        select(*COMMENT_COLUMNS)
+        .where(models.Comment.user_id == user_id)
+        .order_by(models.Comment.user_id, models.Comment.created_at, models.Comment.id)
+    )
+    async for chunk in _stream_rows(db, comments, "comment"):
+        yield chunk
+
+
+async def export_table(db: AsyncSession, kind: str, since: Optional[datetime] = None) -> AsyncIterator[bytes]:
+    """
+    Exporta todas las publicaciones o todos los comentarios en orden cronológico,
+    opcionalmente solo los creados desde `since`. Cada línea tiene el formato que
+    acepta `POST /import/{kind}`.
+    """
+    model, columns = {"posts": (models.Post, POST_COLUMNS), "comments": (models.Comment, COMMENT_COLUMNS)}[kind]
+    query = select(*columns).order_by(model.created_at, model.id)
+    if since is not None:
+        query = query.where(model.created_at >= since)
+    async for chunk in _stream_rows(db, query):
+        yield chunk
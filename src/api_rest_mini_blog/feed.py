@@ -0,0 +1,172 @@
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from api_rest_mini_blog import models, schemas
+from api_rest_mini_blog.config import settings
+
+
+@dataclass
+class FeedStats:
+    hits: int = 0
+    misses: int = 0
+    rebuilds: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Entry:
+    summary: schemas.PostSummary
+    # JSON del resumen ya renderizado: una página se sirve concatenando entradas
+    rendered: bytes
+
+    @classmethod
+    def build(cls, summary: schemas.PostSummary) -> "_Entry":
+        return cls(summary, summary.model_dump_json().encode())
+
+    @property
+    def key(self) -> Tuple[datetime, int]:
+        return self.summary.created_at, self.summary.id
+
+
+class MaterializedFeed:
+    """
+    Los `size` resúmenes más recientes del feed, ordenados por
+    `(created_at, id)` descendente y ya serializados, para servir las primeras
+    páginas de `GET /posts/` sin consultar la base de datos.
+
+    `version` es el contador de `services.get_feed_version`, así que el ETag
+    coincide con el que se calcularía consultando la base de datos. Cada
+    escritura devuelve la versión que ha dejado (`bump_feed_version`); las del
+    propio proceso se aplican de forma incremental solo si es la siguiente a
+    `version` (`advance`). Si no (otro proceso escribió entre medias), el feed
+    se descarta y se reconstruye en la siguiente lectura. Las escrituras de
+    otros procesos se detectan comparando la versión cada `max_age` segundos.
+    """
+
+    def __init__(self, size: int, max_age: float):
+        self.size = size
+        self.max_age = max_age
+        self.stats = FeedStats()
+        self.version: Optional[int] = None
+        self._entries: List[_Entry] = []
+        self._by_id: Dict[int, _Entry] = {}
+        # El feed contiene todas las publicaciones (hay menos de `size`)
+        self._complete = False
+        self._checked_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    def load(self, version: int, summaries: List[schemas.PostSummary]) -> None:
+        """Sustituye el contenido por `summaries` (los más recientes primero) leídos en `version`."""
+        self._entries = [_Entry.build(summary) for summary in summaries[: self.size]]
+        self._by_id = {entry.summary.id: entry for entry in self._entries}
+        self._complete = len(summaries) < self.size
+        self.version = version
+        self.stats.rebuilds += 1
+        self.mark_checked()
+
+    def invalidate(self) -> None:
+        """Descarta el contenido; la siguiente lectura lo reconstruye."""
+        self.version = None
+        self._entries = []
+        self._by_id = {}
+
+    def needs_check(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.max_age
+
+    def mark_checked(self) -> None:
+        self._checked_at = time.monotonic()
+
+    def advance(self, version: int) -> bool:
+        """
+        Pasa a `version`, la que ha dejado una escritura de este proceso. Solo
+        si es la siguiente a la actual devuelve `True` y la escritura debe
+        aplicarse con `add_post`/`add_comment`; si no, descarta el contenido.
+        """
+        if self.version is None:
+            return False
+        if version != self.version + 1:
+            self.invalidate()
+            return False
+        self.version = version
+        return True
+
+    def add_post(self, summary: schemas.PostSummary) -> None:
+        """Añade una publicación recién creada por este proceso."""
+        if self.version is None:
+            return
+        entry = _Entry.build(summary)
+        index = next((i for i, other in enumerate(self._entries) if other.key < entry.key), len(self._entries))
+        if index >= self.size:
+            return
+        self._entries.insert(index, entry)
+        self._by_id[summary.id] = entry
+        if len(self._entries) > self.size:
+            del self._by_id[self._entries.pop().summary.id]
+            self._complete = False
+
+    def add_comment(self, post_id: int, created_at: datetime) -> None:
+        """Actualiza el contador y la fecha del último comentario de `post_id`."""
+        if self.version is None:
+            return
+        entry = self._by_id.get(post_id)
+        if entry is None:
+            return
+        previous = entry.summary.last_comment_at
+        updated = entry.summary.model_copy(update={
+            "comment_count": entry.summary.comment_count + 1,
+            "last_comment_at": created_at if previous is None else max(previous, created_at),
+        })
+        entry.summary, entry.rendered = updated, _Entry.build(updated).rendered
+
+    def page(
+        self, skip: int, limit: int, after: Optional[Tuple[datetime, int]] = None
+    ) -> Optional[List[_Entry]]:
+        """
+        Devuelve las entradas de la página pedida, o `None` si la página cae
+        fuera del feed y hay que pedirla a la base de datos.
+        """
+        if after is not None:
+            start = next((i for i, entry in enumerate(self._entries) if entry.key < after), len(self._entries))
+        else:
+            start = skip
+        end = start + limit
+        if end > len(self._entries) and not self._complete:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        return self._entries[start:end]
+
+
+def bump_feed_version():
+    """
+    `UPDATE ... RETURNING` que incrementa la versión del feed y devuelve la
+    nueva; las escrituras que cambian el feed lo incluyen como CTE en su propia
+    sentencia.
+    """
+    return (
+        update(models.FeedVersion)
+        .values(version=models.FeedVersion.version + 1)
+        .returning(models.FeedVersion.version)
+    )
+
+
+def render_page(entries: List[_Entry]) -> bytes:
+    """Concatena los resúmenes ya serializados en un array JSON."""
+    return b"[" + b",".join(entry.rendered for entry in entries) + b"]"
+
+
+# Instancia del proceso; se reconstruye en el lifespan y al leerla si se ha descartado
+feed = MaterializedFeed(settings.FEED_MATERIALIZED_SIZE, settings.FEED_MAX_AGE_SECONDS)
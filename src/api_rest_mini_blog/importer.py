@@ -0,0 +1,246 @@
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import bindparam, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from api_rest_mini_blog import existence, models, schemas
+from api_rest_mini_blog.cache import cache
+from api_rest_mini_blog.feed import bump_feed_version, feed
+from api_rest_mini_blog.partitions import ensure_partitions
+
+# Filas que se validan e insertan juntas (una transacción por lote)
+IMPORT_BATCH_SIZE = 1000
+
+# Errores por fila que se devuelven en el informe; el resto solo se cuentan
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_SCHEMAS: dict[str, Type[BaseModel]] = {
+    "users": schemas.UserCreate,
+    "posts": schemas.PostImport,
+    "comments": schemas.CommentImport,
+}
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Divide un flujo de bytes (p. ej. `request.stream()`) en líneas NDJSON
+    sin cargar el cuerpo completo en memoria.
+    """
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Las fechas sin zona horaria se interpretan en UTC, como hace asyncpg al
+    # guardarlas; el resto se pasan a UTC, la zona de los límites de las particiones
+    return value.astimezone(timezone.utc) if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+class _Importer:
+    def __init__(self, db: AsyncSession, report: schemas.ImportReport):
+        self.db = db
+        self.report = report
+        # Etiquetas de caché afectadas por el lote en curso; se invalidan tras el commit
+        self.tags: set[str] = set()
+
+    def fail(self, line: int, error: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(schemas.ImportRowError(line=line, error=error))
+
+    async def existing_ids(self, column, ids: set[int]) -> set[int]:
+        """Resuelve en una sola consulta qué IDs referenciados existen."""
+        if not ids:
+            return set()
+        result = await self.db.execute(select(column).where(column.in_(ids)))
+        return set(result.scalars().all())
+
+    async def copy_rows(self, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        """
+        Inserta las filas con `COPY` cuando el driver es asyncpg y, en otro caso,
+        con un único `INSERT` de varias filas (executemany).
+        """
+        connection = await self.db.connection()
+        if connection.dialect.driver == "asyncpg":
+            raw = await connection.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(table, records=rows, columns=list(columns))
+        else:
+            model = {"posts": models.Post, "comments": models.Comment}[table]
+            await self.db.execute(model.__table__.insert(), [dict(zip(columns, row)) for row in rows])
+
+    async def bump_counters(self, table, values: dict, params: List[dict]) -> None:
+        """
+        Actualiza los contadores de varias filas de `table` con una única sentencia
+        ejecutada en modo executemany; cada elemento de `params` lleva el `row_id`
+        y el número de filas importadas (`amount`) que le corresponden.
+        """
+        await self.db.execute(table.update().where(table.c.id == bindparam("row_id")).values(**values), params)
+
+    async def users(self, batch: List[Tuple[int, schemas.UserCreate]]) -> None:
+        seen: set[str] = set()
+        unique = []
+        for line, user in batch:
+            if user.email in seen or user.username in seen:
+                self.fail(line, "Duplicated email or username in the same batch.")
+                continue
+            seen.update((user.email, user.username))
+            unique.append((line, user))
+        if not unique:
+            return
+        result = await self.db.execute(
+            insert(models.User)
+            .values([{"username": user.username, "email": user.email} for _, user in unique])
+            .on_conflict_do_nothing()
+            .returning(models.User.email)
+        )
+        inserted = set(result.scalars().all())
+        for line, user in unique:
+            if user.email not in inserted:
+                self.fail(line, f"Email '{user.email}' or username '{user.username}' is already registered.")
+        self.report.inserted += len(inserted)
+
+    async def posts(self, batch: List[Tuple[int, schemas.PostImport]], now: datetime) -> None:
+        users = await self.existing_ids(models.User.id, {post.user_id for _, post in batch})
+        rows = []
+        for line, post in batch:
+            if post.user_id not in users:
+                self.fail(line, f"User with id {post.user_id} not found. Cannot create post.")
+                continue
+            rows.append((post.title, post.content, post.user_id, post.created_at or now, post.created_at or now))
+        if rows:
+            await self.copy_rows("posts", ("title", "content", "user_id", "created_at", "updated_at"), rows)
+            users = models.User.__table__
+            await self.bump_counters(
+                users,
+                {"post_count": users.c.post_count + bindparam("amount")},
+                [{"row_id": user_id, "amount": amount} for user_id, amount in Counter(row[2] for row in rows).items()],
+            )
+            self.report.inserted += len(rows)
+            self.tags.add("feed")
+            self.tags.update(f"user:{row[2]}" for row in rows)
+
+    async def comments(self, batch: List[Tuple[int, schemas.CommentImport]], now: datetime) -> None:
+        users = await self.existing_ids(models.User.id, {comment.user_id for _, comment in batch})
+        posts = await self.existing_ids(models.Post.id, {comment.post_id for _, comment in batch})
+        rows = []
+        for line, comment in batch:
+            created_at = _as_utc(comment.created_at) if comment.created_at else now
+            if comment.post_id not in posts:
+                self.fail(line, f"Post with id {comment.post_id} not found. Cannot create comment.")
+            elif comment.user_id not in users:
+                self.fail(line, f"User with id {comment.user_id} not found. Cannot create comment.")
+            else:
+                rows.append((comment.text, comment.user_id, comment.post_id, created_at))
+        if not rows:
+            return
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Los meses importados tienen su partición antes de copiar, en vez de
+            # llenar la partición por defecto
+            await ensure_partitions(self.db, min(row[3] for row in rows), max(row[3] for row in rows))
+        await self.copy_rows("comments", ("text", "user_id", "post_id", "created_at"), rows)
+        touched: dict[int, dict] = {}
+        for _, _, post_id, created_at in rows:
+            entry = touched.setdefault(post_id, {"row_id": post_id, "amount": 0, "last": created_at})
+            entry["amount"] += 1
+            entry["last"] = max(entry["last"], created_at)
+        # Cambia la versión de los posts comentados para invalidar sus ETags y
+        # actualiza sus contadores; la fecha del último comentario solo avanza
+        posts = models.Post.__table__
+        await self.bump_counters(
+            posts,
+            {
+                "version": posts.c.version + 1,
+                "updated_at": func.now(),
+                "comment_count": posts.c.comment_count + bindparam("amount"),
+                "last_comment_at": func.greatest(posts.c.last_comment_at, bindparam("last")),
+            },
+            list(touched.values()),
+        )
+        users = models.User.__table__
+        await self.bump_counters(
+            users,
+            {"comment_count": users.c.comment_count + bindparam("amount")},
+            [{"row_id": user_id, "amount": amount} for user_id, amount in Counter(row[1] for row in rows).items()],
+        )
+        self.report.inserted += len(rows)
+        self.tags.update(f"post:{post_id}" for post_id in touched)
+        self.tags.update(f"user:{row[1]}" for row in rows)
+
+
+async def import_ndjson(
+    db: AsyncSession,
+    kind: str,
+    lines: AsyncIterable[bytes],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> schemas.ImportReport:
+    """
+    Importa usuarios, publicaciones o comentarios desde líneas NDJSON.
+
+    Cada lote se valida con una consulta por tipo de referencia (`user_id`,
+    `post_id`), se inserta con `COPY`/`INSERT` multi-fila y se confirma en su
+    propia transacción. Las filas inválidas no detienen la importación: se
+    informan con su número de línea en el `ImportReport`.
+    """
+    schema = IMPORT_SCHEMAS[kind]
+    importer = _Importer(db, schemas.ImportReport())
+    batch: list = []
+
+    async def flush() -> None:
+        now = datetime.now(timezone.utc)
+        if kind == "users":
+            await importer.users(batch)
+        elif kind == "posts":
+            await importer.posts(batch, now)
+        else:
+            await importer.comments(batch, now)
+        if kind != "users":
+            # Al final del lote, para no retener el bloqueo de la versión mientras se inserta
+            await db.execute(bump_feed_version())
+        await db.commit()
+        # Las filas nuevas pueden tener IDs que la caché de existencia recuerda como inexistentes
+        if kind == "users":
+            existence.users.clear_missing()
+        elif kind == "posts":
+            existence.posts.clear_missing()
+        if kind != "users":
+            feed.invalidate()
+        if importer.tags:
+            await cache.invalidate_tags(*importer.tags)
+            importer.tags.clear()
+        batch.clear()
+
+    line_number = 0
+    async for raw in lines:
+        line_number += 1
+        if not raw.strip():
+            continue
+        try:
+            batch.append((line_number, schema.model_validate(json.loads(raw))))
+        except ValidationError as exc:
+            importer.fail(line_number, _format_validation_error(exc))
+        except ValueError as exc:
+            importer.fail(line_number, f"Invalid JSON: {exc}")
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    importer.report.errors.sort(key=lambda error: error.line)
+    return importer.report
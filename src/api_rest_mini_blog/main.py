@@ -1,15 +1,75 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from api_rest_mini_blog.database import Base, engine
-from api_rest_mini_blog.routers import users, posts 
+from api_rest_mini_blog import database, services
+from api_rest_mini_blog.admission import AdmissionMiddleware
+from api_rest_mini_blog.compression import CompressionMiddleware
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.database import dispose_engine, init_engine, warm_pool
+from api_rest_mini_blog.feed import feed
+from api_rest_mini_blog.metrics import MetricsMiddleware
+from api_rest_mini_blog.partitions import maintain_partitions
+from api_rest_mini_blog.routers import users, posts, imports, exports, stats
+from api_rest_mini_blog.serialization import FastJSONResponse
+from api_rest_mini_blog.trending import trending
+from api_rest_mini_blog.write_behind import comment_writer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crea el motor de base de datos de cada worker al arrancar (abriendo ya las
+    conexiones del pool con `DB_POOL_WARMUP`) y cierra sus conexiones al apagar.
+    Al arrancar construye el feed materializado para que la primera petición
+    no tenga que hacerlo y, en Postgres, crea las particiones de comentarios de
+    los próximos `COMMENT_PARTITIONS_AHEAD` meses que falten (el archivado solo
+    lo hace `mini-blog partitions`).
+    Carga las puntuaciones de tendencia (reconstruyéndolas si no hay snapshot)
+    y arranca sus snapshots periódicos; al apagar guarda las pendientes.
+    Con `COMMENT_WRITE_BEHIND`, arranca la escritura diferida de comentarios y,
+    al apagar, escribe los que sigan en la cola antes de cerrar el motor.
+    """
+    engine = init_engine()
+    if settings.DB_POOL_WARMUP:
+        await warm_pool()
+    if engine.dialect.name == "postgresql":
+        # Las particiones solo existen en Postgres; con SQLite no hay nada que mantener
+        async with database.async_session() as db:
+            await maintain_partitions(db, settings.COMMENT_PARTITIONS_AHEAD)
+    if feed.enabled:
+        async with database.async_session() as db:
+            await services.load_feed(db)
+    if trending.enabled:
+        async with database.async_session() as db:
+            await trending.rebuild(db)
+        await trending.start()
+    if settings.COMMENT_WRITE_BEHIND:
+        await comment_writer.start()
+    yield
+    await comment_writer.stop()
+    await trending.stop()
+    await dispose_engine()
+
 
 app = FastAPI(
     title="API para un Mini-Blog",
     description="Una API REST para gestionar usuarios, posts y comentarios.",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# El último añadido es el más externo: las métricas ven también las peticiones rechazadas
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(users.router)
 app.include_router(posts.router)
+app.include_router(imports.router)
+app.include_router(exports.router)
+app.include_router(stats.router)
+app.include_router(stats.metrics_router)
 
 @app.get("/", tags=["Root"])
 def read_root():
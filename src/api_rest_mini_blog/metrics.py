@@ -0,0 +1,221 @@
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api_rest_mini_blog.config import settings
+
+logger = logging.getLogger("api_rest_mini_blog.sql")
+
+# Límites superiores (en segundos) de los buckets de los histogramas de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites superiores de los buckets del número de sentencias SQL por petición
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+
+# Etiqueta de las peticiones que no coinciden con ninguna ruta, para no crear
+# una serie por cada URL desconocida
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monótono con etiquetas, en formato de texto de Prometheus."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in self.values.items()]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+
+class Gauge(Counter):
+    """Valor que sube y baja (p. ej. peticiones en curso)."""
+
+    kind = "gauge"
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self.values[labels] = value
+
+
+class Histogram(Counter):
+    """Histograma acumulativo con buckets fijos, suma y número de observaciones."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...]):
+        super().__init__(name, help)
+        self.buckets = buckets
+        self.series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        # Por serie: un contador por bucket, +Inf, suma y número de observaciones
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 3)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-3] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in self.series.items():
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', '+Inf')])} {series[-3]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+requests_total = Counter("http_requests_total", "HTTP requests by route, method and status code.")
+request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and method.", LATENCY_BUCKETS
+)
+requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+request_queries = Histogram(
+    "http_request_sql_statements", "SQL statements executed per HTTP request.", QUERY_COUNT_BUCKETS
+)
+request_query_seconds = Histogram(
+    "http_request_sql_seconds", "Time spent executing SQL per HTTP request.", LATENCY_BUCKETS
+)
+sql_statements_total = Counter("sql_statements_total", "SQL statements executed by the application.")
+slow_statements_total = Counter("sql_slow_statements_total", "SQL statements slower than SLOW_QUERY_SECONDS.")
+requests_shed_total = Counter("http_requests_shed_total", "Requests rejected by admission control or rate limiting.")
+
+REQUEST_METRICS = (
+    requests_total,
+    request_duration,
+    requests_in_flight,
+    request_queries,
+    request_query_seconds,
+    sql_statements_total,
+    slow_statements_total,
+    requests_shed_total,
+)
+
+
+@dataclass
+class QueryStats:
+    """Sentencias SQL ejecutadas durante una petición y su tiempo total."""
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Estadísticas SQL de la petición en curso; `None` fuera de una petición HTTP
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    sql_statements_total.inc()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+    if 0 < settings.SLOW_QUERY_SECONDS <= elapsed:
+        slow_statements_total.inc()
+        logger.warning("Slow SQL statement (%.3fs): %s", elapsed, " ".join(statement.split()))
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide la latencia, las peticiones en curso y las sentencias
+    SQL de cada petición, agrupadas por la plantilla de la ruta (`/posts/{post_id}`).
+
+    Con `METRICS_DEBUG_HEADERS` añade a la respuesta las cabeceras
+    `X-DB-Query-Count` y `X-DB-Query-Time` para detectar regresiones N+1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        method = scope["method"]
+        requests_in_flight.inc((("method", method),))
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.METRICS_DEBUG_HEADERS:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-query-time", f"{stats.seconds * 1000:.3f}ms".encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            requests_in_flight.inc((("method", method),), -1)
+            route = scope.get("route")
+            labels = (("route", getattr(route, "path", UNMATCHED_ROUTE)), ("method", method))
+            request_duration.observe(time.perf_counter() - start, labels)
+            requests_total.inc((*labels, ("status", str(status_code))))
+            request_queries.observe(stats.count, labels)
+            request_query_seconds.observe(stats.seconds, labels)
+
+
+def render_metrics(extra: Dict[str, Dict[str, float]]) -> str:
+    """
+    Devuelve todas las métricas en formato de texto de Prometheus. `extra` añade
+    gauges sin etiquetas agrupados por prefijo (p. ej. `{"db_pool": pool_stats()}`).
+    """
+    lines: List[str] = []
+    for metric in REQUEST_METRICS:
+        lines.extend(metric.render())
+    for prefix, values in extra.items():
+        for name, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import BigInteger, CheckConstraint, Column, DDL, Integer, String, Text, DateTime, Float, ForeignKey, Index, event
 from sqlalchemy.orm import relationship, Mapped, mapped_column 
 from sqlalchemy.sql import func
 from datetime import datetime
+from typing import Optional
 
 from api_rest_mini_blog.database import Base
 
@@ -14,6 +15,10 @@ class User(Base):
     
     email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
 
+    # Contadores desnormalizados; los mantienen las escrituras y `mini-blog reconcile-counters`
+    post_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    comment_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+
     posts: Mapped[list["Post"]] = relationship(back_populates="author")
     comments: Mapped[list["Comment"]] = relationship(back_populates="author")
 
@@ -24,22 +29,81 @@ class Post(Base):
     title: Mapped[str] = mapped_column(String, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Versión y fecha de la última modificación (nuevo comentario); se usan como validadores HTTP
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="1")
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Contadores desnormalizados de comentarios; se actualizan en la misma sentencia que el comentario
+    comment_count: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
+    last_comment_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
 
     author: Mapped["User"] = relationship(back_populates="posts")
     comments: Mapped[list["Comment"]] = relationship(back_populates="post", cascade="all, delete-orphan")
 
+    # La columna generada `search_vector` (tsvector + índice GIN) solo existe en
+    # Postgres y la crea la migración; no se mapea para que el modelo siga
+    # funcionando con SQLite. La usa `api_rest_mini_blog.search`.
+    __table_args__ = (
+        # Índice para la paginación por cursor del feed: (created_at, id) descendente
+        Index("ix_posts_created_at_id", created_at.desc(), id.desc()),
+        # Índice para listar las publicaciones de un usuario
+        Index("ix_posts_user_id_created_at_id", user_id, created_at, id),
+    )
+
 
 class Comment(Base):
+    # En Postgres la tabla está particionada por mes de `created_at` (ver
+    # `partitions.py`) y su clave primaria es `(id, created_at)`; `id` sigue
+    # siendo único porque sale de una secuencia, así que se mapea como clave.
     __tablename__ = "comments"
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
     
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     
     post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"), nullable=False)
 
     author: Mapped["User"] = relationship(back_populates="comments")
-    post: Mapped["Post"] = relationship(back_populates="comments")
\ No newline at end of file
+    post: Mapped["Post"] = relationship(back_populates="comments")
+
+    __table_args__ = (
+        # Índice para paginar los comentarios de un post en orden cronológico
+        Index("ix_comments_post_id_created_at_id", post_id, created_at, id),
+        # Índice para listar los comentarios de un usuario
+        Index("ix_comments_user_id_created_at_id", user_id, created_at, id),
+    )
+
+
+class PostTrendingScore(Base):
+    # Snapshot de las puntuaciones de tendencia (ver `trending.py`). `score` es
+    # el logaritmo de la suma de los pesos de los comentarios del post, con
+    # decaimiento hacia delante: solo crece, y lo que decae es la referencia.
+    __tablename__ = "post_trending_scores"
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Índice para leer las mejores puntuaciones al arrancar
+        Index("ix_post_trending_scores_score", score.desc()),
+    )
+
+
+class FeedVersion(Base):
+    # Fila única con la versión del feed (ETag de `GET /posts/`): cada escritura
+    # que cambia el feed la incrementa en su misma sentencia. El bloqueo de la
+    # fila ordena los incrementos igual que los commits, así que solo crece.
+    __tablename__ = "feed_version"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+
+    __table_args__ = (
+        CheckConstraint("id = 1", name="ck_feed_version_single_row"),
+    )
+
+
+# La fila se crea junto con la tabla cuando se usa `create_all` (SQLite); en
+# Postgres la inserta la migración
+event.listen(FeedVersion.__table__, "after_create", DDL("INSERT INTO feed_version (id, version) VALUES (1, 0)"))
@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no es válido o fue manipulado."""
+
+
+def _encode(values: list) -> str:
+    payload = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Any:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """
+    Codifica la posición `(created_at, id)` del último elemento de una página
+    en un cursor opaco y seguro para URLs.
+    """
+    return _encode([created_at.isoformat(), item_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por `encode_cursor`.
+    Lanza `InvalidCursorError` si el cursor no tiene el formato esperado.
+    """
+    try:
+        created_at, item_id = _decode(cursor)
+        parsed = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'") from exc
+    if not isinstance(item_id, int) or parsed.tzinfo is None:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'")
+    return parsed, item_id
+
+
+def encode_rank_cursor(rank: float, kind: str, item_id: int) -> str:
+    """
+    Codifica la posición `(rank, kind, id)` del último resultado de una búsqueda.
+    """
+    return _encode([rank, kind, item_id])
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, str, int]:
+    """
+    Decodifica un cursor generado por `encode_rank_cursor`.
+    Lanza `InvalidCursorError` si el cursor no tiene el formato esperado.
+    """
+    try:
+        rank, kind, item_id = _decode(cursor)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'") from exc
+    if not isinstance(rank, (int, float)) or not isinstance(kind, str) or not isinstance(item_id, int):
+        raise InvalidCursorError(f"Invalid cursor '{cursor}'")
+    return float(rank), kind, item_id
+
+
+def parse_ids(ids: str, max_ids: int) -> List[int]:
+    """
+    Convierte el parámetro `ids` (IDs separados por comas) en una lista sin
+    duplicados y en el orden recibido, o responde 400 si no es válido.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid ids '{ids}'")
+    if not parsed or len(parsed) > max_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {max_ids} ids are required",
+        )
+    return parsed
+
+
+def parse_cursor(cursor: Optional[str], decoder: Callable[[str], Any] = decode_cursor) -> Any:
+    """
+    Decodifica el parámetro `cursor` de un endpoint o responde 400 si no es válido.
+    """
+    if cursor is None:
+        return None
+    try:
+        return decoder(cursor)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
@@ -0,0 +1,163 @@
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_rest_mini_blog.feed import bump_feed_version
+
+# Tabla particionada por rango mensual de `created_at` y su partición por
+# defecto, que recoge las filas de meses sin partición propia
+PARTITIONED_TABLE = "comments"
+DEFAULT_PARTITION = "comments_default"
+
+# Esquema al que se mueven las particiones archivadas
+ARCHIVE_SCHEMA = "archive"
+
+# Columnas que se copian al mover filas (`search_vector` es generada)
+COPY_COLUMNS = "id, text, created_at, user_id, post_id"
+
+# Clave del advisory lock que serializa el mantenimiento entre workers
+MAINTENANCE_LOCK_KEY = 0x636F6D6D656E7473
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def _bound(month: date) -> str:
+    # Límites en UTC para que no dependan de la zona horaria de la sesión
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+async def list_partitions(db: AsyncSession) -> List[str]:
+    """Nombres de las particiones mensuales adjuntas, de la más antigua a la más reciente."""
+    result = await db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass) ORDER BY child.relname"
+        ),
+        {"table": PARTITIONED_TABLE},
+    )
+    return [name for name in result.scalars() if name != DEFAULT_PARTITION]
+
+
+async def create_partition(db: AsyncSession, month: date) -> bool:
+    """
+    Crea la partición de `month` si no existe. Las filas de ese mes que hubieran
+    caído en la partición por defecto se mueven a la nueva antes de adjuntarla,
+    porque Postgres no permite adjuntar un rango que la partición por defecto
+    ya contiene. Devuelve si se creó.
+    """
+    name = partition_name(month)
+    if name in await list_partitions(db):
+        return False
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    await db.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING GENERATED)"
+    ))
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= :lower AND created_at < :upper "
+            f"RETURNING {COPY_COLUMNS}) "
+            f"INSERT INTO {name} ({COPY_COLUMNS}) SELECT {COPY_COLUMNS} FROM moved"
+        ),
+        {
+            "lower": datetime.combine(month, datetime.min.time(), timezone.utc),
+            "upper": datetime.combine(add_months(month, 1), datetime.min.time(), timezone.utc),
+        },
+    )
+    await db.execute(text(
+        f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    return True
+
+
+async def ensure_partitions(db: AsyncSession, start: date, end: date) -> List[str]:
+    """
+    Crea las particiones que falten entre los meses de `start` y `end` (ambos
+    incluidos) dentro de la transacción en curso; el advisory lock evita que dos
+    procesos creen la misma a la vez. Devuelve las creadas.
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    created = []
+    month = month_start(start)
+    while month <= month_start(end):
+        if await create_partition(db, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+async def archive_partitions(db: AsyncSession, before: date) -> List[str]:
+    """
+    Desadjunta las particiones de meses anteriores a `before` y las mueve al
+    esquema `archive` sin sus índices secundarios (solo se conservan para
+    consultas puntuales). Los comentarios archivados dejan de servirse; los
+    contadores desnormalizados los siguen contando hasta que se ejecute
+    `reconcile-counters`. Devuelve las archivadas.
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    await db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    archived = []
+    for name in await list_partitions(db):
+        if name >= partition_name(month_start(before)):
+            break
+        await db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+        await db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        indexes = await db.execute(
+            text(
+                "SELECT indexrelid::regclass::text FROM pg_index "
+                "WHERE indrelid = CAST(:table AS regclass) AND NOT indisprimary"
+            ),
+            {"table": f"{ARCHIVE_SCHEMA}.{name}"},
+        )
+        for index in indexes.scalars().all():
+            await db.execute(text(f"DROP INDEX {index}"))
+        archived.append(name)
+    return archived
+
+
+async def compact_archived(db: AsyncSession, names: List[str]) -> None:
+    """
+    Reescribe las particiones archivadas sin espacio libre (`fillfactor` 100 y
+    `VACUUM FULL`). `VACUUM` no puede ir en una transacción: se ejecuta en
+    autocommit, así que debe llamarse después de confirmar el archivado.
+    """
+    await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+    for name in names:
+        await db.execute(text(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} SET (fillfactor = 100)"))
+        await db.execute(text(f"VACUUM (FULL, ANALYZE) {ARCHIVE_SCHEMA}.{name}"))
+
+
+async def maintain_partitions(
+    db: AsyncSession, months_ahead: int, retention_months: int = 0, today: Optional[date] = None
+) -> Dict[str, List[str]]:
+    """
+    Crea las particiones del mes actual y de los `months_ahead` siguientes y,
+    con `retention_months`, archiva y compacta las de meses más antiguos que esa
+    retención. Devuelve las particiones creadas y archivadas.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    created = await ensure_partitions(db, today, add_months(month_start(today), months_ahead))
+    archived = []
+    if retention_months > 0:
+        archived = await archive_partitions(db, add_months(month_start(today), -retention_months))
+    if archived:
+        # Los comentarios archivados desaparecen del feed completo (`include=comments`)
+        await db.execute(bump_feed_version())
+    await db.commit()
+    if archived:
+        await compact_archived(db, archived)
+    return {"created": created, "archived": archived}
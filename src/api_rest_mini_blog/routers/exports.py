@@ -0,0 +1,42 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_rest_mini_blog.database import get_read_db
+from api_rest_mini_blog.exporter import export_table
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"]
+)
+
+
+class ExportKind(str, Enum):
+    posts = "posts"
+    comments = "comments"
+
+
+@router.get(
+    "/{kind}",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {"schema": {"type": "string"}}}}},
+)
+async def export_records(
+    kind: ExportKind,
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Exporta todas las publicaciones o comentarios (o solo los creados desde `since`)
+    en NDJSON, en streaming y en orden cronológico. La salida puede volver a
+    cargarse con `POST /import/{kind}`.
+    """
+    return StreamingResponse(
+        export_table(db, kind.value, since=since),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{kind.value}.ndjson"'},
+    )
@@ -0,0 +1,41 @@
+from enum import Enum
+
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api_rest_mini_blog import schemas
+from api_rest_mini_blog.database import get_db, stick_to_primary
+from api_rest_mini_blog.importer import import_ndjson, iter_lines
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Import"]
+)
+
+
+class ImportKind(str, Enum):
+    users = "users"
+    posts = "posts"
+    comments = "comments"
+
+
+@router.post(
+    "/{kind}",
+    response_model=schemas.ImportReport,
+    dependencies=[Depends(stick_to_primary)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def import_records(kind: ImportKind, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Importa usuarios, publicaciones o comentarios en bloque desde un cuerpo NDJSON
+    (un objeto JSON por línea), leído en streaming.
+    Las publicaciones y comentarios aceptan un `created_at` opcional para conservar
+    las fechas originales; los comentarios requieren además `post_id`.
+    Devuelve cuántas filas se insertaron y los errores por número de línea.
+    """
+    return await import_ndjson(db, kind.value, iter_lines(request.stream()))
@@ -1,15 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional, Union
 
-from api_rest_mini_blog import models, schemas, services
-from api_rest_mini_blog.database import get_db
+from api_rest_mini_blog import models, schemas, search, services
+from api_rest_mini_blog.cache import cache_response, get_cached_response
+from api_rest_mini_blog.conditional import has_validators, make_etag, not_modified_response, validator_headers
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.database import get_db, get_read_db, stick_to_primary
+from api_rest_mini_blog.feed import render_page
+from api_rest_mini_blog.pagination import decode_rank_cursor, encode_cursor, encode_rank_cursor, parse_cursor, parse_ids
+from api_rest_mini_blog.serialization import dumps
+from api_rest_mini_blog.write_behind import QueueFull, comment_writer
 
 router = APIRouter(
     prefix="/posts",
     tags=["Posts"]
 )
 
+# Serializador de las respuestas que se guardan en caché
+post_summary_list_adapter = TypeAdapter(List[schemas.PostSummary])
+
+def _feed_etag(version: int, full: bool, skip: int, limit: int, cursor: Optional[str]) -> str:
+    """ETag de una página del feed: la versión del feed y los parámetros que identifican la página."""
+    return make_etag("feed", "full" if full else "summary", version, skip, limit, cursor or "")
+
 async def get_post_or_404(post_id: int, db: AsyncSession = Depends(get_db)) -> models.Post:
     """
     Dependencia que obtiene un post por su ID. Si no lo encuentra,
@@ -24,49 +40,262 @@ async def get_post_or_404(post_id: int, db: AsyncSession = Depends(get_db)) -> m
     return post
 
 
-@router.post("/", response_model=schemas.Post, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=schemas.Post,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(stick_to_primary)],
+)
 async def create_post(post: schemas.PostCreate, db: AsyncSession = Depends(get_db)):
     """
     Crea una nueva publicación. Requiere el id del autor.
+    La existencia del autor la valida la clave foránea dentro del propio INSERT.
     """
-    if not await services.user_exists(db, user_id=post.user_id):
+    try:
+        return await services.create_post(db=db, post=post)
+    except services.ForeignKeyViolation:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"User with id {post.user_id} not found. Cannot create post."
         )
-    
-    return await services.create_post(db=db, post=post)
 
-@router.get("/", response_model=List[schemas.Post])
-async def read_posts(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Union[List[schemas.PostSummary], List[schemas.Post]])
+async def read_posts(
+    request: Request,
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    include: Optional[str] = None,
+    ids: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
     """
     Obtiene las últimas N publicaciones.
+
+    Por defecto devuelve un resumen de cada publicación (extracto, autor,
+    número de comentarios y fecha del último). Con `include=comments` se
+    devuelve cada publicación completa con todos sus comentarios.
+
+    Admite paginación clásica con `skip`/`limit` y paginación por cursor:
+    si la página está completa, la cabecera `X-Next-Cursor` contiene el
+    cursor opaco que debe enviarse en `cursor` para pedir la siguiente.
+
+    La respuesta lleva un `ETag` débil; con `If-None-Match` se responde 304
+    sin volver a consultar ni serializar las publicaciones.
+
+    Las primeras páginas del resumen se sirven desde el feed materializado en
+    memoria, sin consultar la base de datos.
+
+    Con `ids=1,2,3` devuelve esas publicaciones completas (como `GET /posts/{post_id}`),
+    en ese orden y omitiendo las que no existen, con un número fijo de consultas.
+    """
+    if ids is not None:
+        return await services.get_posts_by_ids(db, parse_ids(ids, services.MULTI_GET_MAX_IDS))
+    after = parse_cursor(cursor)
+    includes = {part.strip() for part in include.split(",")} if include else set()
+    full = "comments" in includes
+    if not full:
+        page = await services.get_feed_page(db, skip=skip, limit=limit, after=after)
+        if page is not None:
+            version, entries = page
+            headers = validator_headers(_feed_etag(version, full, skip, limit, cursor))
+            not_modified = not_modified_response(request, headers)
+            if not_modified is not None:
+                return not_modified
+            if entries and len(entries) == limit:
+                headers["X-Next-Cursor"] = encode_cursor(*entries[-1].key)
+            return Response(render_page(entries), media_type="application/json", headers=headers)
+    key = f"feed:{'full' if full else 'summary'}:{skip}:{limit}:{cursor}"
+    cached = await get_cached_response(key)
+    if cached is not None:
+        not_modified = not_modified_response(request, cached.headers)
+        if not_modified is not None:
+            return not_modified
+        return cached
+
+    version = await services.get_feed_version(db)
+    headers = validator_headers(_feed_etag(version, full, skip, limit, cursor))
+    not_modified = not_modified_response(request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    if full:
+        # Filas SQL ya con la forma de `schemas.Post`: se serializan sin validarlas
+        posts = await services.get_post_rows(db, skip=skip, limit=limit, after=after)
+        body = dumps(posts)
+        positions = [(post["created_at"], post["id"]) for post in posts]
+    else:
+        posts = await services.get_post_summaries(db, skip=skip, limit=limit, after=after)
+        body = post_summary_list_adapter.dump_json(posts)
+        positions = [(post.created_at, post.id) for post in posts]
+    if positions and len(positions) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(*positions[-1])
+    tags = ["feed", *(f"post:{post_id}" for _, post_id in positions)]
+    return await cache_response(
+        key, body, tags=tags, headers=headers, from_replica=db.info.get("replica", False)
+    )
+
+@router.get("/trending", response_model=List[schemas.TrendingPost])
+async def read_trending_posts(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Obtiene las publicaciones en tendencia: las que más comentarios han
+    recibido últimamente, con un peso que se reduce a la mitad cada
+    `TRENDING_HALF_LIFE_HOURS`. `score` es ese número de comentarios ponderado.
     """
-    posts = await services.get_posts(db, skip=skip, limit=limit)
-    return posts
+    return await services.get_trending_posts(db, limit=limit)
+
+@router.get("/search", response_model=List[schemas.SearchHit])
+async def search_posts(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Busca en publicaciones y comentarios. Admite la sintaxis de buscador web
+    (`"frase exacta"`, `-excluir`, `or`) y devuelve los resultados ordenados por
+    relevancia con los términos resaltados en `headline`.
+    Si la página está completa, la cabecera `X-Next-Cursor` apunta a la siguiente.
+    """
+    after = parse_cursor(cursor, decode_rank_cursor)
+    hits = await search.search(db, q=q, limit=limit, after=after)
+    if len(hits) == limit:
+        last = hits[-1]
+        response.headers["X-Next-Cursor"] = encode_rank_cursor(
+            last.rank, last.kind, last.comment_id if last.kind == "comment" else last.post_id
+        )
+    return hits
 
 @router.get("/{post_id}", response_model=schemas.Post)
-async def read_post(post: models.Post = Depends(get_post_or_404)):
+async def read_post(post_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
     """
-    Obtiene una publicación específica junto con sus comentarios.
-    La lógica de buscar y validar si existe se maneja en la dependencia `get_post_or_404`.
+    Obtiene una publicación específica junto con la primera página de sus comentarios.
+    Si hay más comentarios, la cabecera `X-Comments-Next-Cursor` permite seguir
+    leyéndolos en `GET /posts/{post_id}/comments`.
+
+    La respuesta lleva `ETag` (versión del post) y `Last-Modified`; si los validadores
+    de la petición coinciden se responde 304 sin cargar los comentarios.
+    La respuesta se sirve desde la caché mientras nadie comente la publicación;
+    si no está en caché, `get_post_or_404` la busca y valida que exista.
     """
-    return post
+    key = f"post:{post_id}"
+    cached = await get_cached_response(key)
+    if cached is not None:
+        not_modified = not_modified_response(request, cached.headers)
+        if not_modified is not None:
+            return not_modified
+        return cached
+
+    if has_validators(request):
+        version = await services.get_post_version(db, post_id=post_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Post with id {post_id} not found"
+            )
+        headers = validator_headers(make_etag("post", post_id, version.version), version.updated_at)
+        not_modified = not_modified_response(request, headers)
+        if not_modified is not None:
+            return not_modified
+
+    post = await get_post_or_404(post_id, db)
+    headers = validator_headers(make_etag("post", post.id, post.version), post.updated_at)
+    if len(post.comments) == services.COMMENTS_PAGE_SIZE:
+        last = post.comments[-1]
+        headers["X-Comments-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    body = schemas.Post.model_validate(post).model_dump_json().encode()
+    return await cache_response(
+        key, body, tags=[key], headers=headers, from_replica=db.info.get("replica", False)
+    )
+
+@router.get("/{post_id}/comments", response_model=List[schemas.Comment])
+async def read_post_comments(
+    post_id: int,
+    response: Response,
+    limit: int = Query(services.COMMENTS_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Obtiene los comentarios de una publicación en orden cronológico, paginados por cursor.
+    Si la página está completa, la cabecera `X-Next-Cursor` apunta a la siguiente.
+    """
+    after = parse_cursor(cursor)
+    comments = await services.get_post_comments(db, post_id=post_id, limit=limit, after=after)
+    if not comments and not await services.post_exists(db, post_id=post_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Post with id {post_id} not found"
+        )
+    if len(comments) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(comments[-1].created_at, comments[-1].id)
+    return comments
 
-@router.post("/{post_id}/comments", response_model=schemas.Comment, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/{post_id}/comments",
+    response_model=schemas.Comment,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(stick_to_primary)],
+    responses={202: {"model": schemas.PendingComment, "description": "Comment queued (COMMENT_WRITE_BEHIND)"}},
+)
 async def create_comment_for_post(
+    post_id: int,
     comment: schemas.CommentCreate,
-    post: models.Post = Depends(get_post_or_404), 
     db: AsyncSession = Depends(get_db)
 ):
     """
     Añade un nuevo comentario a una publicación. Requiere el id del autor.
-    La validación de la existencia del post se delega a la dependencia.
+    La existencia del post y del autor la validan las claves foráneas dentro
+    del propio INSERT, sin consultas previas.
+
+    Con `COMMENT_WRITE_BEHIND` el comentario se encola y se responde 202 con un
+    ticket provisional; su estado se consulta (y se puede esperar) en
+    `GET /posts/{post_id}/comments/pending/{ticket}`. Si la cola está llena el
+    comentario se escribe en línea como de costumbre.
     """
-    if not await services.user_exists(db, user_id=comment.user_id):
+    if settings.COMMENT_WRITE_BEHIND:
+        try:
+            pending = comment_writer.enqueue(post_id, comment)
+        except QueueFull:
+            pass
+        else:
+            return JSONResponse(
+                status_code=status.HTTP_202_ACCEPTED,
+                content=pending.model_dump(mode="json"),
+                headers={"Location": f"/posts/{post_id}/comments/pending/{pending.id}"},
+            )
+    try:
+        return await services.create_comment(db=db, comment=comment, post_id=post_id)
+    except services.ForeignKeyViolation as exc:
+        if "post_id" in exc.constraint:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Post with id {post_id} not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"User with id {comment.user_id} not found. Cannot create comment."
         )
 
-    return await services.create_comment(db=db, comment=comment, post_id=post.id)
\ No newline at end of file
+@router.get("/{post_id}/comments/pending/{ticket}", response_model=schemas.PendingComment)
+async def read_pending_comment(
+    post_id: int,
+    ticket: str,
+    wait: float = Query(0.0, ge=0, le=30),
+):
+    """
+    Devuelve el estado de un comentario encolado (`pending`, `committed` o `failed`).
+    Con `wait` espera hasta esos segundos a que se confirme; una vez `committed`
+    el comentario ya es duradero y la respuesta incluye su representación final.
+    """
+    pending = await comment_writer.status(ticket, wait=wait)
+    if pending is None or pending.post_id != post_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Pending comment '{ticket}' not found"
+        )
+    return pending
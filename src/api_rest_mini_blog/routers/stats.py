@@ -0,0 +1,75 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from api_rest_mini_blog import existence
+from api_rest_mini_blog.admission import admission_stats
+from api_rest_mini_blog.cache import cache
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.database import pool_stats
+from api_rest_mini_blog.feed import feed
+from api_rest_mini_blog.metrics import render_metrics
+from api_rest_mini_blog.trending import trending
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["Stats"]
+)
+
+
+@router.get("/cache")
+async def read_cache_stats():
+    """
+    Devuelve los contadores de aciertos y fallos de la caché de respuestas.
+    """
+    return {"backend": settings.CACHE_BACKEND, **cache.stats.as_dict()}
+
+
+@router.get("/pool")
+async def read_pool_stats():
+    """
+    Devuelve el estado del pool de conexiones y el tiempo de espera acumulado
+    para obtener una conexión.
+    """
+    return pool_stats()
+
+
+@router.get("/admission")
+async def read_admission_stats():
+    """
+    Devuelve, por presupuesto (lecturas, escrituras) y por ruta limitada, las
+    peticiones en curso, las que esperan turno y el tiempo medio de servicio.
+    """
+    return admission_stats()
+
+
+@router.get("/existence")
+async def read_existence_stats():
+    """
+    Devuelve los aciertos (positivos y negativos) y fallos de la caché de
+    existencia de usuarios y publicaciones.
+    """
+    return {"users": existence.users.stats.as_dict(), "posts": existence.posts.stats.as_dict()}
+
+
+# `/metrics` va en la raíz, donde Prometheus lo busca por defecto
+metrics_router = APIRouter(tags=["Stats"])
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """
+    Expone en formato de texto de Prometheus la latencia y las sentencias SQL por
+    ruta, las peticiones en curso y el estado del pool y de la caché.
+    """
+    return PlainTextResponse(
+        render_metrics({
+            "db_pool": pool_stats(),
+            "response_cache": cache.stats.as_dict(),
+            "existence_users": existence.users.stats.as_dict(),
+            "existence_posts": existence.posts.stats.as_dict(),
+            "materialized_feed": feed.stats.as_dict(),
+            "trending": trending.stats.as_dict(),
+            **{f"admission_{name}": values for name, values in admission_stats().items() if name in ("read", "write")},
+        }),
+        media_type="text/plain; version=0.0.4",
+    )
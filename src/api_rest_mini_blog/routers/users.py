@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
 from api_rest_mini_blog import models, schemas, services
-from api_rest_mini_blog.database import get_db
+from api_rest_mini_blog.cache import cache_response, get_cached_response
+from api_rest_mini_blog.database import get_db, get_read_db, stick_to_primary
+from api_rest_mini_blog.exporter import export_user
+from api_rest_mini_blog.pagination import encode_cursor, parse_cursor, parse_ids
 
 router = APIRouter(
     prefix="/users",
@@ -24,26 +28,127 @@ async def get_user_or_404(user_id: int, db: AsyncSession = Depends(get_db)) -> m
     return user
 
 
-@router.post("/", response_model=schemas.UserInDB, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=schemas.UserInDB,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(stick_to_primary)],
+)
 async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Crea un nuevo usuario.
-    Verifica que tanto el email como el username no estén ya en uso.
+    Verifica que tanto el email como el username no estén ya en uso; la comprobación
+    la hace la restricción única de la base de datos dentro del propio INSERT.
+    """
+    try:
+        return await services.create_user(db=db, user=user)
+    except services.UniqueViolation as exc:
+        if "username" in exc.constraint:
+            detail = f"Username '{user.username}' is already registered."
+        else:
+            detail = f"Email '{user.email}' is already registered."
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+@router.get("/", response_model=List[schemas.UserInDB])
+async def read_users(ids: str, db: AsyncSession = Depends(get_read_db)):
+    """
+    Obtiene varios usuarios a la vez con `ids=1,2,3`, en ese orden y omitiendo
+    los que no existen, con una sola consulta.
+    """
+    user_ids = parse_ids(ids, services.MULTI_GET_MAX_IDS)
+    users = await services.user_loader(db).load_many(user_ids)
+    return [user for user in users.values() if user is not None]
+
+
+@router.get("/{user_id}", response_model=schemas.UserProfile)
+async def read_user(user_id: int, db: AsyncSession = Depends(get_read_db)):
     """
-    db_user = await services.get_user_by_email(db, email=user.email)
-    if db_user:
+    Obtiene el perfil de un usuario específico por su ID: totales de publicaciones
+    y comentarios junto con los más recientes. El historial completo se pagina en
+    `GET /users/{user_id}/posts` y `GET /users/{user_id}/comments`.
+    La respuesta se sirve desde la caché hasta que el usuario publique o comente,
+    o alguien comente una de sus publicaciones recientes; si no está en caché,
+    `get_user_or_404` lo busca y valida que exista.
+    """
+    key = f"user:{user_id}"
+    cached = await get_cached_response(key)
+    if cached is not None:
+        return cached
+
+    user = await get_user_or_404(user_id, db)
+    profile = await services.get_user_profile(db, user=user)
+    tags = [key, *(f"post:{post.id}" for post in profile.recent_posts)]
+    return await cache_response(
+        key, profile.model_dump_json().encode(), tags=tags, from_replica=db.info.get("replica", False)
+    )
+
+
+@router.get("/{user_id}/posts", response_model=List[schemas.PostSummary])
+async def read_user_posts(
+    user_id: int,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Obtiene las publicaciones de un usuario, de la más reciente a la más antigua,
+    paginadas por cursor (cabecera `X-Next-Cursor`).
+    """
+    after = parse_cursor(cursor)
+    posts = await services.get_post_summaries(db, limit=limit, after=after, user_id=user_id)
+    if not posts and not await services.user_exists(db, user_id=user_id):
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Email '{user.email}' is already registered."
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
+    if len(posts) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(posts[-1].created_at, posts[-1].id)
+    return posts
+
+
+@router.get("/{user_id}/comments", response_model=List[schemas.Comment])
+async def read_user_comments(
+    user_id: int,
+    response: Response,
+    limit: int = Query(services.COMMENTS_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Obtiene los comentarios de un usuario, del más reciente al más antiguo,
+    paginados por cursor (cabecera `X-Next-Cursor`).
+    """
+    after = parse_cursor(cursor)
+    comments = await services.get_user_comments(db, user_id=user_id, limit=limit, after=after)
+    if not comments and not await services.user_exists(db, user_id=user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
         )
-    
-    return await services.create_user(db=db, user=user)
+    if len(comments) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(comments[-1].created_at, comments[-1].id)
+    return comments
 
 
-@router.get("/{user_id}", response_model=schemas.User)
-async def read_user(user: models.User = Depends(get_user_or_404)):
+@router.get(
+    "/{user_id}/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {"schema": {"type": "string"}}}}},
+)
+async def export_user_data(user_id: int, db: AsyncSession = Depends(get_read_db)):
     """
-    Obtiene los detalles de un usuario específico por su ID.
-    La lógica de buscar y validar si el usuario existe se delega a la dependencia.
+    Exporta en streaming todos los datos de un usuario en NDJSON: el usuario,
+    sus publicaciones y sus comentarios, una línea por registro con su `type`.
     """
-    return user
\ No newline at end of file
+    if not await services.user_exists(db, user_id=user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
+    return StreamingResponse(
+        export_user(db, user_id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="user-{user_id}.ndjson"'},
+    )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, ConfigDict
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 class UserBase(BaseModel):
     username: str
@@ -22,6 +22,22 @@ class PostBase(BaseModel):
 class PostCreate(PostBase):
     user_id: int 
 
+class PostImport(PostCreate):
+    created_at: Optional[datetime] = None
+
+class CommentImport(CommentCreate):
+    post_id: int
+    created_at: Optional[datetime] = None
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: List[ImportRowError] = []
+
 class UserInDB(UserBase):
     id: int
     
@@ -29,11 +45,43 @@ class UserInDB(UserBase):
 
 class Comment(CommentBase):
     id: int
+    post_id: int
     created_at: datetime
     author: UserInDB
 
     model_config = ConfigDict(from_attributes=True)
 
+class PendingComment(BaseModel):
+    id: str
+    post_id: int
+    status: Literal["pending", "committed", "failed"]
+    comment: Optional[Comment] = None
+    error: Optional[str] = None
+
+class PostSummary(BaseModel):
+    id: int
+    title: str
+    excerpt: str
+    created_at: datetime
+    author: UserInDB
+    comment_count: int = 0
+    last_comment_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TrendingPost(PostSummary):
+    # Comentarios recientes equivalentes: cada comentario cuenta la mitad por cada vida media transcurrida
+    score: float
+
+class SearchHit(BaseModel):
+    kind: Literal["post", "comment"]
+    post_id: int
+    comment_id: Optional[int] = None
+    title: str
+    headline: str
+    rank: float
+    created_at: datetime
+
 class Post(PostBase):
     id: int
     created_at: datetime
@@ -47,4 +95,11 @@ class User(UserBase):
     posts: List[Post] = []
     comments: List[Comment] = []
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class UserProfile(UserBase):
+    id: int
+    post_count: int = 0
+    comment_count: int = 0
+    recent_posts: List[PostSummary] = []
+    recent_comments: List[Comment] = []
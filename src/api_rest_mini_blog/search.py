@@ -0,0 +1,167 @@
+import html
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, literal, literal_column, or_, tuple_, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from api_rest_mini_blog import models, schemas
+
+# Configuración de texto de Postgres: sin stemming ni stopwords, válida para
+# contenido en cualquier idioma. Debe coincidir con la de la migración.
+SEARCH_CONFIG = "simple"
+
+# Marcadores que Postgres inserta alrededor de los términos encontrados; son
+# caracteres de control para poder escapar el HTML antes de cambiarlos por <mark>
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=35, MinWords=15, MaxFragments=2"
+
+# Caracteres de contexto alrededor de la primera coincidencia en la búsqueda sin Postgres
+FALLBACK_HEADLINE_CONTEXT = 80
+
+posts_search_vector = literal_column("posts.search_vector", TSVECTOR)
+comments_search_vector = literal_column("comments.search_vector", TSVECTOR)
+
+
+def _highlight(headline: str) -> str:
+    escaped = html.escape(headline)
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_STOP, "</mark>")
+
+
+def _to_hit(row, headline: str) -> schemas.SearchHit:
+    return schemas.SearchHit(
+        kind=row.kind,
+        post_id=row.post_id,
+        comment_id=row.id if row.kind == "comment" else None,
+        title=row.title,
+        headline=headline,
+        rank=row.rank,
+        created_at=row.created_at,
+    )
+
+
+def _paginate(hits, limit: int, after: Optional[Tuple[float, str, int]]):
+    """
+    Ordena los resultados por relevancia con un desempate estable `(kind, id)`
+    y aplica el cursor `(rank, kind, id)` del último resultado de la página anterior.
+    """
+    query = select(hits).order_by(hits.c.rank.desc(), hits.c.kind.desc(), hits.c.id.desc()).limit(limit)
+    if after is not None:
+        query = query.where(tuple_(hits.c.rank, hits.c.kind, hits.c.id) < tuple_(*after))
+    return query
+
+
+async def _search_postgres(
+    db: AsyncSession, q: str, limit: int, after: Optional[Tuple[float, str, int]]
+) -> List[schemas.SearchHit]:
+    """
+    Búsqueda sobre las columnas `search_vector` con sus índices GIN. El índice
+    resuelve qué filas coinciden sin recorrer las tablas, y `ts_headline`, que
+    es lo más costoso, solo se calcula para la página que se devuelve.
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    post_hits = select(
+        literal("post").label("kind"),
+        models.Post.id.label("id"),
+        models.Post.id.label("post_id"),
+        models.Post.title.label("title"),
+        models.Post.created_at.label("created_at"),
+        func.ts_rank_cd(posts_search_vector, query).label("rank"),
+    ).where(posts_search_vector.op("@@")(query))
+    comment_hits = (
+        select(
+            literal("comment").label("kind"),
+            models.Comment.id.label("id"),
+            models.Comment.post_id.label("post_id"),
+            models.Post.title.label("title"),
+            models.Comment.created_at.label("created_at"),
+            func.ts_rank_cd(comments_search_vector, query).label("rank"),
+        )
+        .join(models.Post, models.Post.id == models.Comment.post_id)
+        .where(comments_search_vector.op("@@")(query))
+    )
+    page = _paginate(union_all(post_hits, comment_hits).subquery("hits"), limit, after).subquery("page")
+
+    # El texto de cada resultado se recupera por clave primaria solo para la página
+    document = func.coalesce(models.Comment.text, models.Post.content)
+    result = await db.execute(
+        select(page, func.ts_headline(SEARCH_CONFIG, document, query, HEADLINE_OPTIONS).label("headline"))
+        .outerjoin(models.Post, and_(page.c.kind == "post", models.Post.id == page.c.id))
+        .outerjoin(models.Comment, and_(page.c.kind == "comment", models.Comment.id == page.c.id))
+        .order_by(page.c.rank.desc(), page.c.kind.desc(), page.c.id.desc())
+    )
+    return [_to_hit(row, _highlight(row.headline)) for row in result]
+
+
+def _fallback_headline(document: str, terms: List[str]) -> str:
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    match = pattern.search(document)
+    start = max(match.start() - FALLBACK_HEADLINE_CONTEXT, 0) if match else 0
+    snippet = document[start:start + 2 * FALLBACK_HEADLINE_CONTEXT]
+    return _highlight(pattern.sub(lambda found: f"{HIGHLIGHT_START}{found.group(0)}{HIGHLIGHT_STOP}", snippet))
+
+
+async def _search_fallback(
+    db: AsyncSession, q: str, limit: int, after: Optional[Tuple[float, str, int]]
+) -> List[schemas.SearchHit]:
+    """
+    Búsqueda aproximada para motores sin `tsvector` (SQLite en los tests):
+    exige que aparezcan todos los términos y puntúa más las coincidencias en el título.
+    """
+    terms = [term.strip('"') for term in q.split() if term.strip('"')]
+    if not terms:
+        return []
+
+    def score(column, weight: float):
+        return sum(case((column.icontains(term, autoescape=True), weight), else_=0.0) for term in terms)
+
+    def matches(*columns):
+        return and_(*(or_(*(column.icontains(term, autoescape=True) for column in columns)) for term in terms))
+
+    post_hits = select(
+        literal("post").label("kind"),
+        models.Post.id.label("id"),
+        models.Post.id.label("post_id"),
+        models.Post.title.label("title"),
+        models.Post.created_at.label("created_at"),
+        (score(models.Post.title, 1.0) + score(models.Post.content, 0.4)).label("rank"),
+        models.Post.content.label("document"),
+    ).where(matches(models.Post.title, models.Post.content))
+    comment_hits = (
+        select(
+            literal("comment").label("kind"),
+            models.Comment.id.label("id"),
+            models.Comment.post_id.label("post_id"),
+            models.Post.title.label("title"),
+            models.Comment.created_at.label("created_at"),
+            score(models.Comment.text, 0.4).label("rank"),
+            models.Comment.text.label("document"),
+        )
+        .join(models.Post, models.Post.id == models.Comment.post_id)
+        .where(matches(models.Comment.text))
+    )
+    result = await db.execute(_paginate(union_all(post_hits, comment_hits).subquery("hits"), limit, after))
+    return [_to_hit(row, _fallback_headline(row.document, terms)) for row in result]
+
+
+async def search(
+    db: AsyncSession,
+    q: str,
+    limit: int = 10,
+    after: Optional[Tuple[float, str, int]] = None,
+) -> List[schemas.SearchHit]:
+    """
+    Busca `q` en el título y contenido de las publicaciones y en el texto de los
+    comentarios. Devuelve los resultados ordenados por relevancia, con los
+    términos encontrados resaltados con `<mark>` en `headline`.
+
+    `after` es la posición `(rank, kind, id)` del último resultado de la página
+    anterior. En Postgres se usan los índices GIN; en otros motores, una búsqueda
+    por subcadenas equivalente pensada para los tests.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return await _search_postgres(db, q, limit, after)
+    return await _search_fallback(db, q, limit, after)
@@ -0,0 +1,71 @@
+from typing import Any, Callable
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+from api_rest_mini_blog.config import settings
+
+
+def build_dumps() -> Callable[[Any], bytes]:
+    """
+    Construye el serializador JSON configurado en `settings.JSON_SERIALIZER`.
+    Ambos convierten diccionarios, listas y fechas directamente a bytes, sin
+    validar contra los esquemas, y producen la misma salida que Pydantic.
+    El serializador `orjson` requiere instalar el extra opcional `orjson`.
+    """
+    if settings.JSON_SERIALIZER == "pydantic":
+        return pydantic_core.to_json
+    if settings.JSON_SERIALIZER == "orjson":
+        import orjson
+
+        # Z en lugar de +00:00, como hace Pydantic con las fechas en UTC
+        options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        return lambda value: orjson.dumps(value, option=options)
+    raise ValueError(f"Unknown JSON serializer '{settings.JSON_SERIALIZER}'")
+
+
+dumps = build_dumps()
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON que se serializa con `dumps` en lugar de `json.dumps`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# --- Serializadores de filas SQL con la forma de los esquemas de respuesta ---
+def user_row(id: int, username: str, email: str) -> dict:
+    """Diccionario con la forma de `schemas.UserInDB`."""
+    return {"username": username, "email": email, "id": id}
+
+
+def comment_row(row) -> dict:
+    """
+    Diccionario con la forma de `schemas.Comment` a partir de una fila con las
+    columnas del comentario y `author_username`/`author_email`.
+    """
+    return {
+        "text": row.text,
+        "id": row.id,
+        "post_id": row.post_id,
+        "created_at": row.created_at,
+        "author": user_row(row.user_id, row.author_username, row.author_email),
+    }
+
+
+def post_row(row, comments: list) -> dict:
+    """
+    Diccionario con la forma de `schemas.Post` a partir de una fila con las
+    columnas de la publicación y `author_username`/`author_email`.
+    """
+    return {
+        "title": row.title,
+        "content": row.content,
+        "id": row.id,
+        "created_at": row.created_at,
+        "author": user_row(row.user_id, row.author_username, row.author_email),
+        "comments": comments,
+    }
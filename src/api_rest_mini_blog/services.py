@@ -1,77 +1,770 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, true, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from api_rest_mini_blog import models, schemas
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from api_rest_mini_blog import existence, models, schemas
+from api_rest_mini_blog.cache import cache
+from api_rest_mini_blog.feed import bump_feed_version, feed
+from api_rest_mini_blog.serialization import comment_row, post_row
+from api_rest_mini_blog.trending import trending
+
+# Longitud del extracto de contenido que se devuelve en el feed
+EXCERPT_LENGTH = 200
+
+# Comentarios que se incluyen al leer una publicación individual
+COMMENTS_PAGE_SIZE = 20
+
+# Publicaciones y comentarios recientes que se incluyen en el perfil de un usuario
+RECENT_ITEMS_LIMIT = 5
+
+# IDs que se pueden pedir a la vez en `GET /users?ids=` y `GET /posts?ids=`
+MULTI_GET_MAX_IDS = 100
+
+# Claves de `AsyncSession.info` bajo las que se guardan los cargadores de la petición
+USER_LOADER_KEY = "user_loader"
+POST_LOADER_KEY = "post_loader"
+
+# SQLSTATE de PostgreSQL para las restricciones que se traducen a errores de la API
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+class ConstraintViolation(Exception):
+    """
+    Una escritura violó una restricción de la base de datos; `constraint` es el
+    nombre de la restricción (p. ej. `ix_users_email`, `comments_post_id_fkey`).
+    """
+
+    def __init__(self, constraint: Optional[str]):
+        super().__init__(constraint)
+        self.constraint = constraint or ""
+
+
+class UniqueViolation(ConstraintViolation):
+    pass
+
+
+class ForeignKeyViolation(ConstraintViolation):
+    pass
+
+
+def _constraint_violation(exc: IntegrityError) -> Exception:
+    """
+    Traduce un `IntegrityError` del driver (asyncpg o psycopg2) a una
+    `ConstraintViolation`; cualquier otra violación se devuelve sin cambios.
+    """
+    cause = exc.orig.__cause__ or exc.orig
+    sqlstate = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    constraint = getattr(cause, "constraint_name", None)
+    if constraint is None and getattr(cause, "diag", None) is not None:
+        constraint = cause.diag.constraint_name
+    if sqlstate == UNIQUE_VIOLATION:
+        return UniqueViolation(constraint)
+    if sqlstate == FOREIGN_KEY_VIOLATION:
+        return ForeignKeyViolation(constraint)
+    return exc
+
+
+async def _execute_write(db: AsyncSession, statement):
+    """
+    Ejecuta una escritura de una única sentencia y devuelve su fila `RETURNING`.
+
+    Si la sesión no tiene una transacción abierta, la sentencia se ejecuta en
+    modo autocommit: es atómica por sí sola y se evitan el BEGIN y el COMMIT,
+    de modo que la escritura cuesta un único viaje a la base de datos.
+    Las violaciones de restricciones se lanzan como `ConstraintViolation`.
+    """
+    # Lo que los cargadores de la petición hayan leído (o no encontrado) puede cambiar
+    db.info.pop(USER_LOADER_KEY, None)
+    db.info.pop(POST_LOADER_KEY, None)
+    autocommit = not db.in_transaction()
+    if autocommit:
+        await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+    try:
+        row = (await db.execute(statement)).one()
+        if not autocommit:
+            await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise _constraint_violation(exc) from exc
+    return row
+
+def _remember(cache: existence.ExistenceCache, item_id: int, found: bool) -> None:
+    if found:
+        cache.add(item_id)
+    else:
+        cache.add_missing(item_id)
+
+
+class BatchLoader:
+    """
+    Cargador por lotes al estilo DataLoader, ligado a una petición.
+
+    Las claves pedidas con `load` en la misma vuelta del bucle de eventos se
+    resuelven juntas con una única llamada a `batch_load` (p. ej. un
+    `WHERE id IN (...)`). Cada clave se carga una sola vez: las peticiones
+    repetidas, incluso mientras la carga está en curso, comparten el mismo
+    resultado. Los lotes se ejecutan de uno en uno porque comparten sesión.
+    Si la tarea de un lote se cancela, se cancelan también los futuros de sus
+    claves para que nadie se quede esperándolos.
+    """
+
+    def __init__(self, batch_load: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]):
+        self.batch_load = batch_load
+        self.batches = 0
+        self._results: Dict[Hashable, asyncio.Future] = {}
+        self._pending: List[Hashable] = []
+        self._lock = asyncio.Lock()
+        # Referencias a los lotes en curso: el bucle de eventos solo guarda referencias débiles a las tareas
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> "asyncio.Future":
+        """Devuelve un futuro con el valor de `key`, o `None` si no existe."""
+        result = self._results.get(key)
+        if result is None:
+            loop = asyncio.get_running_loop()
+            result = self._results[key] = loop.create_future()
+            if not self._pending:
+                loop.call_soon(self._schedule)
+            self._pending.append(key)
+        return result
+
+    async def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        keys = list(dict.fromkeys(keys))
+        values = await asyncio.gather(*(self.load(key) for key in keys))
+        return dict(zip(keys, values))
+
+    def _schedule(self) -> None:
+        keys, self._pending = self._pending, []
+        futures = [self._results[key] for key in keys]
+        task = asyncio.ensure_future(self._dispatch(keys))
+        self._tasks.add(task)
+        task.add_done_callback(lambda task: self._finish(task, keys, futures))
+
+    def _finish(self, task: asyncio.Task, keys: List[Hashable], futures: List[asyncio.Future]) -> None:
+        self._tasks.discard(task)
+        for key, future in zip(keys, futures):
+            if not future.done():
+                future.cancel()
+                if self._results.get(key) is future:
+                    del self._results[key]
+
+    async def _dispatch(self, keys: List[Hashable]) -> None:
+        async with self._lock:
+            self.batches += 1
+            try:
+                found = await self.batch_load(keys)
+            except Exception as exc:
+                for key in keys:
+                    # Un fallo no se recuerda: la siguiente petición vuelve a intentarlo
+                    self._results.pop(key).set_exception(exc)
+                return
+        for key in keys:
+            self._results[key].set_result(found.get(key))
+
+
+def user_loader(db: AsyncSession) -> BatchLoader:
+    """Cargador de `schemas.UserInDB` por ID de la petición a la que pertenece `db`."""
+    loader = db.info.get(USER_LOADER_KEY)
+    if loader is None:
+        loader = db.info[USER_LOADER_KEY] = BatchLoader(lambda ids: get_users_by_ids(db, ids))
+    return loader
+
+def post_loader(db: AsyncSession) -> BatchLoader:
+    """Cargador de filas de publicaciones (sin comentarios) por ID de la petición a la que pertenece `db`."""
+    loader = db.info.get(POST_LOADER_KEY)
+    if loader is None:
+        loader = db.info[POST_LOADER_KEY] = BatchLoader(lambda ids: get_post_rows_by_ids(db, ids))
+    return loader
 
 # --- User Services ---
 async def user_exists(db: AsyncSession, user_id: int) -> bool:
+    """
+    Comprueba si existe un usuario, consultando primero la caché de existencia.
+    """
+    cached = existence.users.lookup(user_id)
+    if cached is not None:
+        return cached
     result = await db.execute(select(models.User.id).where(models.User.id == user_id))
-    return result.scalar_one_or_none() is not None
+    found = result.scalar_one_or_none() is not None
+    _remember(existence.users, user_id, found)
+    return found
 
 async def get_user(db: AsyncSession, user_id: int):
-    query = (
+    """
+    Obtiene un usuario por su ID. Los IDs que se sabe que no existen se
+    responden sin consultar la base de datos.
+    """
+    if existence.users.lookup(user_id) is False:
+        return None
+    result = await db.execute(
         select(models.User)
         .where(models.User.id == user_id)
-        .options(
-            selectinload(models.User.posts).selectinload(models.Post.author),
-            selectinload(models.User.posts).selectinload(models.Post.comments).selectinload(models.Comment.author),
-            selectinload(models.User.comments).selectinload(models.Comment.author)
-        )
+        .execution_options(populate_existing=True)
+    )
+    user = result.scalar_one_or_none()
+    _remember(existence.users, user_id, user is not None)
+    return user
+
+async def get_users_by_ids(db: AsyncSession, ids: List[int]) -> Dict[int, schemas.UserInDB]:
+    """
+    Obtiene varios usuarios con una sola consulta `WHERE id IN (...)`.
+    Los IDs que no existen no aparecen en el resultado.
+    """
+    result = await db.execute(
+        select(models.User.id, models.User.username, models.User.email).where(models.User.id.in_(ids))
+    )
+    users = {row.id: schemas.UserInDB(id=row.id, username=row.username, email=row.email) for row in result}
+    for user_id in ids:
+        _remember(existence.users, user_id, user_id in users)
+    return users
+
+async def get_user_profile(
+    db: AsyncSession, user: models.User, recent_limit: int = RECENT_ITEMS_LIMIT
+) -> schemas.UserProfile:
+    """
+    Construye el perfil acotado de un usuario: totales de publicaciones y
+    comentarios (leídos de los contadores de `users`) más sus `recent_limit`
+    publicaciones y comentarios más recientes.
+    El coste depende del tamaño de la página, no del historial del usuario.
+    """
+    recent_posts = await get_post_summaries(db, limit=recent_limit, user_id=user.id)
+    recent_comments = await get_user_comments(db, user_id=user.id, limit=recent_limit)
+    return schemas.UserProfile(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        post_count=user.post_count,
+        comment_count=user.comment_count,
+        recent_posts=recent_posts,
+        recent_comments=[schemas.Comment.model_validate(comment) for comment in recent_comments],
     )
-    result = await db.execute(query)
-    return result.scalars().first()
 
 async def get_user_by_email(db: AsyncSession, email: str):
     result = await db.execute(select(models.User).filter(models.User.email == email))
     return result.scalar_one_or_none()
 
-async def create_user(db: AsyncSession, user: schemas.UserCreate):
-    db_user = models.User(username=user.username, email=user.email)
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
-    return db_user
+async def create_user(db: AsyncSession, user: schemas.UserCreate) -> schemas.UserInDB:
+    """
+    Crea un usuario con un único `INSERT ... RETURNING`. Si el email o el
+    username ya existen lanza `UniqueViolation`; la restricción única de la base
+    de datos evita la carrera entre comprobar e insertar.
+    """
+    row = await _execute_write(
+        db,
+        insert(models.User)
+        .values(username=user.username, email=user.email)
+        .returning(models.User.id, models.User.username, models.User.email),
+    )
+    existence.users.add(row.id)
+    return schemas.UserInDB(id=row.id, username=row.username, email=row.email)
 
 # --- Post Services ---
-async def create_post(db: AsyncSession, post: schemas.PostCreate):
-    db_post = models.Post(**post.model_dump())
-    db.add(db_post)
-    await db.commit()
-    await db.refresh(db_post, attribute_names=['author'])
-    return await get_post(db, post_id=db_post.id)
+async def create_post(db: AsyncSession, post: schemas.PostCreate) -> schemas.Post:
+    """
+    Crea una publicación y devuelve su representación completa con una sola
+    sentencia: un `INSERT ... RETURNING` dentro de un CTE, la actualización del
+    contador `post_count` del autor, que devuelve también su username y email,
+    y el incremento de la versión del feed.
+    Si el autor no existe lanza `ForeignKeyViolation`.
+    """
+    inserted = (
+        insert(models.Post)
+        .values(**post.model_dump())
+        .returning(
+            models.Post.id,
+            models.Post.title,
+            models.Post.content,
+            models.Post.created_at,
+            models.Post.user_id,
+        )
+        .cte("inserted_post")
+    )
+    author = (
+        update(models.User)
+        .where(models.User.id == inserted.c.user_id)
+        .values(post_count=models.User.post_count + 1)
+        .returning(models.User.id, models.User.username, models.User.email)
+        .cte("author")
+    )
+    bumped_feed = bump_feed_version().cte("bumped_feed")
+    row = await _execute_write(
+        db,
+        select(inserted, author.c.username, author.c.email, bumped_feed.c.version.label("feed_version"))
+        .join(author, author.c.id == inserted.c.user_id)
+        .join(bumped_feed, true()),
+    )
+    existence.posts.add(row.id)
+    existence.users.add(row.user_id)
+    author = schemas.UserInDB(id=row.user_id, username=row.username, email=row.email)
+    if feed.advance(row.feed_version):
+        feed.add_post(schemas.PostSummary(
+            id=row.id,
+            title=row.title,
+            excerpt=row.content[:EXCERPT_LENGTH],
+            created_at=row.created_at,
+            author=author,
+            comment_count=0,
+            last_comment_at=None,
+        ))
+    await cache.invalidate_tags("feed", f"user:{row.user_id}")
+    return schemas.Post(
+        id=row.id,
+        title=row.title,
+        content=row.content,
+        created_at=row.created_at,
+        author=author,
+        comments=[],
+    )
 
-async def get_posts(db: AsyncSession, skip: int = 0, limit: int = 10):
+async def get_posts(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
+):
     """
     Obtiene una lista de las últimas N publicaciones.
+
+    Si se indica `after` (la posición `(created_at, id)` del último post de la
+    página anterior) se pagina por cursor y `skip` se ignora; así Postgres
+    recorre el índice `ix_posts_created_at_id` sin descartar filas previas.
     """
-    result = await db.execute(
+    query = (
         select(models.Post)
         .options(
             selectinload(models.Post.author),
             selectinload(models.Post.comments).selectinload(models.Comment.author)
         )
-        .order_by(models.Post.created_at.desc())
-        .offset(skip)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
         .limit(limit)
     )
+    if after is not None:
+        query = query.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query)
     return result.scalars().all()
 
-async def get_post(db: AsyncSession, post_id: int):
+async def get_post_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
+) -> list[dict]:
+    """
+    Equivalente a `get_posts` que devuelve diccionarios con la forma de
+    `schemas.Post`, listos para serializar sin hidratar objetos ORM ni validarlos
+    con Pydantic. Usa dos consultas: la página de publicaciones con su autor y
+    los comentarios de esas publicaciones con sus autores.
+    """
+    query = (
+        select(
+            models.Post.id,
+            models.Post.title,
+            models.Post.content,
+            models.Post.created_at,
+            models.Post.user_id,
+            models.User.username.label("author_username"),
+            models.User.email.label("author_email"),
+        )
+        .join(models.User, models.User.id == models.Post.user_id)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+    posts = (await db.execute(query)).all()
+    if not posts:
+        return []
+
+    comments: dict[int, list] = {post.id: [] for post in posts}
+    result = await db.execute(
+        select(
+            models.Comment.id,
+            models.Comment.text,
+            models.Comment.created_at,
+            models.Comment.user_id,
+            models.Comment.post_id,
+            models.User.username.label("author_username"),
+            models.User.email.label("author_email"),
+        )
+        .join(models.User, models.User.id == models.Comment.user_id)
+        .where(models.Comment.post_id.in_(comments))
+        .order_by(models.Comment.post_id, models.Comment.created_at, models.Comment.id)
+    )
+    for row in result:
+        comments[row.post_id].append(comment_row(row))
+    return [post_row(post, comments[post.id]) for post in posts]
+
+async def get_post_summaries(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
+    user_id: Optional[int] = None,
+    ids: Optional[List[int]] = None,
+) -> list[schemas.PostSummary]:
+    """
+    Obtiene el feed en su forma resumida con una única consulta:
+    título, extracto, autor, número de comentarios y fecha del último comentario,
+    leídos de los contadores de `posts` sin tocar la tabla de comentarios.
+    Con `user_id` se limita a las publicaciones de ese usuario y con `ids` a
+    esas publicaciones.
+    """
+    query = (
+        select(
+            models.Post.id,
+            models.Post.title,
+            func.substr(models.Post.content, 1, EXCERPT_LENGTH).label("excerpt"),
+            models.Post.created_at,
+            models.User.id.label("author_id"),
+            models.User.username.label("author_username"),
+            models.User.email.label("author_email"),
+            models.Post.comment_count,
+            models.Post.last_comment_at,
+        )
+        .join(models.User, models.User.id == models.Post.user_id)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+        .limit(limit)
+    )
+    if user_id is not None:
+        query = query.where(models.Post.user_id == user_id)
+    if ids is not None:
+        query = query.where(models.Post.id.in_(ids))
+    if after is not None:
+        query = query.where(tuple_(models.Post.created_at, models.Post.id) < tuple_(*after))
+    else:
+        query = query.offset(skip)
+    result = await db.execute(query)
+    return [
+        schemas.PostSummary(
+            id=row.id,
+            title=row.title,
+            excerpt=row.excerpt,
+            created_at=row.created_at,
+            author=schemas.UserInDB(id=row.author_id, username=row.author_username, email=row.author_email),
+            comment_count=row.comment_count,
+            last_comment_at=row.last_comment_at,
+        )
+        for row in result
+    ]
+
+async def get_post_version(db: AsyncSession, post_id: int):
+    """
+    Obtiene solo la versión y la fecha de última modificación de una publicación,
+    para validar peticiones condicionales sin cargar sus comentarios.
+    """
+    if existence.posts.lookup(post_id) is False:
+        return None
+    result = await db.execute(
+        select(models.Post.version, models.Post.updated_at).where(models.Post.id == post_id)
+    )
+    version = result.one_or_none()
+    _remember(existence.posts, post_id, version is not None)
+    return version
+
+async def get_feed_version(db: AsyncSession) -> int:
+    """
+    Devuelve la versión del feed. Cada escritura que lo cambia la incrementa en
+    su misma sentencia, así que crece en el orden en que se confirman (a
+    diferencia de los IDs, que se reservan antes del commit) y se lee de una
+    tabla de una sola fila.
+    """
+    result = await db.execute(select(models.FeedVersion.version))
+    return result.scalar_one()
+
+async def load_feed(db: AsyncSession) -> None:
+    """
+    Reconstruye el feed materializado con los resúmenes más recientes. La versión
+    se lee antes que las filas: si entre medias llega una escritura, la siguiente
+    comprobación de versión vuelve a reconstruirlo.
+    """
+    version = await get_feed_version(db)
+    feed.load(version, await get_post_summaries(db, limit=feed.size))
+
+async def get_feed_page(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    """
+    Sirve una página del feed resumido desde el feed materializado. Solo consulta
+    la base de datos para reconstruirlo o, cada `FEED_MAX_AGE_SECONDS`, para
+    comprobar si otro proceso ha escrito. Devuelve la versión del feed y las
+    entradas de la página, o `None` si el feed está desactivado o la página no
+    cabe en él.
+    """
+    if not feed.enabled:
+        return None
+    if not feed.ready:
+        await load_feed(db)
+    elif feed.needs_check():
+        if await get_feed_version(db) != feed.version:
+            await load_feed(db)
+        else:
+            feed.mark_checked()
+    entries = feed.page(skip, limit, after)
+    return None if entries is None else (feed.version, entries)
+
+async def get_trending_posts(db: AsyncSession, limit: int = 10) -> List[schemas.TrendingPost]:
+    """
+    Devuelve las publicaciones con mayor puntuación de tendencia. Las
+    puntuaciones están en memoria (ver `trending.py`), así que solo se leen los
+    resúmenes de esas `limit` publicaciones por clave primaria, sin tocar la
+    tabla de comentarios. Si el proceso aún no ha cargado el snapshot, lo lee.
+    """
+    if not trending.enabled:
+        return []
+    if not trending.loaded:
+        await trending.load_snapshot(db)
+    top = trending.top(limit)
+    if not top:
+        return []
+    summaries = {
+        summary.id: summary
+        for summary in await get_post_summaries(db, limit=len(top), ids=[post_id for post_id, _ in top])
+    }
+    now = datetime.now(timezone.utc)
+    return [
+        schemas.TrendingPost(**summaries[post_id].model_dump(), score=trending.current(score, now))
+        for post_id, score in top
+        if post_id in summaries
+    ]
+
+async def post_exists(db: AsyncSession, post_id: int) -> bool:
+    """
+    Comprueba si existe una publicación, consultando primero la caché de existencia.
+    """
+    cached = existence.posts.lookup(post_id)
+    if cached is not None:
+        return cached
+    result = await db.execute(select(models.Post.id).where(models.Post.id == post_id))
+    found = result.scalar_one_or_none() is not None
+    _remember(existence.posts, post_id, found)
+    return found
+
+async def get_post(db: AsyncSession, post_id: int, comments_limit: int = COMMENTS_PAGE_SIZE):
+    """
+    Obtiene una publicación con su autor y solo la primera página de comentarios
+    (los `comments_limit` más antiguos); el resto se pide a `get_post_comments`.
+    Los IDs que se sabe que no existen se responden sin consultar la base de datos.
+    """
+    if existence.posts.lookup(post_id) is False:
+        return None
     result = await db.execute(
         select(models.Post)
         .where(models.Post.id == post_id)
-        .options(
-            selectinload(models.Post.author), 
-            selectinload(models.Post.comments).selectinload(models.Comment.author)
+        .options(joinedload(models.Post.author))
+        .execution_options(populate_existing=True)
+    )
+    post = result.scalar_one_or_none()
+    _remember(existence.posts, post_id, post is not None)
+    if post is not None:
+        comments = await get_post_comments(db, post_id=post_id, limit=comments_limit)
+        set_committed_value(post, "comments", comments)
+    return post
+
+async def get_post_rows_by_ids(db: AsyncSession, ids: List[int]) -> Dict[int, Any]:
+    """
+    Obtiene varias publicaciones (sin autor ni comentarios) con una sola
+    consulta `WHERE id IN (...)`. Los IDs que no existen no aparecen en el resultado.
+    """
+    result = await db.execute(
+        select(models.Post.id, models.Post.title, models.Post.content, models.Post.created_at, models.Post.user_id)
+        .where(models.Post.id.in_(ids))
+    )
+    posts = {row.id: row for row in result}
+    for post_id in ids:
+        _remember(existence.posts, post_id, post_id in posts)
+    return posts
+
+async def get_posts_by_ids(
+    db: AsyncSession, ids: List[int], comments_limit: int = COMMENTS_PAGE_SIZE
+) -> List[schemas.Post]:
+    """
+    Obtiene varias publicaciones, en el orden de `ids`, cada una con la primera
+    página de sus comentarios, como `get_post`. Usa el cargador de publicaciones
+    (una consulta), otra consulta (`LATERAL`, con `LIMIT` por publicación) para
+    los comentarios y el cargador de usuarios para todos los autores, de modo que
+    cada autor se lee y se valida una sola vez. Los IDs que no existen se omiten.
+    """
+    loaded = await post_loader(db).load_many(ids)
+    found = {post_id: post for post_id, post in loaded.items() if post is not None}
+    posts = list(found.values())
+    if not posts:
+        return []
+
+    page = (
+        select(
+            models.Comment.id,
+            models.Comment.text,
+            models.Comment.created_at,
+            models.Comment.user_id,
+            models.Comment.post_id,
         )
+        .where(models.Comment.post_id == models.Post.id)
+        .order_by(models.Comment.created_at, models.Comment.id)
+        .limit(comments_limit)
+        .lateral("page")
+    )
+    comments = (await db.execute(
+        select(page)
+        .select_from(models.Post)
+        .join(page, true())
+        .where(models.Post.id.in_(found))
+        .order_by(page.c.post_id, page.c.created_at, page.c.id)
+    )).all()
+    authors = await user_loader(db).load_many(
+        [*(post.user_id for post in posts), *(comment.user_id for comment in comments)]
     )
-    return result.scalar_one_or_none()
+
+    comments_by_post: Dict[int, List[schemas.Comment]] = {post_id: [] for post_id in found}
+    for comment in comments:
+        comments_by_post[comment.post_id].append(schemas.Comment(
+            id=comment.id,
+            text=comment.text,
+            post_id=comment.post_id,
+            created_at=comment.created_at,
+            author=authors[comment.user_id],
+        ))
+    return [
+        schemas.Post(
+            id=post.id,
+            title=post.title,
+            content=post.content,
+            created_at=post.created_at,
+            author=authors[post.user_id],
+            comments=comments_by_post[post.id],
+        )
+        for post in (found[post_id] for post_id in ids if post_id in found)
+    ]
 
 # --- Comment Services ---
-async def create_comment(db: AsyncSession, comment: schemas.CommentCreate, post_id: int):
-    db_comment = models.Comment(**comment.model_dump(), post_id=post_id)
-    db.add(db_comment)
-    await db.commit()
-    await db.refresh(db_comment)
-    await db.refresh(db_comment, attribute_names=['author'])
-    return db_comment
\ No newline at end of file
+async def get_post_comments(
+    db: AsyncSession,
+    post_id: int,
+    limit: int = COMMENTS_PAGE_SIZE,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    """
+    Obtiene una página de comentarios de una publicación en orden cronológico,
+    paginando por cursor sobre el índice `ix_comments_post_id_created_at_id`.
+    Con cursor, la cota inferior de `created_at` descarta las particiones de
+    meses anteriores.
+    """
+    if existence.posts.lookup(post_id) is False:
+        return []
+    query = (
+        select(models.Comment)
+        .where(models.Comment.post_id == post_id)
+        .options(joinedload(models.Comment.author))
+        .order_by(models.Comment.created_at, models.Comment.id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(
+            models.Comment.created_at >= after[0],
+            tuple_(models.Comment.created_at, models.Comment.id) > tuple_(*after),
+        )
+    result = await db.execute(query)
+    return result.scalars().all()
+
+async def create_comment(db: AsyncSession, comment: schemas.CommentCreate, post_id: int) -> schemas.Comment:
+    """
+    Crea un comentario con una sola sentencia: el `INSERT ... RETURNING`, la
+    actualización de la versión y los contadores del post, la del contador
+    `comment_count` del autor y el incremento de la versión del feed van en CTEs.
+    Si el post o el autor no existen lanza `ForeignKeyViolation`
+    (`comments_post_id_fkey` o `comments_user_id_fkey`).
+    """
+    inserted = (
+        insert(models.Comment)
+        .values(**comment.model_dump(), post_id=post_id)
+        .returning(
+            models.Comment.id,
+            models.Comment.text,
+            models.Comment.created_at,
+            models.Comment.user_id,
+            models.Comment.post_id,
+        )
+        .cte("inserted_comment")
+    )
+    bumped = (
+        update(models.Post)
+        .where(models.Post.id == inserted.c.post_id)
+        .values(
+            version=models.Post.version + 1,
+            updated_at=inserted.c.created_at,
+            comment_count=models.Post.comment_count + 1,
+            last_comment_at=inserted.c.created_at,
+        )
+        .returning(models.Post.id)
+        .cte("bumped_post")
+    )
+    author = (
+        update(models.User)
+        .where(models.User.id == inserted.c.user_id)
+        .values(comment_count=models.User.comment_count + 1)
+        .returning(models.User.id, models.User.username, models.User.email)
+        .cte("author")
+    )
+    bumped_feed = bump_feed_version().cte("bumped_feed")
+    row = await _execute_write(
+        db,
+        select(inserted, author.c.username, author.c.email, bumped_feed.c.version.label("feed_version"))
+        .join(author, author.c.id == inserted.c.user_id)
+        .join(bumped_feed, true())
+        .add_cte(bumped),
+    )
+    existence.posts.add(row.post_id)
+    existence.users.add(row.user_id)
+    if feed.advance(row.feed_version):
+        feed.add_comment(row.post_id, row.created_at)
+    trending.record(row.post_id, row.created_at)
+    await cache.invalidate_tags(f"post:{post_id}", f"user:{row.user_id}")
+    return schemas.Comment(
+        id=row.id,
+        text=row.text,
+        post_id=row.post_id,
+        created_at=row.created_at,
+        author=schemas.UserInDB(id=row.user_id, username=row.username, email=row.email),
+    )
+
+async def get_user_comments(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = COMMENTS_PAGE_SIZE,
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    """
+    Obtiene una página de comentarios de un usuario, del más reciente al más antiguo,
+    paginando por cursor sobre el índice `ix_comments_user_id_created_at_id`.
+    Con cursor, la cota superior de `created_at` descarta las particiones de
+    meses posteriores.
+    """
+    if existence.users.lookup(user_id) is False:
+        return []
+    query = (
+        select(models.Comment)
+        .where(models.Comment.user_id == user_id)
+        .options(joinedload(models.Comment.author))
+        .order_by(models.Comment.created_at.desc(), models.Comment.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(
+            models.Comment.created_at <= after[0],
+            tuple_(models.Comment.created_at, models.Comment.id) < tuple_(*after),
+        )
+    result = await db.execute(query)
+    return result.scalars().all()
@@ -0,0 +1,257 @@
+import asyncio
+import heapq
+import logging
+import math
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, extract, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from api_rest_mini_blog import database, models
+from api_rest_mini_blog.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Puntuación actual (en comentarios recientes equivalentes) por debajo de la
+# cual una publicación sale del snapshot
+MIN_SCORE = 0.001
+
+# Exponente mínimo que se pasa a `exp()` en SQL: Postgres da error por
+# desbordamiento inferior en lugar de devolver 0
+MIN_EXPONENT = -700
+
+TrendingEntry = Tuple[int, float]
+
+
+def logaddexp(a: Optional[float], b: float) -> float:
+    """`ln(e^a + e^b)` sin desbordamiento; `a` es `None` si aún no hay suma."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _sql_logaddexp(a, b):
+    return func.greatest(a, b) + func.ln(1 + func.exp(func.greatest(func.least(a, b) - func.greatest(a, b), MIN_EXPONENT)))
+
+
+def _is_postgres(db: AsyncSession) -> bool:
+    # El snapshot usa `INSERT ... ON CONFLICT` y funciones matemáticas de Postgres
+    return db.get_bind().dialect.name == "postgresql"
+
+
+@dataclass
+class TrendingStats:
+    recorded: int = 0
+    evicted: int = 0
+    snapshots: int = 0
+    loads: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class TrendingScores:
+    """
+    Puntuación de tendencia de cada publicación: la suma de sus comentarios con
+    un peso que se reduce a la mitad cada `half_life` segundos.
+
+    Se usa decaimiento hacia delante: el peso de un comentario es
+    `e^(decay * t)` y lo que decae es la referencia, así que una puntuación solo
+    cambia al llegar un comentario, el orden entre publicaciones no cambia con el
+    tiempo y las sumas de distintos procesos se pueden combinar. Las puntuaciones
+    se guardan como logaritmos para que no desborden.
+
+    Cada proceso guarda en memoria las `capacity` mejores publicaciones (un
+    montículo de mínimos indica cuál sale al llegar una nueva) y sirve las `size`
+    primeras sin consultar los comentarios. Los comentarios del proceso se suman
+    al snapshot en `post_trending_scores` cada `TRENDING_SNAPSHOT_SECONDS`, y a la
+    vez se recargan de él las mejores, que incluyen las de los demás procesos.
+    """
+
+    def __init__(self, size: int, capacity: int, half_life: float):
+        self.size = size
+        self.capacity = max(capacity, size)
+        self.decay = math.log(2) / half_life
+        self.stats = TrendingStats()
+        self.loaded = False
+        self._scores: Dict[int, float] = {}
+        # Montículo de (puntuación, post_id); las entradas superadas se descartan al llegar a la cima
+        self._heap: List[Tuple[float, int]] = []
+        # Pesos acumulados desde el último snapshot
+        self._pending: Dict[int, float] = {}
+        self._top: Optional[List[TrendingEntry]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def weight(self, at: datetime) -> float:
+        return self.decay * at.timestamp()
+
+    def current(self, score: float, now: Optional[datetime] = None) -> float:
+        """Valor actual de una puntuación: comentarios recientes equivalentes."""
+        return math.exp(score - self.weight(now or datetime.now(timezone.utc)))
+
+    def record(self, post_id: int, at: datetime) -> None:
+        """Suma un comentario creado en `at` a la puntuación de su publicación."""
+        if not self.enabled:
+            return
+        weight = self.weight(at)
+        self._pending[post_id] = logaddexp(self._pending.get(post_id), weight)
+        self._add(post_id, weight)
+        self.stats.recorded += 1
+
+    def _add(self, post_id: int, weight: float) -> None:
+        score = self._scores.get(post_id)
+        if score is None and len(self._scores) >= self.capacity:
+            floor, floor_id = self._floor()
+            if weight <= floor:
+                return
+            heapq.heappop(self._heap)
+            del self._scores[floor_id]
+            self.stats.evicted += 1
+        score = logaddexp(score, weight)
+        self._scores[post_id] = score
+        heapq.heappush(self._heap, (score, post_id))
+        self._top = None
+        if len(self._heap) > 2 * self.capacity:
+            self._rebuild_heap()
+
+    def _floor(self) -> Tuple[float, int]:
+        # Las puntuaciones solo crecen: una entrada que no coincide con la actual está superada
+        while self._heap[0][0] != self._scores.get(self._heap[0][1]):
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(score, post_id) for post_id, score in self._scores.items()]
+        heapq.heapify(self._heap)
+
+    def load(self, rows: List[TrendingEntry]) -> None:
+        """
+        Sustituye las puntuaciones por las del snapshot (`rows`, de mayor a menor)
+        y les suma los comentarios del proceso que aún no se han guardado.
+        """
+        self._scores = dict(rows[: self.capacity])
+        self._rebuild_heap()
+        self._top = None
+        for post_id, weight in self._pending.items():
+            self._add(post_id, weight)
+        self.loaded = True
+        self.stats.loads += 1
+
+    def top(self, limit: int) -> List[TrendingEntry]:
+        """Las `limit` publicaciones con mayor puntuación, de mayor a menor."""
+        if self._top is None:
+            self._top = heapq.nlargest(self.size, self._scores.items(), key=lambda item: item[1])
+        return self._top[:limit]
+
+    async def _read(self, db: AsyncSession) -> List[TrendingEntry]:
+        table = models.PostTrendingScore
+        result = await db.execute(
+            select(table.post_id, table.score).order_by(table.score.desc()).limit(self.capacity)
+        )
+        return [tuple(row) for row in result]
+
+    async def load_snapshot(self, db: AsyncSession) -> None:
+        """Carga las mejores puntuaciones del snapshot (solo lee)."""
+        self.load(await self._read(db))
+
+    async def rebuild(self, db: AsyncSession, now: Optional[datetime] = None) -> None:
+        """
+        Si el snapshot está vacío (primer arranque tras la migración) lo calcula
+        a partir de los comentarios de los últimos `TRENDING_REBUILD_DAYS` días;
+        el filtro por fecha descarta las demás particiones. Después carga las
+        mejores puntuaciones. Fuera de Postgres no se reconstruye.
+        """
+        now = now or datetime.now(timezone.utc)
+        table = models.PostTrendingScore
+        if _is_postgres(db) and (await db.execute(select(table.post_id).limit(1))).first() is None:
+            comment = models.Comment
+            exponent = self.decay * (extract("epoch", comment.created_at) - now.timestamp())
+            scores = (
+                select(
+                    comment.post_id,
+                    self.weight(now) + func.ln(func.sum(func.exp(func.greatest(exponent, MIN_EXPONENT)))),
+                )
+                .where(comment.created_at >= now - timedelta(days=settings.TRENDING_REBUILD_DAYS))
+                .group_by(comment.post_id)
+            )
+            await db.execute(
+                insert(table).from_select(["post_id", "score"], scores).on_conflict_do_nothing()
+            )
+            await db.commit()
+        await self.load_snapshot(db)
+
+    async def snapshot(self, db: AsyncSession) -> None:
+        """
+        Suma al snapshot los comentarios acumulados desde el anterior, borra las
+        publicaciones cuya puntuación ya no cuenta y recarga las mejores. Fuera
+        de Postgres (SQLite) las puntuaciones solo se guardan en memoria.
+        """
+        if not _is_postgres(db):
+            self._pending.clear()
+            return
+        pending, self._pending = self._pending, {}
+        table = models.PostTrendingScore.__table__
+        try:
+            if pending:
+                statement = insert(table).values(
+                    # En orden de post_id para que dos procesos no se bloqueen mutuamente
+                    [{"post_id": post_id, "score": score} for post_id, score in sorted(pending.items())]
+                )
+                await db.execute(statement.on_conflict_do_update(
+                    index_elements=[table.c.post_id],
+                    set_={"score": _sql_logaddexp(table.c.score, statement.excluded.score), "updated_at": func.now()},
+                ))
+            floor = self.weight(datetime.now(timezone.utc)) + math.log(MIN_SCORE)
+            await db.execute(delete(table).where(table.c.score < floor))
+            rows = await self._read(db)
+            await db.commit()
+        except BaseException:
+            # Lo no guardado vuelve a quedar pendiente para el siguiente snapshot
+            for post_id, score in pending.items():
+                self._pending[post_id] = logaddexp(self._pending.get(post_id), score)
+            raise
+        self.stats.snapshots += 1
+        self.load(rows)
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene la tarea y guarda los comentarios pendientes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pending:
+            async with database.async_session() as db:
+                await self.snapshot(db)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TRENDING_SNAPSHOT_SECONDS)
+            try:
+                async with database.async_session() as db:
+                    await self.snapshot(db)
+            except Exception:
+                logger.exception("Failed to snapshot trending scores")
+
+
+# Instancia del proceso; el lifespan la carga y arranca sus snapshots periódicos
+trending = TrendingScores(
+    size=settings.TRENDING_SIZE,
+    capacity=settings.TRENDING_CAPACITY,
+    half_life=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+)
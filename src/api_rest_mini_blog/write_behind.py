@@ -0,0 +1,333 @@
+import asyncio
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional
+
+from sqlalchemy import DateTime, Integer, String, Text, column, func, insert, true, update, values
+from sqlalchemy.future import select
+
+from api_rest_mini_blog import database, models, schemas
+from api_rest_mini_blog.cache import cache
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.feed import bump_feed_version, feed
+from api_rest_mini_blog.trending import trending
+
+logger = logging.getLogger(__name__)
+
+# Secuencia de la clave primaria de `comments`: los IDs se reservan dentro de la
+# sentencia de inserción para poder asociar cada fila insertada a su ticket
+COMMENT_ID_SEQUENCE = "comments_id_seq"
+
+
+class QueueFull(Exception):
+    """La cola de escritura diferida está llena; el comentario debe escribirse en línea."""
+
+
+@dataclass
+class QueuedComment:
+    ticket: str
+    post_id: int
+    user_id: int
+    text: str
+    created_at: datetime
+
+
+class CommentQueue(ABC):
+    """
+    Cola de comentarios pendientes de escribir. La implementación en memoria
+    pierde los comentarios pendientes si el proceso muere; una cola duradera
+    (Redis Streams, una tabla de staging...) puede sustituirla implementando
+    estos dos métodos.
+    """
+
+    @abstractmethod
+    def put_nowait(self, item: QueuedComment) -> None:
+        """Encola `item` o lanza `QueueFull`."""
+
+    @abstractmethod
+    async def get_batch(self, max_items: int, max_wait: float) -> List[QueuedComment]:
+        """
+        Espera al primer comentario y devuelve hasta `max_items`, esperando como
+        mucho `max_wait` segundos desde el primero a que el lote se llene.
+        """
+
+    def qsize(self) -> int:
+        return 0
+
+
+class MemoryCommentQueue(CommentQueue):
+    """
+    Cola acotada en memoria. Los comentarios solo se retiran de la cola al
+    devolver el lote, así que cancelar `get_batch` no pierde ninguno.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: Deque[QueuedComment] = deque()
+        self._added = asyncio.Event()
+
+    def put_nowait(self, item: QueuedComment) -> None:
+        if len(self._items) >= self.max_size:
+            raise QueueFull()
+        self._items.append(item)
+        self._added.set()
+
+    async def _wait_for_items(self) -> None:
+        self._added.clear()
+        await self._added.wait()
+
+    async def get_batch(self, max_items: int, max_wait: float) -> List[QueuedComment]:
+        while not self._items:
+            await self._wait_for_items()
+        deadline = time.monotonic() + max_wait
+        while len(self._items) < max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._wait_for_items(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return [self._items.popleft() for _ in range(min(max_items, len(self._items)))]
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+
+class CommentWriteBehind:
+    """
+    Escritura diferida de comentarios: las peticiones se encolan y una tarea en
+    segundo plano las inserta por lotes de hasta `batch_size` filas, con una sola
+    sentencia por lote, cada `flush_interval` segundos como mucho.
+
+    El estado de cada comentario encolado se consulta por su ticket; se guardan
+    los `results_max` más recientes.
+    """
+
+    def __init__(self, queue: CommentQueue, batch_size: int, flush_interval: float, results_max: int = 10_000):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.results_max = results_max
+        self._results: "OrderedDict[str, schemas.PendingComment]" = OrderedDict()
+        self._done: Dict[str, asyncio.Event] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Future] = None
+
+    def enqueue(self, post_id: int, comment: schemas.CommentCreate) -> schemas.PendingComment:
+        """Encola un comentario ya validado y devuelve su estado provisional."""
+        item = QueuedComment(
+            ticket=uuid.uuid4().hex,
+            post_id=post_id,
+            user_id=comment.user_id,
+            text=comment.text,
+            created_at=datetime.now(timezone.utc),
+        )
+        self.queue.put_nowait(item)
+        pending = schemas.PendingComment(id=item.ticket, post_id=post_id, status="pending")
+        self._remember(pending)
+        self._done[item.ticket] = asyncio.Event()
+        return pending
+
+    async def status(self, ticket: str, wait: float = 0.0) -> Optional[schemas.PendingComment]:
+        """
+        Devuelve el estado de un comentario encolado; con `wait` espera hasta ese
+        número de segundos a que el lote que lo contiene se confirme.
+        """
+        done = self._done.get(ticket)
+        if done is not None and wait > 0:
+            try:
+                await asyncio.wait_for(done.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        return self._results.get(ticket)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Detiene la tarea, espera al lote que se esté escribiendo y escribe los
+        comentarios que queden en la cola.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+        while self.queue.qsize():
+            await self.flush(await self.queue.get_batch(self.batch_size, 0))
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self.queue.get_batch(self.batch_size, self.flush_interval)
+            # Un lote ya retirado de la cola se termina de escribir aunque se cancele la tarea
+            self._flushing = asyncio.ensure_future(self.flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def flush(self, batch: List[QueuedComment]) -> None:
+        """
+        Inserta un lote con una única sentencia: los comentarios cuyo post o
+        autor no existen se descartan en el propio INSERT y se marcan como fallidos.
+        """
+        try:
+            rows = await _insert_batch(batch)
+        except Exception:
+            logger.exception("Failed to write %d queued comments", len(batch))
+            for item in batch:
+                self._finish(schemas.PendingComment(
+                    id=item.ticket, post_id=item.post_id, status="failed", error="Comment could not be stored."
+                ))
+            return
+
+        tags = set()
+        # El lote incrementa la versión del feed una sola vez
+        apply_to_feed = feed.advance(rows[0].feed_version)
+        for row in sorted(rows, key=lambda row: row.comment_id or 0):
+            if row.comment_id is not None:
+                if apply_to_feed:
+                    feed.add_comment(row.post_id, row.created_at)
+                trending.record(row.post_id, row.created_at)
+                tags.update((f"post:{row.post_id}", f"user:{row.user_id}"))
+                result = schemas.PendingComment(
+                    id=row.ticket,
+                    post_id=row.post_id,
+                    status="committed",
+                    comment=schemas.Comment(
+                        id=row.comment_id,
+                        text=row.text,
+                        post_id=row.post_id,
+                        created_at=row.created_at,
+                        author=schemas.UserInDB(id=row.user_id, username=row.username, email=row.email),
+                    ),
+                )
+            elif row.found_post is None:
+                result = schemas.PendingComment(
+                    id=row.ticket, post_id=row.post_id, status="failed", error=f"Post with id {row.post_id} not found"
+                )
+            else:
+                result = schemas.PendingComment(
+                    id=row.ticket,
+                    post_id=row.post_id,
+                    status="failed",
+                    error=f"User with id {row.user_id} not found. Cannot create comment.",
+                )
+            self._finish(result)
+        if tags:
+            await cache.invalidate_tags(*tags)
+
+    def _remember(self, result: schemas.PendingComment) -> None:
+        self._results[result.id] = result
+        self._results.move_to_end(result.id)
+        while len(self._results) > self.results_max:
+            ticket, _ = self._results.popitem(last=False)
+            self._done.pop(ticket, None)
+
+    def _finish(self, result: schemas.PendingComment) -> None:
+        self._remember(result)
+        done = self._done.pop(result.id, None)
+        if done is not None:
+            done.set()
+
+
+async def _insert_batch(batch: List[QueuedComment]):
+    """
+    Sentencia de un lote: reserva un ID por comentario, inserta los que tienen
+    post y autor, actualiza la versión y los contadores de los posts y autores
+    afectados e incrementa la versión del feed. Devuelve una fila por ticket,
+    con `comment_id` nulo si no se insertó y la nueva versión del feed.
+    """
+    incoming_values = values(
+        column("ticket", String),
+        column("text", Text),
+        column("user_id", Integer),
+        column("post_id", Integer),
+        column("created_at", DateTime(timezone=True)),
+        name="incoming_values",
+    ).data([(item.ticket, item.text, item.user_id, item.post_id, item.created_at) for item in batch])
+    incoming = select(func.nextval(COMMENT_ID_SEQUENCE).label("id"), incoming_values).cte("incoming")
+    inserted = (
+        insert(models.Comment)
+        .from_select(
+            ["id", "text", "user_id", "post_id", "created_at"],
+            select(incoming.c.id, incoming.c.text, incoming.c.user_id, incoming.c.post_id, incoming.c.created_at)
+            .join(models.Post, models.Post.id == incoming.c.post_id)
+            .join(models.User, models.User.id == incoming.c.user_id),
+        )
+        .returning(models.Comment.id, models.Comment.post_id, models.Comment.user_id, models.Comment.created_at)
+        .cte("inserted")
+    )
+    per_post = (
+        select(inserted.c.post_id, func.count().label("amount"), func.max(inserted.c.created_at).label("last"))
+        .group_by(inserted.c.post_id)
+        .subquery("per_post")
+    )
+    bumped_posts = (
+        update(models.Post)
+        .where(models.Post.id == per_post.c.post_id)
+        .values(
+            version=models.Post.version + 1,
+            updated_at=func.greatest(models.Post.updated_at, per_post.c.last),
+            comment_count=models.Post.comment_count + per_post.c.amount,
+            last_comment_at=func.greatest(models.Post.last_comment_at, per_post.c.last),
+        )
+        .returning(models.Post.id)
+        .cte("bumped_posts")
+    )
+    per_user = (
+        select(inserted.c.user_id, func.count().label("amount"))
+        .group_by(inserted.c.user_id)
+        .subquery("per_user")
+    )
+    bumped_users = (
+        update(models.User)
+        .where(models.User.id == per_user.c.user_id)
+        .values(comment_count=models.User.comment_count + per_user.c.amount)
+        .returning(models.User.id)
+        .cte("bumped_users")
+    )
+    bumped_feed = bump_feed_version().cte("bumped_feed")
+    statement = (
+        select(
+            incoming.c.ticket,
+            incoming.c.post_id,
+            incoming.c.user_id,
+            incoming.c.text,
+            inserted.c.id.label("comment_id"),
+            inserted.c.created_at,
+            models.Post.id.label("found_post"),
+            models.User.username,
+            models.User.email,
+            bumped_feed.c.version.label("feed_version"),
+        )
+        .outerjoin(inserted, inserted.c.id == incoming.c.id)
+        .outerjoin(models.Post, models.Post.id == incoming.c.post_id)
+        .outerjoin(models.User, models.User.id == incoming.c.user_id)
+        .join(bumped_feed, true())
+        .add_cte(bumped_posts, bumped_users)
+    )
+    database.init_engine()
+    async with database.async_session() as db:
+        # Una única sentencia atómica: se ejecuta en autocommit, sin BEGIN/COMMIT
+        await db.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        return (await db.execute(statement)).all()
+
+
+# Instancia del proceso; se arranca en el lifespan si `COMMENT_WRITE_BEHIND` está activo
+comment_writer = CommentWriteBehind(
+    MemoryCommentQueue(max_size=settings.COMMENT_QUEUE_MAX_SIZE),
+    batch_size=settings.COMMENT_BATCH_SIZE,
+    flush_interval=settings.COMMENT_FLUSH_INTERVAL_SECONDS,
+)
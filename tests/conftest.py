@@ -4,6 +4,7 @@ from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from api_rest_mini_blog.database import Base
 from api_rest_mini_blog.database import get_db as get_async_session
+from api_rest_mini_blog.database import get_read_db
 from tests.utils_db import recreate_test_database, run_migrations, delete_test_database
 from api_rest_mini_blog.config import settings
 
@@ -31,6 +32,7 @@ async def client(db_session):
         yield db_session
 
     app.dependency_overrides[get_async_session] = override_get_async_session
+    app.dependency_overrides[get_read_db] = override_get_async_session
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
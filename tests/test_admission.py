@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from api_rest_mini_blog.admission import AdmissionMiddleware
+from api_rest_mini_blog.config import settings
+
+
+def build_app(release: asyncio.Event) -> Starlette:
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("ok")
+
+    async def write(request):
+        return PlainTextResponse("written")
+
+    return Starlette(
+        routes=[Route("/slow/{item_id}", slow), Route("/items", write, methods=["POST"])],
+        middleware=[Middleware(AdmissionMiddleware)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_admission_sheds_reads_without_starving_writes(monkeypatch):
+    """
+    Verifica que, con el presupuesto de lecturas agotado, las peticiones se
+    encolen hasta el tamaño de la cola, el resto reciba 503 con `Retry-After`
+    y las escrituras sigan entrando por su propio presupuesto.
+    """
+    monkeypatch.setattr(settings, "ADMISSION_READ_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "ADMISSION_QUEUE_SIZE", 1)
+    monkeypatch.setattr(settings, "ADMISSION_ROUTE_LIMITS", {"GET /slow/{item_id}": 5})
+    release = asyncio.Event()
+    async with AsyncClient(transport=ASGITransport(app=build_app(release)), base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/slow/1"))
+        second = asyncio.create_task(client.get("/slow/2"))
+        await asyncio.sleep(0.05)
+
+        shed = await client.get("/slow/3")
+        assert shed.status_code == 503
+        assert int(shed.headers["Retry-After"]) >= 1
+        assert (await client.post("/items")).status_code == 200
+
+        release.set()
+        assert [(await first).status_code, (await second).status_code] == [200, 200]
+        assert (await client.get("/slow/4")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_client(monkeypatch):
+    """Verifica que un cliente que agota su ráfaga reciba 429 con `Retry-After`."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_SECOND", 1.0)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 2)
+    release = asyncio.Event()
+    release.set()
+    async with AsyncClient(transport=ASGITransport(app=build_app(release)), base_url="http://test") as client:
+        statuses = [(await client.get("/slow/1")).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        assert (await client.get("/slow/1")).headers["Retry-After"] == "1"
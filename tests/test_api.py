@@ -1,7 +1,10 @@
 import pytest
+import json
 import os
 from httpx import AsyncClient
 
+from api_rest_mini_blog.config import settings
+
 
 @pytest.mark.asyncio
 async def test_environment_variable():
@@ -133,4 +136,369 @@ async def test_full_flow_create_user_post_and_comment(client: AsyncClient):
     assert comment_response.status_code == 201
     created_comment = comment_response.json()
     assert created_comment["text"] == comment_data["text"]
-    assert created_comment["author"]["id"] == user_id
\ No newline at end of file
+    assert created_comment["author"]["id"] == user_id
+
+@pytest.mark.asyncio
+async def test_get_posts_with_cursor_pagination(client: AsyncClient):
+    """
+    Verifica que la paginación por cursor devuelva páginas consecutivas
+    sin repetir publicaciones y en orden descendente.
+    """
+    user_res = await client.post("/users/", json={"username": "cursor_user", "email": "cursor@example.com"})
+    user_id = user_res.json()["id"]
+    post_ids = []
+    for i in range(3):
+        post_res = await client.post("/posts/", json={"title": f"Cursor {i}", "content": "...", "user_id": user_id})
+        post_ids.append(post_res.json()["id"])
+
+    first_page = await client.get("/posts/", params={"limit": 2})
+    assert first_page.status_code == 200
+    assert [p["id"] for p in first_page.json()] == [post_ids[2], post_ids[1]]
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    second_page = await client.get("/posts/", params={"limit": 2, "cursor": cursor})
+    assert second_page.status_code == 200
+    assert second_page.json()[0]["id"] == post_ids[0]
+
+    invalid = await client.get("/posts/", params={"cursor": "not-a-cursor"})
+    assert invalid.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_posts_summary_and_include_comments(client: AsyncClient):
+    """
+    Verifica que el feed devuelva resúmenes con el conteo de comentarios
+    y que `include=comments` devuelva el árbol completo.
+    """
+    user_res = await client.post("/users/", json={"username": "summary_user", "email": "summary@example.com"})
+    user_id = user_res.json()["id"]
+    post_res = await client.post("/posts/", json={"title": "Summary", "content": "x" * 500, "user_id": user_id})
+    post_id = post_res.json()["id"]
+    for text in ("first", "second"):
+        await client.post(f"/posts/{post_id}/comments", json={"text": text, "user_id": user_id})
+
+    summary = (await client.get("/posts/", params={"limit": 1})).json()[0]
+    assert summary["id"] == post_id
+    assert summary["comment_count"] == 2
+    assert summary["last_comment_at"] is not None
+    assert len(summary["excerpt"]) < 500
+    assert "comments" not in summary
+
+    full = (await client.get("/posts/", params={"limit": 1, "include": "comments"})).json()[0]
+    assert sorted(c["text"] for c in full["comments"]) == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_get_post_comments_paginated(client: AsyncClient):
+    """
+    Verifica que los comentarios de un post se paginen por cursor
+    en orden cronológico y que un post inexistente devuelva 404.
+    """
+    user_res = await client.post("/users/", json={"username": "paging_user", "email": "paging@example.com"})
+    user_id = user_res.json()["id"]
+    post_res = await client.post("/posts/", json={"title": "Paging", "content": "...", "user_id": user_id})
+    post_id = post_res.json()["id"]
+    for i in range(3):
+        await client.post(f"/posts/{post_id}/comments", json={"text": f"comment {i}", "user_id": user_id})
+
+    first_page = await client.get(f"/posts/{post_id}/comments", params={"limit": 2})
+    assert first_page.status_code == 200
+    assert [c["text"] for c in first_page.json()] == ["comment 0", "comment 1"]
+
+    second_page = await client.get(
+        f"/posts/{post_id}/comments",
+        params={"limit": 2, "cursor": first_page.headers["X-Next-Cursor"]},
+    )
+    assert [c["text"] for c in second_page.json()] == ["comment 2"]
+    assert "X-Next-Cursor" not in second_page.headers
+
+    missing = await client.get("/posts/99999/comments")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_user_profile_is_bounded_and_history_paginated(client: AsyncClient):
+    """
+    Verifica que el perfil devuelva totales y solo los elementos recientes,
+    y que el historial del usuario se pagine por cursor.
+    """
+    user_res = await client.post("/users/", json={"username": "prolific_user", "email": "prolific@example.com"})
+    user_id = user_res.json()["id"]
+    post_ids = []
+    for i in range(7):
+        post_res = await client.post("/posts/", json={"title": f"Post {i}", "content": "...", "user_id": user_id})
+        post_ids.append(post_res.json()["id"])
+    await client.post(f"/posts/{post_ids[0]}/comments", json={"text": "self comment", "user_id": user_id})
+
+    profile = (await client.get(f"/users/{user_id}")).json()
+    assert profile["post_count"] == 7
+    assert profile["comment_count"] == 1
+    assert len(profile["recent_posts"]) == 5
+    assert profile["recent_posts"][0]["id"] == post_ids[-1]
+    assert profile["recent_comments"][0]["post_id"] == post_ids[0]
+
+    first_page = await client.get(f"/users/{user_id}/posts", params={"limit": 4})
+    second_page = await client.get(
+        f"/users/{user_id}/posts",
+        params={"limit": 4, "cursor": first_page.headers["X-Next-Cursor"]},
+    )
+    paged_ids = [p["id"] for p in first_page.json() + second_page.json()]
+    assert paged_ids == list(reversed(post_ids))
+
+    comments = await client.get(f"/users/{user_id}/comments")
+    assert [c["text"] for c in comments.json()] == ["self comment"]
+
+    missing = await client.get("/users/99999/posts")
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_read_post_is_cached_and_invalidated_by_comments(client: AsyncClient):
+    """
+    Verifica que la segunda lectura de un post salga de la caché y que
+    un nuevo comentario invalide la entrada.
+    """
+    user_res = await client.post("/users/", json={"username": "cache_user", "email": "cache@example.com"})
+    user_id = user_res.json()["id"]
+    post_res = await client.post("/posts/", json={"title": "Cached", "content": "...", "user_id": user_id})
+    post_id = post_res.json()["id"]
+
+    await client.get(f"/posts/{post_id}")
+    hits_before = (await client.get("/stats/cache")).json()["hits"]
+    cached = await client.get(f"/posts/{post_id}")
+    assert cached.status_code == 200
+    assert (await client.get("/stats/cache")).json()["hits"] == hits_before + 1
+
+    await client.post(f"/posts/{post_id}/comments", json={"text": "fresh", "user_id": user_id})
+    refreshed = await client.get(f"/posts/{post_id}")
+    assert [c["text"] for c in refreshed.json()["comments"]] == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_read_post_conditional_requests(client: AsyncClient):
+    """
+    Verifica que un post devuelva 304 con un ETag vigente y 200 con un
+    ETag nuevo después de recibir un comentario.
+    """
+    user_res = await client.post("/users/", json={"username": "etag_user", "email": "etag@example.com"})
+    user_id = user_res.json()["id"]
+    post_res = await client.post("/posts/", json={"title": "ETag", "content": "...", "user_id": user_id})
+    post_id = post_res.json()["id"]
+
+    first = await client.get(f"/posts/{post_id}")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert "Last-Modified" in first.headers
+
+    not_modified = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    await client.post(f"/posts/{post_id}/comments", json={"text": "new version", "user_id": user_id})
+    modified = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+
+    feed = await client.get("/posts/")
+    feed_not_modified = await client.get("/posts/", headers={"If-None-Match": feed.headers["ETag"]})
+    assert feed_not_modified.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_row_errors(client: AsyncClient):
+    """
+    Verifica que la importación NDJSON inserte las filas válidas y
+    devuelva los errores por línea de las inválidas.
+    """
+    users_body = "\n".join([
+        '{"username": "import_a", "email": "import_a@example.com"}',
+        '{"username": "import_b", "email": "import_b@example.com"}',
+        '{"username": "import_a", "email": "import_a@example.com"}',
+        'not json',
+    ])
+    users_report = (await client.post("/import/users", content=users_body)).json()
+    assert users_report["inserted"] == 2
+    assert [e["line"] for e in users_report["errors"]] == [3, 4]
+
+    user_id = (await client.post("/users/", json={"username": "import_owner", "email": "import_owner@example.com"})).json()["id"]
+    posts_body = "\n".join([
+        f'{{"title": "Imported", "content": "...", "user_id": {user_id}, "created_at": "2020-01-01T00:00:00Z"}}',
+        '{"title": "Orphan", "content": "...", "user_id": 99999}',
+    ])
+    posts_report = (await client.post("/import/posts", content=posts_body)).json()
+    assert posts_report["inserted"] == 1
+    assert posts_report["errors"][0]["line"] == 2
+
+    imported = (await client.get(f"/users/{user_id}/posts")).json()
+    assert imported[0]["title"] == "Imported"
+    assert imported[0]["created_at"].startswith("2020-01-01")
+
+    comments_body = f'{{"text": "imported comment", "user_id": {user_id}, "post_id": {imported[0]["id"]}}}\n'
+    comments_report = (await client.post("/import/comments", content=comments_body)).json()
+    assert comments_report == {"inserted": 1, "failed": 0, "errors": []}
+
+
+@pytest.mark.asyncio
+async def test_create_user_with_duplicate_username(client: AsyncClient):
+    """
+    Verifica que un username repetido con otro email devuelva 409 Conflict,
+    detectado por la restricción única en lugar de una consulta previa.
+    """
+    response1 = await client.post("/users/", json={"username": "same_name", "email": "first@example.com"})
+    assert response1.status_code == 201
+
+    response2 = await client.post("/users/", json={"username": "same_name", "email": "second@example.com"})
+    assert response2.status_code == 409
+    assert response2.json()["detail"] == "Username 'same_name' is already registered."
+
+
+@pytest.mark.asyncio
+async def test_search_posts_and_comments(client: AsyncClient):
+    """
+    Verifica que la búsqueda encuentre publicaciones y comentarios, resalte
+    los términos escapando el HTML y pagine por cursor.
+    """
+    user_id = (await client.post("/users/", json={"username": "searcher", "email": "searcher@example.com"})).json()["id"]
+    post = (await client.post("/posts/", json={
+        "title": "Zanahorias <b>moradas</b>",
+        "content": "Cómo cultivar zanahorias en macetas.",
+        "user_id": user_id,
+    })).json()
+    await client.post(f"/posts/{post['id']}/comments", json={"text": "Mis zanahorias crecieron torcidas", "user_id": user_id})
+
+    response = await client.get("/posts/search", params={"q": "zanahorias", "limit": 1})
+    assert response.status_code == 200
+    first = response.json()
+    assert [hit["kind"] for hit in first] == ["post"]
+    assert first[0]["post_id"] == post["id"]
+    assert "<mark>zanahorias</mark>" in first[0]["headline"]
+
+    second = (await client.get(
+        "/posts/search", params={"q": "zanahorias", "limit": 1, "cursor": response.headers["X-Next-Cursor"]}
+    )).json()
+    assert second[0]["kind"] == "comment"
+    assert second[0]["title"] == "Zanahorias <b>moradas</b>"
+
+    assert (await client.get("/posts/search", params={"q": "zanahorias -torcidas"})).json()[0]["kind"] == "post"
+    assert (await client.get("/posts/search", params={"q": "zanahorias", "cursor": "bad"})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_export_streams_ndjson(client: AsyncClient):
+    """
+    Verifica que la exportación de un usuario y la de publicaciones desde una
+    fecha devuelvan NDJSON con todos los registros y en el formato de importación.
+    """
+    user_id = (await client.post("/users/", json={"username": "exporter", "email": "exporter@example.com"})).json()["id"]
+    old = (await client.post("/import/posts", content=(
+        f'{{"title": "Old", "content": "...", "user_id": {user_id}, "created_at": "2001-01-01T00:00:00Z"}}'
+    ))).json()
+    assert old["inserted"] == 1
+    post_id = (await client.post("/posts/", json={"title": "New", "content": "...", "user_id": user_id})).json()["id"]
+    await client.post(f"/posts/{post_id}/comments", json={"text": "exported", "user_id": user_id})
+
+    response = await client.get(f"/users/{user_id}/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records] == ["user", "post", "post", "comment"]
+    assert [record["title"] for record in records[1:3]] == ["Old", "New"]
+
+    since = (await client.get("/export/posts", params={"since": "2010-01-01T00:00:00Z"})).text.splitlines()
+    titles = [json.loads(line)["title"] for line in since]
+    assert "New" in titles and "Old" not in titles
+
+    assert (await client.get("/users/99999/export")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_metrics_and_query_count_header(client: AsyncClient, monkeypatch):
+    """
+    Verifica que `/metrics` exponga la latencia y las sentencias SQL por ruta y
+    que la cabecera de depuración cuente las consultas de la petición.
+    """
+    monkeypatch.setattr(settings, "METRICS_DEBUG_HEADERS", True)
+    user_id = (await client.post("/users/", json={"username": "metrics", "email": "metrics@example.com"})).json()["id"]
+    response = await client.get(f"/users/{user_id}/comments")
+    # Los comentarios y, al no haber ninguno, la existencia del usuario (ya en caché)
+    assert response.headers["X-DB-Query-Count"] == "1"
+
+    metrics = (await client.get("/metrics")).text
+    assert 'http_requests_total{route="/users/{user_id}/comments",method="GET",status="200"}' in metrics
+    assert 'http_request_sql_statements_bucket{route="/users/{user_id}/comments",method="GET",le="2"}' in metrics
+    assert "db_pool_checkouts" in metrics
+
+
+@pytest.mark.asyncio
+async def test_comment_write_behind(client: AsyncClient, monkeypatch):
+    """
+    Verifica que con la escritura diferida los comentarios se acepten con 202,
+    se inserten en un mismo lote y su estado final pueda esperarse.
+    """
+    from api_rest_mini_blog import database
+    from api_rest_mini_blog.routers import posts as posts_router
+    from api_rest_mini_blog.write_behind import CommentWriteBehind, MemoryCommentQueue
+
+    writer = CommentWriteBehind(MemoryCommentQueue(max_size=100), batch_size=50, flush_interval=0.05)
+    monkeypatch.setattr(settings, "COMMENT_WRITE_BEHIND", True)
+    monkeypatch.setattr(posts_router, "comment_writer", writer)
+    await writer.start()
+    try:
+        user_id = (await client.post("/users/", json={"username": "burst", "email": "burst@example.com"})).json()["id"]
+        post_id = (await client.post("/posts/", json={"title": "Viral", "content": "...", "user_id": user_id})).json()["id"]
+        accepted = [
+            await client.post(f"/posts/{post_id}/comments", json={"text": text, "user_id": author})
+            for text, author in (("uno", user_id), ("dos", user_id), ("tres", 99999))
+        ]
+        assert [response.status_code for response in accepted] == [202, 202, 202]
+        assert accepted[0].json()["status"] == "pending"
+
+        results = [
+            (await client.get(response.headers["Location"], params={"wait": 5})).json() for response in accepted
+        ]
+        assert [result["status"] for result in results] == ["committed", "committed", "failed"]
+        assert results[0]["comment"]["text"] == "uno"
+        assert "User with id 99999" in results[2]["error"]
+
+        comments = (await client.get(f"/posts/{post_id}/comments")).json()
+        assert [comment["id"] for comment in comments] == [results[0]["comment"]["id"], results[1]["comment"]["id"]]
+        summary = (await client.get(f"/users/{user_id}/posts")).json()[0]
+        assert summary["comment_count"] == 2
+    finally:
+        await writer.stop()
+        await database.dispose_engine()
+
+
+@pytest.mark.asyncio
+async def test_multi_get_users_and_posts(client, monkeypatch):
+    """
+    Verifica `GET /users?ids=` y `GET /posts?ids=`: orden pedido, IDs inexistentes
+    omitidos y un número de consultas que no depende de cuántos IDs se piden.
+    """
+    monkeypatch.setattr(settings, "METRICS_DEBUG_HEADERS", True)
+    user_ids = [
+        (await client.post("/users/", json={"username": f"multi{i}", "email": f"multi{i}@example.com"})).json()["id"]
+        for i in range(3)
+    ]
+    post_ids = []
+    for user_id in user_ids:
+        post = await client.post("/posts/", json={"title": f"Multi {user_id}", "content": "...", "user_id": user_id})
+        post_ids.append(post.json()["id"])
+        for commenter in user_ids:
+            await client.post(f"/posts/{post_ids[-1]}/comments", json={"text": "hola", "user_id": commenter})
+
+    response = await client.get(f"/users/?ids={user_ids[2]},999999,{user_ids[0]},{user_ids[2]}")
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [user_ids[2], user_ids[0]]
+    assert response.headers["X-DB-Query-Count"] == "1"
+
+    response = await client.get(f"/posts/?ids={post_ids[1]},{post_ids[0]},{post_ids[2]}")
+    posts = response.json()
+    assert [post["id"] for post in posts] == [post_ids[1], post_ids[0], post_ids[2]]
+    assert [len(post["comments"]) for post in posts] == [3, 3, 3]
+    assert posts[0]["comments"][2]["author"]["username"] == "multi2"
+    # Publicaciones, comentarios y una única carga de los tres autores
+    assert response.headers["X-DB-Query-Count"] == "3"
+
+    assert (await client.get("/users/?ids=1,abc")).status_code == 400
+    assert (await client.get("/posts/?ids=" + ",".join(map(str, range(1, 102))))).status_code == 400
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from api_rest_mini_blog.services import BatchLoader
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_coalesces_and_cancels_with_its_batch():
+    """
+    Verifica que el cargador por lotes agrupe las claves pedidas a la vez y que,
+    si se cancela la tarea de un lote, quien espera sus claves no se quede colgado.
+    """
+    calls = []
+    started = asyncio.Event()
+
+    async def batch_load(keys):
+        calls.append(keys)
+        if keys == ["lento"]:
+            started.set()
+            await asyncio.sleep(3600)
+        return {key: key.upper() for key in keys}
+
+    loader = BatchLoader(batch_load)
+    assert await loader.load_many(["a", "b", "a"]) == {"a": "A", "b": "B"}
+    assert calls == [["a", "b"]]
+
+    waiting = asyncio.ensure_future(loader.load_many(["lento"]))
+    await started.wait()
+    for task in loader._tasks:
+        task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(waiting, 1)
+    # La clave cancelada no se recuerda: se vuelve a cargar
+    calls.clear()
+    assert await loader.load_many(["b", "c"]) == {"b": "B", "c": "C"}
+    assert calls == [["c"]]
@@ -0,0 +1,39 @@
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from api_rest_mini_blog.cache import MemoryCache, RedisCache
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_evicts_least_recently_used():
+    """Verifica que la caché en memoria expulse la entrada menos usada."""
+    cache = MemoryCache(ttl=60, max_entries=2)
+    await cache.set("a", b"1")
+    await cache.set("b", b"2")
+    assert await cache.get("a") == b"1"
+    await cache.set("c", b"3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"1"
+    assert await cache.get("c") == b"3"
+    assert cache.stats.hits == 3
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("make_cache", [
+    lambda: MemoryCache(ttl=60, max_entries=10),
+    lambda: RedisCache(FakeAsyncRedis(), ttl=60),
+])
+async def test_cache_invalidates_by_tag(make_cache):
+    """Verifica que invalidar una etiqueta elimine solo las entradas que la llevan."""
+    cache = make_cache()
+    await cache.set("post:1", b"post", tags=["post:1"])
+    await cache.set("feed:0", b"feed", tags=["feed", "post:1"])
+    await cache.set("feed:1", b"older feed", tags=["feed", "post:2"])
+
+    await cache.invalidate_tags("post:1")
+
+    assert await cache.get("post:1") is None
+    assert await cache.get("feed:0") is None
+    assert await cache.get("feed:1") == b"older feed"
@@ -0,0 +1,68 @@
+import gzip
+
+import pytest
+
+from api_rest_mini_blog import compression
+from api_rest_mini_blog.cache import CachedResponse
+from api_rest_mini_blog.compression import negotiate
+
+
+def test_negotiate_honours_q_values_and_server_preference():
+    """Verifica la negociación de `Accept-Encoding` con valores `q` y comodín."""
+    available = list(compression.encodings)
+    assert negotiate("") is None
+    assert negotiate("gzip") == "gzip"
+    assert negotiate("gzip;q=0.5, identity") == "gzip"
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*") == available[0]
+    assert negotiate(f"*, {available[0]};q=0") == (available[1] if len(available) > 1 else None)
+
+
+def test_cached_response_round_trips_encoded_variants():
+    """Verifica que las variantes comprimidas sobrevivan a la serialización de la caché."""
+    cached = CachedResponse(body=b"[1,2,3]", headers={"ETag": 'W/"1"'}, encoded={"gzip": gzip.compress(b"[1,2,3]"), "zstd": b"zz"})
+    assert CachedResponse.from_bytes(cached.to_bytes()) == cached
+    # Las entradas del formato anterior (cabeceras en la primera línea) se siguen leyendo
+    legacy = CachedResponse.from_bytes(b'{"ETag": "W/\\"1\\""}\n[1,2,3]')
+    assert legacy == CachedResponse(body=b"[1,2,3]", headers={"ETag": 'W/"1"'})
+
+
+@pytest.mark.asyncio
+async def test_responses_are_compressed_and_cached_precompressed(client, monkeypatch):
+    """
+    Verifica que las respuestas grandes se compriman según `Accept-Encoding`,
+    que las pequeñas no, y que los aciertos de caché sirvan la variante ya
+    comprimida sin volver a comprimir.
+    """
+    user_id = (await client.post("/users/", json={"username": "gzip", "email": "gzip@example.com"})).json()["id"]
+    post_id = (await client.post("/posts/", json={"title": "Grande", "content": "x" * 4000, "user_id": user_id})).json()["id"]
+    for _ in range(20):
+        await client.post(f"/posts/{post_id}/comments", json={"text": "comentario repetido", "user_id": user_id})
+
+    calls = []
+    gzip_encoding = compression.encodings["gzip"]
+    original = gzip_encoding.compress
+    monkeypatch.setattr(gzip_encoding, "compress", lambda data: calls.append(len(data)) or original(data))
+
+    headers = {"Accept-Encoding": "gzip"}
+    first = await client.get("/posts/?include=comments&limit=1", headers=headers)
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["Vary"]
+    assert int(first.headers["Content-Length"]) < len(first.content) / 5
+    assert first.json()[0]["id"] == post_id
+    assert len(calls) == 1
+
+    second = await client.get("/posts/?include=comments&limit=1", headers=headers)
+    assert second.headers["Content-Encoding"] == "gzip"
+    assert second.content == first.content
+    assert len(calls) == 1
+
+    plain = await client.get("/posts/?include=comments&limit=1", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.content == first.content
+    small = await client.get("/", headers=headers)
+    assert "Content-Encoding" not in small.headers
+
+    export = await client.get(f"/users/{user_id}/export", headers=headers)
+    assert export.headers["Content-Encoding"] == "gzip"
+    assert len(export.text.splitlines()) == 22
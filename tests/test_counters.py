@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import update
+
+from api_rest_mini_blog import models, schemas, services
+from api_rest_mini_blog.counters import reconcile_counters
+
+
+@pytest.mark.asyncio
+async def test_counters_are_maintained_and_reconciled(db_session):
+    """
+    Verifica que las escrituras mantengan los contadores desnormalizados y que
+    `reconcile_counters` repare los que se hayan desviado.
+    """
+    author = await services.create_user(db_session, schemas.UserCreate(username="counter", email="counter@example.com"))
+    post = await services.create_post(db_session, schemas.PostCreate(title="Contadores", content="...", user_id=author.id))
+    comment = await services.create_comment(db_session, schemas.CommentCreate(text="uno", user_id=author.id), post_id=post.id)
+
+    user = await services.get_user(db_session, user_id=author.id)
+    assert (user.post_count, user.comment_count) == (1, 1)
+    summary = (await services.get_post_summaries(db_session, limit=1, user_id=author.id))[0]
+    assert (summary.comment_count, summary.last_comment_at) == (1, comment.created_at)
+
+    await db_session.execute(update(models.Post).where(models.Post.id == post.id).values(comment_count=7, last_comment_at=None))
+    await db_session.execute(update(models.User).where(models.User.id == author.id).values(post_count=0))
+    await db_session.commit()
+
+    fixed = await reconcile_counters(db_session)
+    assert fixed == {"posts": 1, "users": 1}
+    assert await reconcile_counters(db_session) == {"posts": 0, "users": 0}
+    summary = (await services.get_post_summaries(db_session, limit=1, user_id=author.id))[0]
+    assert (summary.comment_count, summary.last_comment_at) == (1, comment.created_at)
+    assert (await services.get_user(db_session, user_id=author.id)).post_count == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from api_rest_mini_blog import existence
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.existence import ExistenceCache
+
+
+def test_existence_cache_bitmap_and_negative_ttl(monkeypatch):
+    """Verifica el bitmap de IDs existentes y la caducidad y el límite de los negativos."""
+    cache = ExistenceCache(negative_ttl=5.0, negative_max_entries=2)
+    assert cache.lookup(10) is None
+    cache.add(10)
+    cache.add(1000)
+    assert (cache.lookup(10), cache.lookup(1000), cache.lookup(11)) == (True, True, None)
+
+    now = 100.0
+    monkeypatch.setattr(existence.time, "monotonic", lambda: now)
+    for missing in (1, 2, 3):
+        cache.add_missing(missing)
+    assert (cache.lookup(1), cache.lookup(2), cache.lookup(3)) == (None, False, False)
+    cache.add(2)
+    assert cache.lookup(2) is True
+    now = 106.0
+    assert cache.lookup(3) is None
+    assert cache.stats.as_dict() == {"hits": 3, "negative_hits": 2, "misses": 4, "hit_ratio": 5 / 9}
+
+
+@pytest.mark.asyncio
+async def test_missing_ids_are_answered_from_negative_cache(client, monkeypatch):
+    """
+    Verifica que los sondeos repetidos de IDs inexistentes se respondan sin
+    consultar la base de datos y que los IDs recién creados se vean al momento.
+    """
+    monkeypatch.setattr(settings, "METRICS_DEBUG_HEADERS", True)
+    missing = 2_000_000_000
+    before = existence.users.stats.negative_hits
+    assert (await client.get(f"/users/{missing}")).headers["X-DB-Query-Count"] == "1"
+    for _ in range(3):
+        response = await client.get(f"/users/{missing}")
+        assert response.status_code == 404
+        assert response.headers["X-DB-Query-Count"] == "0"
+    assert (await client.get(f"/posts/{missing}/comments")).status_code == 404
+    assert (await client.get(f"/posts/{missing}/comments")).headers["X-DB-Query-Count"] == "0"
+
+    stats = (await client.get("/stats/existence")).json()
+    assert stats["users"]["negative_hits"] - before == 3
+
+    user_id = (await client.post("/users/", json={"username": "exists", "email": "exists@example.com"})).json()["id"]
+    post = await client.post("/posts/", json={"title": "Existe", "content": "...", "user_id": user_id})
+    assert (await client.get(f"/posts/{post.json()['id']}/comments")).status_code == 200
+    assert existence.posts.lookup(post.json()["id"]) is True
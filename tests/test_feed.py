@@ -0,0 +1,49 @@
+import pytest
+
+from api_rest_mini_blog import services
+from api_rest_mini_blog.conditional import make_etag
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.feed import feed
+
+
+@pytest.mark.asyncio
+async def test_feed_is_served_from_materialized_buffer(client, db_session, monkeypatch):
+    """
+    Verifica que las primeras páginas del feed se sirvan sin consultar la base de
+    datos, que las escrituras del proceso se apliquen de forma incremental y que
+    el ETag coincida con el calculado a partir de la base de datos.
+    """
+    monkeypatch.setattr(settings, "METRICS_DEBUG_HEADERS", True)
+    monkeypatch.setattr(feed, "max_age", 3600)
+    feed.invalidate()
+    user_id = (await client.post("/users/", json={"username": "feeder", "email": "feeder@example.com"})).json()["id"]
+    first = (await client.post("/posts/", json={"title": "Primero", "content": "a" * 300, "user_id": user_id})).json()
+
+    # La primera lectura reconstruye el feed (versión + resúmenes)
+    assert (await client.get("/posts/?limit=2")).headers["X-DB-Query-Count"] == "2"
+    second = (await client.post("/posts/", json={"title": "Segundo", "content": "b", "user_id": user_id})).json()
+    await client.post(f"/posts/{first['id']}/comments", json={"text": "hola", "user_id": user_id})
+
+    response = await client.get("/posts/?limit=2")
+    assert response.headers["X-DB-Query-Count"] == "0"
+    version = await services.get_feed_version(db_session)
+    assert response.headers["ETag"] == make_etag("feed", "summary", version, 0, 2, "")
+    posts = response.json()
+    assert [post["id"] for post in posts] == [second["id"], first["id"]]
+    assert (posts[1]["comment_count"], len(posts[1]["excerpt"])) == (1, services.EXCERPT_LENGTH)
+
+    first_page = await client.get("/posts/?limit=1")
+    # Cada página tiene su propio ETag
+    assert first_page.headers["ETag"] != response.headers["ETag"]
+    cursor = first_page.headers["X-Next-Cursor"]
+    following = await client.get(f"/posts/?limit=1&cursor={cursor}")
+    assert following.headers["X-DB-Query-Count"] == "0"
+    assert [post["id"] for post in following.json()] == [first["id"]]
+    assert (await client.get("/posts/?limit=2", headers={"If-None-Match": response.headers["ETag"]})).status_code == 304
+
+    # Una escritura de otro proceso deja un hueco en la versión: el feed se reconstruye
+    feed.version -= 1
+    await client.post("/posts/", json={"title": "Tercero", "content": "c", "user_id": user_id})
+    assert not feed.ready
+    assert await services.get_feed_version(db_session) == version + 1
+    assert (await client.get("/posts/?limit=2")).headers["X-DB-Query-Count"] == "2"
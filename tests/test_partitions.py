@@ -0,0 +1,78 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from api_rest_mini_blog.counters import reconcile_counters
+from api_rest_mini_blog.partitions import ensure_partitions, list_partitions, maintain_partitions
+
+
+async def _partition_of(db_session, comment_id: int) -> str:
+    result = await db_session.execute(
+        text("SELECT tableoid::regclass::text FROM comments WHERE id = :id"), {"id": comment_id}
+    )
+    return result.scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_comments_are_partitioned_and_archived_by_month(client, db_session):
+    """
+    Verifica que la importación cree la partición del mes de sus comentarios,
+    que al crear una partición se muevan a ella las filas de la partición por
+    defecto y que el mantenimiento archive las particiones anteriores a la
+    retención.
+    """
+    user_id = (await client.post("/users/", json={"username": "historian", "email": "historian@example.com"})).json()["id"]
+    headers = {"Content-Type": "application/x-ndjson"}
+    post_line = f'{{"title": "Antiguo", "content": "c", "user_id": {user_id}, "created_at": "2001-03-01T00:00:00Z"}}'
+    assert (await client.post("/import/posts", content=post_line, headers=headers)).json()["inserted"] == 1
+    post_id = (await client.get(f"/users/{user_id}/posts")).json()[0]["id"]
+
+    comment_line = f'{{"text": "marzo", "user_id": {user_id}, "post_id": {post_id}, "created_at": "2001-03-15T10:00:00Z"}}'
+    assert (await client.post("/import/comments", content=comment_line, headers=headers)).json()["inserted"] == 1
+    comments = (await client.get(f"/posts/{post_id}/comments")).json()
+    assert [comment["text"] for comment in comments] == ["marzo"]
+    assert await _partition_of(db_session, comments[0]["id"]) == "comments_y2001m03"
+
+    # Una fila de un mes sin partición cae en la de por defecto hasta que se crea la suya
+    result = await db_session.execute(
+        text(
+            "INSERT INTO comments (text, user_id, post_id, created_at) "
+            "VALUES ('mayo', :user_id, :post_id, '2001-05-10 00:00:00+00') RETURNING id"
+        ),
+        {"user_id": user_id, "post_id": post_id},
+    )
+    may_id = result.scalar_one()
+    assert await _partition_of(db_session, may_id) == "comments_default"
+    assert await ensure_partitions(db_session, date(2001, 5, 1), date(2001, 5, 31)) == ["comments_y2001m05"]
+    assert await _partition_of(db_session, may_id) == "comments_y2001m05"
+    await db_session.commit()
+
+    result = await maintain_partitions(db_session, months_ahead=0, retention_months=1, today=date(2001, 7, 1))
+    assert result == {"created": ["comments_y2001m07"], "archived": ["comments_y2001m03", "comments_y2001m05"]}
+    assert "comments_y2001m03" not in await list_partitions(db_session)
+    archived = await db_session.execute(text("SELECT count(*) FROM archive.comments_y2001m05"))
+    assert archived.scalar_one() == 1
+    assert (await client.get(f"/posts/{post_id}/comments")).json() == []
+
+    # Los contadores siguen contando los comentarios archivados hasta reconciliarlos
+    assert (await reconcile_counters(db_session))["posts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_comments_are_listed_whatever_the_post_date(client):
+    """
+    Verifica que los comentarios de un post con fecha futura (importado) se
+    devuelvan aunque sean anteriores a la fecha del post.
+    """
+    user_id = (await client.post("/users/", json={"username": "futurist", "email": "futurist@example.com"})).json()["id"]
+    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    post_line = f'{{"title": "Mañana", "content": "c", "user_id": {user_id}, "created_at": "{tomorrow}"}}'
+    headers = {"Content-Type": "application/x-ndjson"}
+    assert (await client.post("/import/posts", content=post_line, headers=headers)).json()["inserted"] == 1
+    post_id = (await client.get(f"/users/{user_id}/posts")).json()[0]["id"]
+
+    assert (await client.post(f"/posts/{post_id}/comments", json={"text": "hoy", "user_id": user_id})).status_code == 201
+    assert [comment["text"] for comment in (await client.get(f"/posts/{post_id}/comments")).json()] == ["hoy"]
+    assert [comment["text"] for comment in (await client.get(f"/posts/{post_id}")).json()["comments"]] == ["hoy"]
+    assert [comment["text"] for comment in (await client.get(f"/posts/?ids={post_id}")).json()[0]["comments"]] == ["hoy"]
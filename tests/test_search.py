@@ -0,0 +1,35 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from api_rest_mini_blog import models
+from api_rest_mini_blog.database import Base
+from api_rest_mini_blog.search import search
+
+
+@pytest_asyncio.fixture
+async def sqlite_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_search_fallback_without_postgres(sqlite_session):
+    """Verifica la búsqueda por subcadenas que se usa cuando el motor no es Postgres."""
+    user = models.User(username="sqlite", email="sqlite@example.com")
+    post = models.Post(title="Recetas de otoño", content="Sopa de calabaza & jengibre", author=user)
+    other = models.Post(title="Jardín", content="Plantar calabaza en primavera", author=user)
+    sqlite_session.add_all([post, other, models.Comment(text="¡Qué rica sopa!", author=user, post=post)])
+    await sqlite_session.commit()
+
+    hits = await search(sqlite_session, q="sopa")
+    assert [(hit.kind, hit.post_id) for hit in hits] == [("post", post.id), ("comment", post.id)]
+    assert hits[0].headline == "<mark>Sopa</mark> de calabaza &amp; jengibre"
+
+    first = await search(sqlite_session, q="calabaza", limit=1)
+    second = await search(sqlite_session, q="calabaza", limit=1, after=(first[0].rank, first[0].kind, first[0].post_id))
+    assert {first[0].post_id, second[0].post_id} == {post.id, other.id}
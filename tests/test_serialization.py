@@ -0,0 +1,31 @@
+import pytest
+from pydantic import TypeAdapter
+
+from api_rest_mini_blog import schemas, services
+from api_rest_mini_blog.config import settings
+from api_rest_mini_blog.serialization import build_dumps
+
+
+@pytest.mark.parametrize("serializer", ["pydantic", "orjson"])
+@pytest.mark.asyncio
+async def test_post_rows_match_orm_serialization(db_session, monkeypatch, serializer):
+    """
+    Verifica que las filas de `get_post_rows` serialicen exactamente igual que
+    los objetos ORM validados con `schemas.Post`, con ambos serializadores.
+    """
+    if serializer == "orjson":
+        # Extra opcional: no forma parte de las dependencias de desarrollo
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(settings, "JSON_SERIALIZER", serializer)
+    dumps = build_dumps()
+    author = await services.create_user(db_session, schemas.UserCreate(username=f"rows_{serializer}", email=f"rows_{serializer}@example.com"))
+    post = await services.create_post(db_session, schemas.PostCreate(title="Filas", content="ñandú", user_id=author.id))
+    for text in ("uno", "dos"):
+        await services.create_comment(db_session, schemas.CommentCreate(text=text, user_id=author.id), post_id=post.id)
+
+    rows = await services.get_post_rows(db_session, limit=1)
+    orm = TypeAdapter(list[schemas.Post]).validate_python(
+        await services.get_posts(db_session, limit=1), from_attributes=True
+    )
+    orm[0].comments.sort(key=lambda comment: (comment.created_at, comment.id))
+    assert dumps(rows) == TypeAdapter(list[schemas.Post]).dump_json(orm)
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete
+
+from api_rest_mini_blog import models, services
+from api_rest_mini_blog.trending import TrendingScores
+
+
+def test_scores_decay_and_keep_the_best_candidates():
+    """
+    Verifica que cada comentario cuente la mitad por cada vida media transcurrida
+    y que, con la capacidad llena, una publicación nueva solo entre si supera a
+    la peor de las guardadas.
+    """
+    scores = TrendingScores(size=2, capacity=2, half_life=3600)
+    now = datetime.now(timezone.utc)
+    scores.record(1, now)
+    for _ in range(3):
+        scores.record(2, now - timedelta(hours=1))
+    assert [(post_id, round(scores.current(score, now), 6)) for post_id, score in scores.top(2)] == [(2, 1.5), (1, 1.0)]
+
+    scores.record(3, now - timedelta(hours=2))
+    assert [post_id for post_id, _ in scores.top(5)] == [2, 1]
+    scores.record(3, now + timedelta(hours=1))
+    assert [post_id for post_id, _ in scores.top(5)] == [3, 2]
+    assert scores.stats.evicted == 1
+
+
+@pytest.mark.asyncio
+async def test_trending_posts_are_snapshotted_and_rebuilt(client, db_session, monkeypatch):
+    """
+    Verifica que `GET /posts/trending` ordene por los comentarios recientes sin
+    leer la tabla de comentarios, que el snapshot guarde las puntuaciones y que
+    un proceso nuevo obtenga el mismo orden, tanto del snapshot como
+    reconstruyéndolo a partir de los comentarios.
+    """
+    trending = TrendingScores(size=10, capacity=100, half_life=3600)
+    monkeypatch.setattr(services, "trending", trending)
+    await db_session.execute(delete(models.PostTrendingScore))
+    await db_session.commit()
+
+    user_id = (await client.post("/users/", json={"username": "trendsetter", "email": "trend@example.com"})).json()["id"]
+    quiet, busy = [
+        (await client.post("/posts/", json={"title": title, "content": "c", "user_id": user_id})).json()["id"]
+        for title in ("Tranquilo", "Animado")
+    ]
+    for post_id, comments in ((quiet, 1), (busy, 3)):
+        for _ in range(comments):
+            await client.post(f"/posts/{post_id}/comments", json={"text": "!", "user_id": user_id})
+
+    response = (await client.get("/posts/trending?limit=2")).json()
+    assert [(post["id"], post["title"], round(post["score"])) for post in response] == [
+        (busy, "Animado", 3),
+        (quiet, "Tranquilo", 1),
+    ]
+
+    await trending.snapshot(db_session)
+    restarted = TrendingScores(size=10, capacity=100, half_life=3600)
+    await restarted.rebuild(db_session)
+    assert restarted.top(2) == trending.top(2)
+
+    await db_session.execute(delete(models.PostTrendingScore))
+    await db_session.commit()
+    rebuilt = TrendingScores(size=100, capacity=100, half_life=3600)
+    await rebuilt.rebuild(db_session)
+    # La reconstrucción incluye los comentarios recientes de otras pruebas
+    scores = dict(rebuilt.top(100))
+    assert (scores[busy], scores[quiet]) == pytest.approx(tuple(score for _, score in trending.top(2)))